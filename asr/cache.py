@@ -0,0 +1,59 @@
+"""
+Content-addressed transcription cache.
+
+Keyed by the decoded audio hash plus everything that changes the transcript (model size, forced source
+language, decode options), so re-submitting the same video (e.g. to add languages) skips ASR entirely.
+Entries are also stored under the uploaded file's sha256, which the subprocess engine (no in-process
+decode) can look up directly.
+Size-bounded by VIDIOLINGUA_ASR_CACHE_MB (0 disables).
+"""
+
+import os
+import threading
+
+from asr.model_pool import DEFAULT_MODEL
+from asr.parallel import CHUNK_SECONDS, asr_workers
+from asr.vad import vad_enabled
+from shared.audio import SAMPLE_RATE
+from shared.disk_cache import DiskLRUCache, cache_root, make_key
+
+ASR_CACHE_MB = int(os.environ.get("VIDIOLINGUA_ASR_CACHE_MB", "256"))
+
+_cache: DiskLRUCache | None = None
+_cache_lock = threading.Lock()
+
+
+def transcription_cache() -> DiskLRUCache | None:
+    global _cache
+    if ASR_CACHE_MB <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskLRUCache(cache_root() / "asr", ASR_CACHE_MB * 1024 * 1024, suffix=".json")
+        return _cache
+
+
+def _decode_options(sample_rate: int) -> dict:
+    return {
+        "sample_rate": sample_rate,
+        "beam_size": 1,
+        "vad": vad_enabled(),
+        "chunk_seconds": CHUNK_SECONDS if asr_workers() > 1 else None,
+    }
+
+
+def _source_language(source_language: str | None) -> str | None:
+    return source_language or os.environ.get("VIDIOLINGUA_SOURCE_LANGUAGE", "").strip() or None
+
+
+def transcription_key(audio, model_size: str | None, source_language: str | None) -> str:
+    return make_key(
+        audio.sha256(), model_size or DEFAULT_MODEL, _source_language(source_language), _decode_options(audio.sample_rate)
+    )
+
+
+def upload_transcription_key(file_sha256: str, model_size: str | None, source_language: str | None) -> str:
+    """Key by the uploaded file's hash (computed while streaming the upload), usable before any decode."""
+    return make_key(
+        "upload", file_sha256, model_size or DEFAULT_MODEL, _source_language(source_language), _decode_options(SAMPLE_RATE)
+    )
@@ -0,0 +1,198 @@
+"""
+Process-wide Whisper model registry.
+
+Loads faster-whisper models once and hands out instances to concurrent transcriptions.
+Each model size keeps up to VIDIOLINGUA_WHISPER_INSTANCES instances; all loaded instances together
+stay within VIDIOLINGUA_WHISPER_MEMORY_MB, evicting idle instances of the least recently used model
+size when a different size needs room. Models loaded outside this process (the parallel ASR worker
+processes) are reserved against the same budget and can be evicted the same way while idle.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Whisper model size: "tiny" (fast, less accurate), "base", "small", "medium", "large-v3"
+WHISPER_MODELS = ("tiny", "base", "small", "medium", "large-v3")
+DEFAULT_MODEL = os.environ.get("VIDIOLINGUA_WHISPER_MODEL", "base").strip() or "base"
+
+# Approximate resident memory of one int8 CPU instance, used for the memory budget
+MODEL_MEMORY_MB = {"tiny": 150, "base": 250, "small": 600, "medium": 1500, "large-v3": 3500}
+
+
+class _Entry:
+    def __init__(self):
+        self.idle = []
+        self.total = 0
+        self.last_used = 0.0
+
+
+class _External:
+    def __init__(self, mb: int, evict):
+        self.mb = mb
+        self.evict = evict
+        self.idle = False
+        self.last_used = time.monotonic()
+
+
+class WhisperModelPool:
+    def __init__(
+        self,
+        instances_per_model: int | None = None,
+        memory_budget_mb: int | None = None,
+        device: str = "cpu",
+        compute_type: str = "int8",
+    ):
+        self.instances_per_model = max(1, instances_per_model or int(os.environ.get("VIDIOLINGUA_WHISPER_INSTANCES", "1")))
+        self.memory_budget_mb = memory_budget_mb or int(os.environ.get("VIDIOLINGUA_WHISPER_MEMORY_MB", "4096"))
+        self.device = device
+        self.compute_type = compute_type
+        self._entries: dict[str, _Entry] = {}
+        self._external: dict[str, _External] = {}
+        self._used_mb = 0
+        self._cond = threading.Condition()
+        self.loads = 0
+        self.evictions = 0
+
+    def _load(self, model_size: str):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError(
+                "ASR requires faster-whisper. Install with: pip install faster-whisper"
+            ) from e
+        return WhisperModel(model_size, device=self.device, compute_type=self.compute_type)
+
+    def _evict_for(self, need_mb: int, keep: str | None = None) -> None:
+        """Drop idle instances of other sizes and idle reservations, least recently used first, until need_mb fits."""
+        candidates = sorted(
+            [(e.last_used, size, False) for size, e in self._entries.items() if size != keep and e.idle]
+            + [(x.last_used, name, True) for name, x in self._external.items() if x.idle]
+        )
+        for _, size, external in candidates:
+            if self._used_mb + need_mb <= self.memory_budget_mb:
+                return
+            if external:
+                reservation = self._external.pop(size)
+                reservation.evict()
+                self._used_mb -= reservation.mb
+                self.evictions += 1
+                continue
+            entry = self._entries[size]
+            while entry.idle and self._used_mb + need_mb > self.memory_budget_mb:
+                entry.idle.pop()
+                entry.total -= 1
+                self._used_mb -= MODEL_MEMORY_MB.get(size, 1000)
+                self.evictions += 1
+            if entry.total == 0:
+                del self._entries[size]
+            if self._used_mb + need_mb <= self.memory_budget_mb:
+                return
+
+    def _checkout(self, model_size: str):
+        """Return an idle instance, or None after reserving a slot the caller must load into."""
+        need = MODEL_MEMORY_MB.get(model_size, 1000)
+        with self._cond:
+            while True:
+                entry = self._entries.setdefault(model_size, _Entry())
+                entry.last_used = time.monotonic()
+                if entry.idle:
+                    return entry.idle.pop()
+                if entry.total < self.instances_per_model:
+                    if self._used_mb + need > self.memory_budget_mb:
+                        self._evict_for(need, keep=model_size)
+                    # A single instance is always allowed, even if the budget is smaller than the model
+                    if self._used_mb + need <= self.memory_budget_mb or self._used_mb == 0:
+                        entry.total += 1
+                        self._used_mb += need
+                        return None
+                self._cond.wait()
+
+    def reserve(self, name: str, mb: int, evict) -> None:
+        """
+        Count mb of models held elsewhere (e.g. by worker processes) against the budget, blocking until it
+        fits. The reservation starts busy; while it is marked idle, evict() may be called (with the pool's
+        lock held, so it must not block) to free it, after which it is gone and mark() returns False.
+        """
+        with self._cond:
+            while True:
+                if self._used_mb + mb > self.memory_budget_mb:
+                    self._evict_for(mb)
+                # As with instances, a lone reservation is allowed even if it exceeds the budget
+                if self._used_mb + mb <= self.memory_budget_mb or self._used_mb == 0:
+                    self._external[name] = _External(mb, evict)
+                    self._used_mb += mb
+                    return
+                self._cond.wait()
+
+    def mark(self, name: str, idle: bool) -> bool:
+        """Mark a reservation idle (evictable) or busy. False if it was evicted."""
+        with self._cond:
+            reservation = self._external.get(name)
+            if reservation is None:
+                return False
+            reservation.idle = idle
+            reservation.last_used = time.monotonic()
+            if idle:
+                self._cond.notify_all()
+            return True
+
+    def release(self, name: str) -> None:
+        with self._cond:
+            reservation = self._external.pop(name, None)
+            if reservation is not None:
+                self._used_mb -= reservation.mb
+                self._cond.notify_all()
+
+    @contextmanager
+    def acquire(self, model_size: str | None = None):
+        """Borrow a model instance for one transcription; blocks while all instances are busy."""
+        model_size = model_size or DEFAULT_MODEL
+        model = self._checkout(model_size)
+        if model is None:
+            try:
+                model = self._load(model_size)
+                self.loads += 1
+            except Exception:
+                with self._cond:
+                    self._entries[model_size].total -= 1
+                    self._used_mb -= MODEL_MEMORY_MB.get(model_size, 1000)
+                    self._cond.notify_all()
+                raise
+        try:
+            yield model
+        finally:
+            with self._cond:
+                entry = self._entries.setdefault(model_size, _Entry())
+                entry.idle.append(model)
+                entry.last_used = time.monotonic()
+                self._cond.notify_all()
+
+    def preload(self, model_size: str | None = None) -> None:
+        """Load one instance ahead of the first job (warm start)."""
+        with self.acquire(model_size):
+            pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "models": {size: {"loaded": e.total, "idle": len(e.idle)} for size, e in self._entries.items()},
+                "reservedMb": {name: x.mb for name, x in self._external.items()},
+                "memoryMb": self._used_mb,
+                "memoryBudgetMb": self.memory_budget_mb,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+_pool: WhisperModelPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> WhisperModelPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WhisperModelPool()
+        return _pool
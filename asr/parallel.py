@@ -0,0 +1,217 @@
+"""
+Chunked, multi-core ASR for long recordings.
+
+Splits 16 kHz mono audio into chunks cut at the quietest point near each chunk boundary, transcribes
+the chunks on a process pool (one Whisper model per worker), then stitches the segments back onto
+the global timeline. One worker pool is kept between jobs; its models are reserved in the Whisper
+memory budget (asr.model_pool), which may shut the pool down while it is idle to make room. Chunks overlap slightly so words at a cut are not lost; segments are kept only
+by the chunk that owns their midpoint, and words repeated across a cut are dropped.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from asr.model_pool import MODEL_MEMORY_MB, get_model_pool
+from asr.vad import FRAME_SECONDS, frame_energy
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = float(os.environ.get("VIDIOLINGUA_ASR_CHUNK_SECONDS", "60"))
+# How far either side of the nominal boundary to look for silence
+SEARCH_SECONDS = 5.0
+OVERLAP_SECONDS = 0.5
+
+
+def asr_workers() -> int:
+    """Worker processes for parallel ASR (VIDIOLINGUA_ASR_WORKERS: a number or "auto"; 1 disables)."""
+    value = os.environ.get("VIDIOLINGUA_ASR_WORKERS", "1").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value or 1))
+
+
+def min_parallel_seconds() -> float:
+    return float(os.environ.get("VIDIOLINGUA_ASR_PARALLEL_MIN_SECONDS", "300"))
+
+
+def find_chunks(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    chunk_seconds: float = CHUNK_SECONDS,
+    search_seconds: float = SEARCH_SECONDS,
+) -> list[tuple[int, int]]:
+    """Split into (start, end) sample ranges of about chunk_seconds, cutting at the quietest frame nearby."""
+    total = len(audio)
+    chunk = int(chunk_seconds * sample_rate)
+    if total <= chunk:
+        return [(0, total)]
+    energy = frame_energy(audio, sample_rate)
+    frame = int(sample_rate * FRAME_SECONDS)
+    search = int(search_seconds / FRAME_SECONDS)
+    cuts = [0]
+    while total - cuts[-1] > chunk:
+        nominal = (cuts[-1] + chunk) // frame
+        lo = max(cuts[-1] // frame + 1, nominal - search)
+        hi = min(len(energy), nominal + search + 1)
+        if lo >= hi:
+            cut = cuts[-1] + chunk
+        else:
+            cut = (lo + int(np.argmin(energy[lo:hi]))) * frame
+        cuts.append(cut)
+    cuts.append(total)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+_worker_model = None
+
+
+def _init_worker(model_size: str, cpu_threads: int) -> None:
+    global _worker_model
+    from faster_whisper import WhisperModel
+
+    _worker_model = WhisperModel(model_size, device="cpu", compute_type="int8", cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(args) -> dict:
+    audio, offset_s, language = args
+    segments_gen, info = _worker_model.transcribe(audio, language=language, beam_size=1)
+    return {
+        "segments": [(offset_s + s.start, offset_s + s.end, (s.text or "").strip()) for s in segments_gen],
+        "language": info.language,
+        "language_confidence": float(getattr(info, "language_probability", 0.0) or 0.0),
+    }
+
+
+def _drop_repeated_words(previous: str, text: str, max_words: int = 8) -> str:
+    """Remove leading words of text that repeat the trailing words of previous (overlap at a cut)."""
+    prev_words = previous.split()
+    words = text.split()
+    for n in range(min(max_words, len(prev_words), len(words)), 0, -1):
+        if [w.lower() for w in prev_words[-n:]] == [w.lower() for w in words[:n]]:
+            return " ".join(words[n:])
+    return text
+
+
+def stitch(results: list[dict], cores: list[tuple[float, float]]) -> list[dict]:
+    """Merge per-chunk segments (global timestamps) keeping each in the chunk that owns its midpoint."""
+    merged = []
+    for result, (core_start, core_end) in zip(results, cores):
+        first = True
+        for start, end, text in result["segments"]:
+            mid = (start + end) / 2
+            if not text or not (core_start <= mid < core_end):
+                continue
+            if first and merged:
+                text = _drop_repeated_words(merged[-1]["text"], text)
+                start = max(start, merged[-1]["end"])
+            first = False
+            if text:
+                merged.append({"start": round(start, 2), "end": round(max(end, start), 2), "text": text})
+    return merged
+
+
+_RESERVATION = "asr-workers"
+
+
+class _WorkerPool:
+    def __init__(self, model_size: str, workers: int):
+        self.key = (model_size, workers)
+        self.users = 0
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, cpu_threads),
+        )
+
+    def shutdown(self) -> None:
+        # Called from the memory budget with its lock held, so do not wait for the workers to exit
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: _WorkerPool | None = None
+_pool_cond = threading.Condition()
+
+
+@contextmanager
+def worker_pool(model_size: str, workers: int):
+    """
+    Use the worker pool for (model_size, workers), starting it if needed; workers is capped at what
+    VIDIOLINGUA_WHISPER_MEMORY_MB holds. The pool stays up after use so its models stay loaded across
+    jobs; a job with another model size or worker count waits for current users, then replaces it.
+    While in use, the pool's workers x model memory is held in the Whisper budget.
+    """
+    global _pool
+    budget = get_model_pool()
+    # Each worker loads its own model: start no more workers than the memory budget holds
+    model_mb = MODEL_MEMORY_MB.get(model_size, 1000)
+    workers = max(1, min(workers, budget.memory_budget_mb // model_mb))
+    with _pool_cond:
+        while _pool is not None and _pool.key != (model_size, workers) and _pool.users:
+            _pool_cond.wait()
+        if _pool is not None and (_pool.key != (model_size, workers) or not budget.mark(_RESERVATION, False)):
+            # Another size, or evicted by the memory budget while idle
+            _pool.shutdown()
+            budget.release(_RESERVATION)
+            _pool = None
+        if _pool is None:
+            pool = _WorkerPool(model_size, workers)
+            budget.reserve(_RESERVATION, workers * model_mb, pool.shutdown)
+            _pool = pool
+        pool = _pool
+        pool.users += 1
+    try:
+        yield pool.executor
+    finally:
+        with _pool_cond:
+            pool.users -= 1
+            if not pool.users:
+                budget.mark(_RESERVATION, True)
+                _pool_cond.notify_all()
+
+
+def transcribe_parallel(
+    audio: np.ndarray,
+    model_size: str,
+    language: str | None = None,
+    workers: int | None = None,
+) -> tuple[list[dict], str | None, float]:
+    """
+    Transcribe audio (float32, 16 kHz) across worker processes.
+    Returns (segments, language, language_confidence). Without a forced language, the language
+    detected on most of the audio wins.
+    """
+    workers = workers or asr_workers()
+    chunks = find_chunks(audio)
+    overlap = int(OVERLAP_SECONDS * SAMPLE_RATE)
+    jobs = []
+    cores = []
+    for start, end in chunks:
+        lo = max(0, start - overlap)
+        hi = min(len(audio), end + overlap)
+        jobs.append((audio[lo:hi], lo / SAMPLE_RATE, language))
+        cores.append((start / SAMPLE_RATE, end / SAMPLE_RATE))
+    try:
+        from faster_whisper import WhisperModel  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "ASR requires faster-whisper. Install with: pip install faster-whisper"
+        ) from e
+    with worker_pool(model_size, workers) as pool:
+        results = list(pool.map(_transcribe_chunk, jobs))
+
+    votes = Counter()
+    confidence = {}
+    for (start, end), r in zip(chunks, results):
+        if r["language"]:
+            votes[r["language"]] += end - start
+            confidence.setdefault(r["language"], []).append(r["language_confidence"])
+    detected = language or (votes.most_common(1)[0][0] if votes else None)
+    detected_conf = float(np.mean(confidence[detected])) if detected in confidence else 0.0
+    return stitch(results, cores), detected, detected_conf
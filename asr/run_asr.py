@@ -2,91 +2,166 @@
 Automatic Speech Recognition (ASR) Module
 
 Transcribes video files using Whisper (faster-whisper).
-Extracts audio with ffmpeg, then transcribes full content with timestamps.
+Decodes audio with ffmpeg straight into memory (shared.audio), then transcribes full content with timestamps.
 """
 
+import argparse
 import json
 import os
-import subprocess
-import tempfile
+import sys
+from contextlib import contextmanager
 from pathlib import Path
 
+if __package__ in (None, ""):
+    # Run as a script (python asr/run_asr.py): make the project root importable
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asr.model_pool import DEFAULT_MODEL, get_model_pool
+from asr.parallel import asr_workers, min_parallel_seconds, transcribe_parallel
+from asr.vad import SpeechMap, detect_speech, vad_enabled
+from shared.audio import DecodedAudio, decode_audio
+
 INPUT_DIR = Path(__file__).parent / "input"
 OUTPUT_DIR = Path(__file__).parent / "output"
 
 # Whisper model size: "tiny" (fast, less accurate), "base", "small", "medium", "large-v3"
-WHISPER_MODEL = "base"
+WHISPER_MODEL = DEFAULT_MODEL
 
 
-def extract_audio_ffmpeg(video_path: Path, output_wav: Path) -> None:
-    """Extract 16kHz mono WAV for Whisper using ffmpeg."""
-    cmd = [
-        "ffmpeg", "-y", "-i", str(video_path),
-        "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
-        str(output_wav),
-    ]
-    r = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
-    if r.returncode != 0:
-        raise RuntimeError(f"ffmpeg extract failed: {r.stderr or r.stdout}")
+def _segment_dicts(segments_gen):
+    for s in segments_gen:
+        text = (s.text or "").strip()
+        if text:
+            yield {
+                "start": round(s.start, 2),
+                "end": round(s.end, 2),
+                "text": text,
+            }
 
 
-def process_video(video_path: Path) -> dict:
-    """
-    Transcribe video: extract audio, run Whisper, return segments with timestamps.
-    """
-    try:
-        from faster_whisper import WhisperModel
-    except ImportError as e:
-        raise RuntimeError(
-            "ASR requires faster-whisper. Install with: pip install faster-whisper"
-        ) from e
-
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        audio_path = Path(tmp.name)
-    try:
-        extract_audio_ffmpeg(video_path, audio_path)
-        model = WhisperModel(WHISPER_MODEL, device="cpu", compute_type="int8")
-        forced_language = os.environ.get("VIDIOLINGUA_SOURCE_LANGUAGE", "").strip() or None
+def _transcribe_serial(audio, model_size: str, language: str | None) -> tuple[list[dict], str | None, float]:
+    with get_model_pool().acquire(model_size) as model:
         segments_gen, info = model.transcribe(
-            str(audio_path),
-            language=forced_language,
+            audio,
+            language=language,
             beam_size=1,
         )
-        segments_list = []
-        for s in segments_gen:
-            text = (s.text or "").strip()
-            if text:
-                segments_list.append({
-                    "start": round(s.start, 2),
-                    "end": round(s.end, 2),
-                    "text": text,
-                })
-        if not segments_list:
-            segments_list = [{"start": 0.0, "end": 0.1, "text": "(no speech detected)"}]
-        return {
-            "video_file": str(video_path),
-            "segments": segments_list,
-            "language": info.language or forced_language or "en",
-            "language_confidence": float(getattr(info, "language_probability", 0.0) or 0.0),
-        }
-    finally:
-        audio_path.unlink(missing_ok=True)
-
-
-def main():
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    video_files = (
-        list(INPUT_DIR.glob("*.mp4"))
-        + list(INPUT_DIR.glob("*.avi"))
-        + list(INPUT_DIR.glob("*.mov"))
+        # Segments are decoded lazily; consume them while the model is still checked out
+        segments_list = list(_segment_dicts(segments_gen))
+    return segments_list, info.language, float(getattr(info, "language_probability", 0.0) or 0.0)
+
+
+def _speech_samples(audio: DecodedAudio):
+    """The samples to transcribe and, with VAD on, the SpeechMap that maps their timestamps back."""
+    samples = audio.samples()
+    if not vad_enabled():
+        return samples, None
+    # Only speech regions go to Whisper; timestamps are mapped back afterwards
+    speech_map = SpeechMap(detect_speech(samples, audio.sample_rate))
+    return speech_map.compact(samples), speech_map
+
+
+def process_video(
+    video_path: Path,
+    source_language: str | None = None,
+    model_size: str | None = None,
+    audio: DecodedAudio | None = None,
+) -> dict:
+    """
+    Transcribe video: decode audio, run Whisper, return segments with timestamps.
+    source_language forces the spoken language; defaults to VIDIOLINGUA_SOURCE_LANGUAGE, else auto-detect.
+    model_size picks the Whisper model (default WHISPER_MODEL); instances come from the shared model pool.
+    audio is the job's already-decoded PCM; when omitted the video is decoded here.
+    Non-speech is skipped with a VAD pre-pass (VIDIOLINGUA_ASR_VAD=0 disables it). Speech longer than
+    VIDIOLINGUA_ASR_PARALLEL_MIN_SECONDS is split across VIDIOLINGUA_ASR_WORKERS processes when that is above 1.
+    """
+    if audio is None:
+        audio = decode_audio(video_path)
+    forced_language = (
+        source_language or os.environ.get("VIDIOLINGUA_SOURCE_LANGUAGE", "").strip() or None
+    )
+    model_size = model_size or WHISPER_MODEL
+    samples, speech_map = _speech_samples(audio)
+    if len(samples) == 0:
+        segments_list, language, confidence = [], None, 0.0
+    elif asr_workers() > 1 and len(samples) / audio.sample_rate >= min_parallel_seconds():
+        segments_list, language, confidence = transcribe_parallel(samples, model_size, forced_language)
+    else:
+        segments_list, language, confidence = _transcribe_serial(samples, model_size, forced_language)
+    if speech_map is not None:
+        segments_list = speech_map.remap_segments(segments_list)
+    if not segments_list:
+        segments_list = [{"start": 0.0, "end": 0.1, "text": "(no speech detected)"}]
+    return {
+        "video_file": str(video_path),
+        "segments": segments_list,
+        "language": language or forced_language or "en",
+        "language_confidence": confidence,
+    }
+
+
+@contextmanager
+def stream_segments(
+    video_path: Path,
+    source_language: str | None = None,
+    model_size: str | None = None,
+    audio: DecodedAudio | None = None,
+):
+    """
+    Streaming counterpart of process_video: yields (language, language_confidence, segments), where
+    segments iterates {"start", "end", "text"} dicts on the original timeline as Whisper decodes them,
+    so downstream stages can start before recognition ends. The model stays checked out of the pool
+    until the block exits. Always transcribes serially (no VIDIOLINGUA_ASR_WORKERS split).
+    """
+    if audio is None:
+        audio = decode_audio(video_path)
+    forced_language = (
+        source_language or os.environ.get("VIDIOLINGUA_SOURCE_LANGUAGE", "").strip() or None
     )
+    samples, speech_map = _speech_samples(audio)
+    if len(samples) == 0:
+        yield forced_language or "en", 0.0, iter(())
+        return
+    with get_model_pool().acquire(model_size or WHISPER_MODEL) as model:
+        segments_gen, info = model.transcribe(samples, language=forced_language, beam_size=1)
+        segments = _segment_dicts(segments_gen)
+        if speech_map is not None:
+            segments = (speech_map.remap_segments([seg])[0] for seg in segments)
+        yield (
+            info.language or forced_language or "en",
+            float(getattr(info, "language_probability", 0.0) or 0.0),
+            segments,
+        )
+
+
+def _collect_inputs(paths: list[Path], patterns: tuple[str, ...]) -> list[Path]:
+    files = []
+    for p in paths:
+        if p.is_dir():
+            for pattern in patterns:
+                files.extend(sorted(p.glob(pattern)))
+        elif p.is_file():
+            files.append(p)
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe videos with Whisper.")
+    parser.add_argument("--input", nargs="+", type=Path, default=[INPUT_DIR], help="Video files or directories")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--model", default=WHISPER_MODEL, help="Whisper model size")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    video_files = _collect_inputs(args.input, ("*.mp4", "*.avi", "*.mov"))
     if not video_files:
-        print(f"No video files found in {INPUT_DIR}")
+        print(f"No video files found in {', '.join(str(p) for p in args.input)}")
         return
     for video_file in video_files:
         print(f"Processing: {video_file.name}")
-        transcription = process_video(video_file)
-        output_file = OUTPUT_DIR / f"{video_file.stem}_transcription.json"
+        transcription = process_video(video_file, model_size=args.model)
+        output_file = output_dir / f"{video_file.stem}_transcription.json"
         with open(output_file, "w", encoding="utf-8") as f:
             json.dump(transcription, f, indent=2, ensure_ascii=False)
         print(f"Transcription saved to: {output_file} ({len(transcription['segments'])} segments)")
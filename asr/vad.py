@@ -0,0 +1,126 @@
+"""
+Voice activity detection for the ASR stage.
+
+A vectorized energy / zero-crossing detector over 16 kHz mono PCM. Speech regions are padded, merged
+across short pauses and concatenated (with a short silence between them) into a compact buffer for
+Whisper; SpeechMap translates timestamps on that buffer back to the original timeline.
+"""
+
+import os
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+# Speech must be this far above the noise floor (10th percentile frame energy)
+MARGIN_DB = 12.0
+# Frames quieter than this are never speech, whatever the noise floor
+ABS_MIN_DB = -55.0
+MIN_SPEECH_SECONDS = 0.25
+MIN_SILENCE_SECONDS = 0.5
+PAD_SECONDS = 0.2
+# Silence inserted between regions in the compact buffer so words do not run together
+GAP_SECONDS = 0.3
+
+
+def vad_enabled() -> bool:
+    return os.environ.get("VIDIOLINGUA_ASR_VAD", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def frame_energy(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """RMS energy per FRAME_SECONDS frame."""
+    frame = int(sample_rate * FRAME_SECONDS)
+    n = len(audio) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[: n * frame].reshape(n, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def zero_crossing_rate(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Fraction of sign changes per FRAME_SECONDS frame."""
+    frame = int(sample_rate * FRAME_SECONDS)
+    n = len(audio) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    signs = np.signbit(audio[: n * frame]).reshape(n, frame)
+    return np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame - 1)
+
+
+def _runs(mask: np.ndarray) -> list[tuple[int, int]]:
+    """(start, end) frame indices of consecutive True runs."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def detect_speech(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> list[tuple[int, int]]:
+    """Return speech regions as (start, end) sample ranges."""
+    energy = frame_energy(audio, sample_rate)
+    if len(energy) == 0:
+        return []
+    energy_db = 20 * np.log10(energy + 1e-10)
+    floor_db = float(np.percentile(energy_db, 10))
+    loud_db = float(np.percentile(energy_db, 95))
+    threshold = max(min(floor_db + MARGIN_DB, loud_db - 10.0), ABS_MIN_DB)
+    zcr = zero_crossing_rate(audio, sample_rate)
+    # Voiced speech is loud; unvoiced consonants are quieter but have a high zero-crossing rate
+    speech = (energy_db > threshold) | ((energy_db > threshold - 6.0) & (zcr > 0.3))
+
+    min_silence = int(MIN_SILENCE_SECONDS / FRAME_SECONDS)
+    for start, end in _runs(~speech):
+        if start > 0 and end < len(speech) and end - start < min_silence:
+            speech[start:end] = True
+    min_speech = int(MIN_SPEECH_SECONDS / FRAME_SECONDS)
+    frame = int(sample_rate * FRAME_SECONDS)
+    pad = int(PAD_SECONDS * sample_rate)
+    regions = []
+    for start, end in _runs(speech):
+        if end - start < min_speech:
+            continue
+        lo = max(0, start * frame - pad)
+        hi = min(len(audio), end * frame + pad)
+        if regions and lo <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], hi)
+        else:
+            regions.append((lo, hi))
+    return regions
+
+
+class SpeechMap:
+    """Layout of speech regions in a compact buffer, with mapping back to original time."""
+
+    def __init__(self, regions: list[tuple[int, int]], sample_rate: int = SAMPLE_RATE, gap_seconds: float = GAP_SECONDS):
+        self.regions = regions
+        self.sample_rate = sample_rate
+        self.gap = int(gap_seconds * sample_rate)
+        lengths = np.array([end - start for start, end in regions], dtype=np.int64)
+        self._compact_starts = np.concatenate(([0], np.cumsum(lengths + self.gap)[:-1])) if regions else np.zeros(0)
+        self._lengths = lengths
+
+    @property
+    def speech_seconds(self) -> float:
+        return float(self._lengths.sum()) / self.sample_rate
+
+    def compact(self, audio: np.ndarray) -> np.ndarray:
+        """Concatenate the speech regions of audio, separated by GAP_SECONDS of silence."""
+        if not self.regions:
+            return audio[:0]
+        out = np.zeros(int(self._compact_starts[-1] + self._lengths[-1]), dtype=audio.dtype)
+        for (start, end), at in zip(self.regions, self._compact_starts):
+            out[at: at + end - start] = audio[start:end]
+        return out
+
+    def to_original(self, t: float) -> float:
+        """Map a time (seconds) on the compact buffer back to the original timeline."""
+        if not self.regions:
+            return t
+        pos = t * self.sample_rate
+        i = max(0, int(np.searchsorted(self._compact_starts, pos, side="right")) - 1)
+        within = min(max(pos - self._compact_starts[i], 0), self._lengths[i])
+        return float(self.regions[i][0] + within) / self.sample_rate
+
+    def remap_segments(self, segments: list[dict]) -> list[dict]:
+        return [
+            {**s, "start": round(self.to_original(s["start"]), 2), "end": round(self.to_original(s["end"]), 2)}
+            for s in segments
+        ]
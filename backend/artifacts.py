@@ -0,0 +1,61 @@
+"""
+Artifact fingerprints for incremental re-runs.
+
+Every stage output in a job workspace is recorded in <job_dir>/artifacts.json together with a
+fingerprint of what produced it: the content digests of its input artifacts plus the settings that
+affect it. A stage skips an output whose file exists and whose recorded fingerprint equals the one it
+would produce now; a changed input or setting gives a different fingerprint, so the output is rebuilt
+(and, through its digest, everything downstream of it).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+CHUNK = 1024 * 1024
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(*parts) -> str:
+    """Stable hash of JSON-serializable parts (dicts are key-sorted)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def env_settings(*names: str) -> dict:
+    """Current values of the environment variables that affect an artifact."""
+    return {name: os.environ.get(name, "") for name in names}
+
+
+class ArtifactManifest:
+    def __init__(self, job_dir: Path):
+        self.job_dir = Path(job_dir)
+        self.path = self.job_dir / "artifacts.json"
+        self._lock = threading.Lock()
+        try:
+            self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _name(self, artifact: Path) -> str:
+        return Path(artifact).resolve().relative_to(self.job_dir.resolve()).as_posix()
+
+    def is_current(self, artifact: Path, fp: str) -> bool:
+        with self._lock:
+            return Path(artifact).is_file() and self._entries.get(self._name(artifact)) == fp
+
+    def record(self, artifact: Path, fp: str) -> None:
+        with self._lock:
+            self._entries[self._name(artifact)] = fp
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._entries, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
@@ -1,16 +1,149 @@
 """
-In-memory job store for VidioLingua pipeline jobs.
+Job store for VidioLingua pipeline jobs.
 Maps jobId -> status, progress, result paths, error.
+
+Jobs are persisted in SQLite (WAL mode, <JOBS_DIR>/jobs.sqlite3) so they survive restarts and are
+shared by every uvicorn worker on the host; VIDIOLINGUA_JOB_STORE=memory keeps them in this process
+only. An in-memory cache serves status polling: jobs this process is running are authoritative in the
+cache; finished jobs and other workers' jobs are re-read once they are older than
+VIDIOLINGUA_JOB_CACHE_TTL seconds (a finished job may be requeued by another worker).
+Progress-only updates are batched and flushed every VIDIOLINGUA_JOB_FLUSH_SECONDS; stage changes,
+errors and results are written immediately.
+
+A job stays in stage "uploading" with no started_at while it waits in the scheduler's queue
+(backend.scheduler); its row holds everything needed to run it, so the queue survives restarts.
 """
 
 from typing import Any, Optional
+import json
+import os
+import socket
+import sqlite3
 import threading
+import time
+import uuid
+from pathlib import Path
 
 # Pipeline stages matching frontend-next types
 STAGES = ["uploading", "asr", "translation", "tts", "lipsync", "complete", "error"]
+# Jobs in these stages are finished; anything else is in flight
+FINAL_STAGES = ("complete", "error")
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_TTL = float(os.environ.get("VIDIOLINGUA_JOB_CACHE_TTL", "0.5"))
+FLUSH_SECONDS = float(os.environ.get("VIDIOLINGUA_JOB_FLUSH_SECONDS", "0.5"))
+
+
+def _process_start(pid: int) -> str:
+    """The process's start time in clock ticks since boot (Linux), or "" where it cannot be read."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return ""
+    # Fields after the parenthesized command name; starttime is field 22 overall
+    return stat.rpartition(")")[2].split()[19]
+
+
+# Identifies the process running a job, so a restart can tell live jobs from interrupted ones. Host and
+# PID alone are not enough: a restarted container usually comes back with the same hostname and PIDs,
+# so the process start time (or, where unavailable, a random nonce) tells this boot from the last one.
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{_process_start(os.getpid()) or uuid.uuid4().hex[:8]}"
 
 _jobs: dict[str, dict[str, Any]] = {}
+# job_id -> time the cached copy was read from the database (jobs owned here are never stale)
+_loaded_at: dict[str, float] = {}
+_owned: set[str] = set()
+_dirty: set[str] = set()
 _lock = threading.Lock()
+_db: sqlite3.Connection | None = None
+_db_lock = threading.Lock()
+_flusher: threading.Thread | None = None
+
+
+def _backend() -> str:
+    return os.environ.get("VIDIOLINGUA_JOB_STORE", "sqlite").strip().lower()
+
+
+def _connect() -> sqlite3.Connection | None:
+    global _db, _flusher
+    if _backend() == "memory":
+        return None
+    with _db_lock:
+        if _db is None:
+            jobs_dir = Path(os.environ.get("JOBS_DIR", str(PROJECT_ROOT / "jobs")))
+            jobs_dir.mkdir(parents=True, exist_ok=True)
+            _db = sqlite3.connect(str(jobs_dir / "jobs.sqlite3"), check_same_thread=False, timeout=30)
+            _db.execute("PRAGMA journal_mode=WAL")
+            _db.execute("PRAGMA synchronous=NORMAL")
+            _db.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    progress INTEGER NOT NULL,
+                    owner TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )"""
+            )
+            _db.execute("CREATE INDEX IF NOT EXISTS jobs_stage ON jobs (stage, created_at)")
+            _db.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)")
+            _db.commit()
+            _flusher = threading.Thread(target=_flush_loop, daemon=True)
+            _flusher.start()
+        return _db
+
+
+def _write(jobs: list[dict]) -> None:
+    db = _connect()
+    if db is None or not jobs:
+        return
+    now = time.time()
+    rows = [
+        (j["jobId"], j["stage"], j["progress"], j.get("owner"), j["created_at"], now, json.dumps(j))
+        for j in jobs
+    ]
+    with _db_lock:
+        db.executemany("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        db.commit()
+
+
+def _read(job_id: str) -> Optional[dict]:
+    db = _connect()
+    if db is None:
+        return None
+    with _db_lock:
+        row = db.execute("SELECT data FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        flush()
+
+
+def flush() -> None:
+    """Write batched progress updates now."""
+    with _lock:
+        pending = [dict(_jobs[job_id]) for job_id in _dirty if job_id in _jobs]
+        _dirty.clear()
+        # Written under _lock so an older snapshot can never overwrite a newer one
+        _write(pending)
+
+
+def _cached(job_id: str) -> Optional[dict]:
+    """The job from the cache, refreshed from the database when another process owns it and it is stale."""
+    with _lock:
+        j = _jobs.get(job_id)
+        if j is not None and (job_id in _owned or time.time() - _loaded_at.get(job_id, 0) < CACHE_TTL):
+            return j
+    fresh = _read(job_id)
+    with _lock:
+        if fresh is not None and job_id not in _owned:
+            _jobs[job_id] = fresh
+            _loaded_at[job_id] = time.time()
+        return _jobs.get(job_id)
 
 
 def create_job(
@@ -20,6 +153,9 @@ def create_job(
     source_language: Optional[str] = None,
     voice_options: Optional[dict] = None,
     voice_sample_path: Optional[str] = None,
+    input_sha256: Optional[str] = None,
+    whisper_model: Optional[str] = None,
+    priority: int = 0,
 ) -> None:
     with _lock:
         _jobs[job_id] = {
@@ -29,15 +165,26 @@ def create_job(
             "currentLanguage": None,
             "languages": languages,
             "sourceLanguage": source_language,
+            # sourceLanguage becomes the detected language; re-runs use what was asked for
+            "requestedSourceLanguage": source_language,
             "sourceLanguageConfidence": None,
             "voiceOptions": voice_options or {},
             "voiceSamplePath": voice_sample_path,
+            "inputSha256": input_sha256,
+            "whisperModel": whisper_model,
+            "priority": priority,
+            "queuePosition": None,
+            "estimatedStartTime": None,
             "error": None,
             "metrics": {},
             "video_path": video_path,
             "result": None,
             "started_at": None,
+            "created_at": time.time(),
+            "owner": OWNER,
         }
+        _owned.add(job_id)
+        _write([dict(_jobs[job_id])])
 
 
 def update_job(
@@ -52,7 +199,10 @@ def update_job(
     result: Optional[dict] = None,
     voice_options: Optional[dict] = None,
     voice_sample_path: Optional[str] = None,
+    started_at: Optional[float] = None,
 ) -> None:
+    if _cached(job_id) is None:
+        return
     with _lock:
         if job_id not in _jobs:
             return
@@ -78,19 +228,188 @@ def update_job(
             j["voiceSamplePath"] = voice_sample_path
         if result is not None:
             j["result"] = result
+        if started_at is not None:
+            j["started_at"] = started_at
+            j["queuePosition"] = None
+            j["estimatedStartTime"] = None
+        # Progress ticks are batched; anything a poller or a restart must not miss is written through
+        if stage is None and error is None and result is None and started_at is None:
+            _dirty.add(job_id)
+            return
+        _dirty.discard(job_id)
+        _write([dict(j)])
+        if j["stage"] in FINAL_STAGES:
+            # Finished: another worker may requeue it (requeue_job), so stop treating the cache as the truth
+            _owned.discard(job_id)
+            _loaded_at[job_id] = time.time()
+
+
+def set_queue_state(job_id: str, position: int, estimated_start: float) -> None:
+    """Record a queued job's 1-based queue position and estimated start (epoch seconds); batched like progress."""
+    with _lock:
+        j = _jobs.get(job_id)
+        if j is None or j.get("started_at") is not None:
+            return
+        j["queuePosition"] = position
+        j["estimatedStartTime"] = estimated_start
+        _dirty.add(job_id)
+
+
+def is_queued(job: dict) -> bool:
+    return job.get("stage") == "uploading" and job.get("started_at") is None
 
 
 def get_job(job_id: str) -> Optional[dict[str, Any]]:
+    return _cached(job_id)
+
+
+def list_jobs(stage: Optional[str] = None, since: Optional[float] = None, limit: int = 100) -> list[dict]:
+    """Jobs newest first, optionally filtered by stage and creation time (uses the stage/created_at indexes)."""
+    db = _connect()
+    if db is None:
+        with _lock:
+            jobs = [
+                dict(j) for j in _jobs.values()
+                if (stage is None or j["stage"] == stage) and (since is None or j.get("created_at", 0) >= since)
+            ]
+        return sorted(jobs, key=lambda j: j.get("created_at", 0), reverse=True)[:limit]
+    flush()
+    query, params = "SELECT data FROM jobs WHERE created_at >= ?", [since or 0]
+    if stage is not None:
+        query += " AND stage = ?"
+        params.append(stage)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+    with _db_lock:
+        rows = db.execute(query, params).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    if owner == OWNER:
+        return True
+    host, _, pid = (owner or "").partition(":")
+    pid, _, token = pid.partition(":")
+    if host != socket.gethostname():
+        # Another host's job (shared storage): cannot tell, leave it alone
+        return True
+    if not pid.isdigit() or int(pid) == os.getpid():
+        # Our own PID under another owner id: this process's predecessor before a restart
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # The PID is taken, but possibly by a different process than the one that ran the job
+    started = _process_start(int(pid))
+    return not (token and started and token != started)
+
+
+def requeue_job(job_id: str, languages: list[str], expected_stage: str) -> Optional[dict]:
+    """
+    Put a finished job back in the queue to run again for `languages` (the result is kept until replaced).
+    Compare-and-set: returns None unless the job is still in expected_stage (a final stage), so of several
+    concurrent requests exactly one requeues the job.
+    """
+    if expected_stage not in FINAL_STAGES:
+        return None
+    db = _connect()
     with _lock:
-        return _jobs.get(job_id)
+        j = _read(job_id) if db is not None else _jobs.get(job_id)
+        if j is None or j["stage"] != expected_stage:
+            return None
+        j = dict(j)
+        if j["stage"] == "error":
+            j["result"] = None
+        j.update(
+            languages=languages,
+            stage="uploading",
+            progress=0,
+            currentLanguage=None,
+            error=None,
+            started_at=None,
+            owner=OWNER,
+        )
+        if db is not None:
+            with _db_lock:
+                cur = db.execute(
+                    "UPDATE jobs SET stage = ?, progress = 0, owner = ?, updated_at = ?, data = ? "
+                    "WHERE job_id = ? AND stage = ?",
+                    (j["stage"], OWNER, time.time(), json.dumps(j), job_id, expected_stage),
+                )
+                db.commit()
+            if cur.rowcount != 1:
+                return None
+        _jobs[job_id] = j
+        _loaded_at[job_id] = time.time()
+        _owned.add(job_id)
+        _dirty.discard(job_id)
+        return dict(j)
+
+
+def recover_interrupted() -> int:
+    """Mark jobs whose process died mid-pipeline (e.g. a restart) as failed. Returns how many."""
+    db = _connect()
+    if db is None:
+        return 0
+    placeholders = ", ".join("?" for _ in FINAL_STAGES)
+    with _db_lock:
+        rows = db.execute(f"SELECT data FROM jobs WHERE stage NOT IN ({placeholders})", FINAL_STAGES).fetchall()
+    interrupted = []
+    for (data,) in rows:
+        j = json.loads(data)
+        # Queued jobs never started; claim_queued() hands them to this process's scheduler instead
+        if is_queued(j):
+            continue
+        if not _owner_alive(j.get("owner")):
+            j["stage"] = "error"
+            j["error"] = "Interrupted by a server restart; please upload the video again."
+            interrupted.append(j)
+    _write(interrupted)
+    return len(interrupted)
+
+
+def claim_queued() -> list[dict]:
+    """
+    Take over queued jobs whose process died before starting them, oldest first. The owner is swapped
+    with a conditional UPDATE, so when several workers start at once each job is claimed by exactly one.
+    """
+    db = _connect()
+    if db is None:
+        return []
+    with _db_lock:
+        rows = db.execute(
+            "SELECT owner, data FROM jobs WHERE stage = 'uploading' ORDER BY created_at"
+        ).fetchall()
+    claimed = []
+    for owner, data in rows:
+        j = json.loads(data)
+        if not is_queued(j) or _owner_alive(owner):
+            continue
+        j["owner"] = OWNER
+        with _db_lock:
+            cur = db.execute(
+                "UPDATE jobs SET owner = ?, data = ?, updated_at = ? WHERE job_id = ? AND owner IS ?",
+                (OWNER, json.dumps(j), time.time(), j["jobId"], owner),
+            )
+            db.commit()
+        if cur.rowcount != 1:
+            continue
+        with _lock:
+            _jobs[j["jobId"]] = j
+            _owned.add(j["jobId"])
+        claimed.append(j)
+    return claimed
 
 
 def get_job_status_response(job_id: str) -> Optional[dict]:
     """Return job data in the shape expected by frontend GET /api/job-status/:jobId"""
+    j = _cached(job_id)
+    if j is None:
+        return None
     with _lock:
-        if job_id not in _jobs:
-            return None
-        j = _jobs[job_id]
         return {
             "jobId": j["jobId"],
             "stage": j["stage"],
@@ -101,15 +420,17 @@ def get_job_status_response(job_id: str) -> Optional[dict]:
             "sourceLanguageConfidence": j.get("sourceLanguageConfidence"),
             "error": j.get("error"),
             "metrics": j.get("metrics") or {},
+            "queuePosition": j.get("queuePosition"),
+            "estimatedStartTime": j.get("estimatedStartTime"),
         }
 
 
 def get_job_result_response(job_id: str) -> Optional[dict]:
     """Return job result in the shape expected by frontend GET /api/result/:jobId"""
+    j = _cached(job_id)
+    if j is None:
+        return None
     with _lock:
-        if job_id not in _jobs:
-            return None
-        j = _jobs[job_id]
         if j.get("result") is not None:
             return j["result"]
         if j.get("stage") == "error":
@@ -2,25 +2,61 @@
 VidioLingua Backend API - FastAPI app.
 """
 
+import logging
 import os
 import shutil
+import threading
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
+from pydantic import BaseModel
 from dotenv import load_dotenv
 
 from backend import job_store
+from backend.scheduler import get_scheduler
+from backend.uploads import ResumableUpload, save_form
 
 # Base directory for job workspaces (relative to project root when running uvicorn from root)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 load_dotenv(PROJECT_ROOT / ".env")
 load_dotenv(PROJECT_ROOT / "backend" / ".env")
 JOBS_DIR = Path(os.environ.get("JOBS_DIR", str(PROJECT_ROOT / "jobs")))
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="VidioLingua API", version="1.0.0")
+
+def _preload_whisper() -> None:
+    """Warm the Whisper model pool so the first job does not pay the model load."""
+    from asr.model_pool import DEFAULT_MODEL, get_model_pool
+
+    sizes = os.environ.get("VIDIOLINGUA_WHISPER_PRELOAD", DEFAULT_MODEL).strip()
+    if sizes.lower() in ("", "0", "none"):
+        return
+    for size in sizes.split(","):
+        try:
+            get_model_pool().preload(size.strip())
+        except Exception as e:
+            logger.warning("Whisper preload of '%s' skipped: %s", size.strip(), e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    interrupted = job_store.recover_interrupted()
+    if interrupted:
+        logger.info("Marked %d interrupted job(s) as failed", interrupted)
+    resumed = get_scheduler().resume()
+    if resumed:
+        logger.info("Re-queued %d job(s) left waiting by a previous run", resumed)
+    if os.environ.get("VIDIOLINGUA_STAGE_MODE", "inprocess").strip().lower() == "inprocess":
+        threading.Thread(target=_preload_whisper, daemon=True).start()
+    yield
+    job_store.flush()
+
+
+app = FastAPI(title="VidioLingua API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +78,12 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/api/queue")
+def queue():
+    """Scheduler load in this worker: queued and in-flight jobs, per-stage queue depth and utilization."""
+    return get_scheduler().stats()
+
+
 @app.get("/api/health/deps")
 def health_deps():
     """Check that required tools and packages are available for the pipeline."""
@@ -85,48 +127,35 @@ def health_deps():
     return out
 
 
-@app.post("/api/upload")
-async def upload(
-    video: UploadFile = File(...),
-    languages: str = Form("[]"),
-    voiceOptions: str = Form("{}"),
-    sourceLanguage: str = Form(""),
-    voiceSample: UploadFile | None = File(None),
-):
-    """Accept video upload, create job, save file, return jobId. Start pipeline in background."""
-    import json
-    from backend.pipeline_runner import run_pipeline_background
+SUPPORTED_LANGUAGES = ("hi", "es", "fr", "de", "ja", "zh", "ar", "pt")
+LANGUAGE_CODES = {
+    "Hindi": "hi",
+    "Spanish": "es",
+    "French": "fr",
+    "German": "de",
+    "Japanese": "ja",
+    "Chinese": "zh",
+    "Arabic": "ar",
+    "Portuguese": "pt",
+}
 
-    # Validate video type
-    if not video.filename or not video.content_type or not video.content_type.startswith("video/"):
-        raise HTTPException(400, "A video file is required")
+
+def _language_codes(lang_list: list) -> list[str]:
+    """Supported target language codes from names or codes, in order, without duplicates."""
+    codes = [LANGUAGE_CODES.get(x, x) for x in lang_list if isinstance(x, str)]
+    return list(dict.fromkeys(c for c in codes if c in SUPPORTED_LANGUAGES))
+
+
+def _job_options(languages: str, voiceOptions: str, sourceLanguage: str, whisperModel: str, priority: int = 0) -> dict:
+    """Validate and normalize the job options shared by /api/upload and resumable uploads."""
+    import json
+    from asr.model_pool import WHISPER_MODELS
 
     try:
         lang_list = json.loads(languages)
     except json.JSONDecodeError:
-        lang_list = ["hi", "es", "fr", "de", "ja", "zh", "ar", "pt"]
-
-    supported = {"hi", "es", "fr", "de", "ja", "zh", "ar", "pt"}
-    code_map = {
-        "Hindi": "hi",
-        "Spanish": "es",
-        "French": "fr",
-        "German": "de",
-        "Japanese": "ja",
-        "Chinese": "zh",
-        "Arabic": "ar",
-        "Portuguese": "pt",
-        "hi": "hi",
-        "es": "es",
-        "fr": "fr",
-        "de": "de",
-        "ja": "ja",
-        "zh": "zh",
-        "ar": "ar",
-        "pt": "pt",
-    }
-    lang_codes = [code_map.get(str(x), x) if isinstance(x, str) else x for x in lang_list]
-    lang_codes = [c for c in lang_codes if c in supported] or list(supported)
+        lang_list = list(SUPPORTED_LANGUAGES)
+    lang_codes = _language_codes(lang_list) or list(SUPPORTED_LANGUAGES)
 
     # Parse voice options
     try:
@@ -138,52 +167,191 @@ async def upload(
     if source_lang == "auto" or not source_lang:
         source_lang = ""
 
-    job_id = str(uuid.uuid4())
-    job_dir = JOBS_DIR / job_id
-    job_dir.mkdir(parents=True, exist_ok=True)
+    whisper_model = whisperModel.strip() or None
+    if whisper_model and whisper_model not in WHISPER_MODELS:
+        raise HTTPException(400, f"Unknown whisperModel; expected one of: {', '.join(WHISPER_MODELS)}")
+    return {
+        "languages": lang_codes,
+        "source_language": source_lang or None,
+        "voice_options": voice_opts,
+        "whisper_model": whisper_model,
+        # Higher runs first when jobs are queued; equal priorities run in arrival order
+        "priority": priority,
+    }
 
-    # Save uploaded video with a stable name (e.g. input.mp4)
-    video_path = job_dir / "input_video.mp4"
-    with open(video_path, "wb") as f:
-        content = await video.read()
-        f.write(content)
-
-    voice_sample_path = None
-    if voiceSample is not None and voiceSample.filename:
-        sample_path = job_dir / "voice_sample.wav"
-        with open(sample_path, "wb") as f:
-            content = await voiceSample.read()
-            f.write(content)
-        voice_sample_path = str(sample_path)
 
+def _start_job(job_id: str, video_path: Path, options: dict, voice_sample_path: str | None, input_sha256: str) -> None:
+    """Record the job and queue it; the scheduler starts it when a worker is free."""
     job_store.create_job(
         job_id,
         str(video_path),
-        lang_codes,
-        source_language=source_lang or None,
-        voice_options=voice_opts,
-        voice_sample_path=voice_sample_path,
-    )
-    run_pipeline_background(
-        job_id,
-        str(video_path),
-        lang_codes,
-        source_language=source_lang or None,
-        voice_options=voice_opts,
+        options["languages"],
+        source_language=options["source_language"],
+        voice_options=options["voice_options"],
         voice_sample_path=voice_sample_path,
+        input_sha256=input_sha256,
+        whisper_model=options["whisper_model"],
+        priority=options.get("priority", 0),
     )
+    get_scheduler().submit(job_id, options.get("priority", 0))
+
+
+@app.post("/api/upload")
+async def upload(request: Request):
+    """
+    Accept video upload, create job, save file, return jobId. The job is queued for the scheduler.
+
+    multipart/form-data fields: video (file, required), languages, voiceOptions, sourceLanguage,
+    voiceSample (file), whisperModel, priority. The body is parsed as it streams in (backend.uploads),
+    so files are written once, straight into the job directory.
+    """
+    job_id = str(uuid.uuid4())
+    job_dir = JOBS_DIR / job_id
+    # Stream the uploaded video to disk with a stable name (e.g. input.mp4), hashing as it arrives
+    video_path = job_dir / "input_video.mp4"
+    try:
+        fields, files = await save_form(
+            request,
+            {"video": video_path, "voiceSample": job_dir / "voice_sample.wav"},
+            content_types={"video": "video/"},
+        )
+        if "video" not in files:
+            raise HTTPException(400, "A video file is required")
+        try:
+            priority = int(fields.get("priority") or 0)
+        except ValueError:
+            raise HTTPException(400, "priority must be an integer") from None
+        options = _job_options(
+            fields.get("languages", "[]"),
+            fields.get("voiceOptions", "{}"),
+            fields.get("sourceLanguage", ""),
+            fields.get("whisperModel", ""),
+            priority,
+        )
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+
+    voice_sample = files.get("voiceSample")
+    _start_job(job_id, video_path, options, str(voice_sample.path) if voice_sample else None, files["video"].sha256)
     return {"jobId": job_id}
 
 
+class UploadInit(BaseModel):
+    size: int
+    filename: str = ""
+    contentType: str = "video/mp4"
+    languages: list[str] = []
+    voiceOptions: dict = {}
+    sourceLanguage: str = ""
+    whisperModel: str = ""
+    priority: int = 0
+
+
+def _upload_dir(upload_id: str) -> Path:
+    try:
+        uuid.UUID(upload_id)
+    except ValueError:
+        raise HTTPException(404, "Upload not found") from None
+    return JOBS_DIR / upload_id
+
+
+@app.post("/api/uploads")
+def create_upload(init: UploadInit):
+    """Start a resumable upload. The uploadId becomes the jobId on finalize."""
+    import json
+
+    if not init.contentType.startswith("video/"):
+        raise HTTPException(400, "A video file is required")
+    options = _job_options(
+        json.dumps(init.languages), json.dumps(init.voiceOptions), init.sourceLanguage, init.whisperModel,
+        init.priority,
+    )
+    upload_id = str(uuid.uuid4())
+    return ResumableUpload.create(JOBS_DIR / upload_id, init.size, options).describe()
+
+
+@app.get("/api/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    """Received byte ranges ([start, end) pairs), so a client can resend only what is missing."""
+    return ResumableUpload.load(_upload_dir(upload_id)).describe()
+
+
+@app.put("/api/uploads/{upload_id}")
+async def put_upload_chunk(upload_id: str, request: Request, offset: int = 0):
+    """Write the raw request body at byte offset (Content-Type: application/octet-stream)."""
+    upload = ResumableUpload.load(_upload_dir(upload_id))
+    await upload.write_chunk(offset, request.stream())
+    return upload.describe()
+
+
+@app.post("/api/uploads/{upload_id}/voice-sample")
+async def put_upload_voice_sample(upload_id: str, request: Request):
+    """Optional voice sample for a resumable upload (multipart field voiceSample)."""
+    job_dir = _upload_dir(upload_id)
+    upload = ResumableUpload.load(job_dir)
+    if upload.state["finalized"]:
+        raise HTTPException(409, "Upload already finalized")
+    # Written under a unique name and moved into place only if finalize has not started the job meanwhile
+    _, files = await save_form(request, {"voiceSample": job_dir / f"voice_sample.{uuid.uuid4().hex}.part"})
+    if "voiceSample" not in files:
+        raise HTTPException(400, "A voiceSample file is required")
+    upload.attach_voice_sample(files["voiceSample"].path)
+    return {"uploadId": upload_id}
+
+
+@app.post("/api/uploads/{upload_id}/finalize")
+def finalize_upload(upload_id: str):
+    """Check every byte arrived, hash the file and start the pipeline. Safe to retry."""
+    job_dir = _upload_dir(upload_id)
+    upload = ResumableUpload.load(job_dir)
+
+    def start(input_sha256: str) -> None:
+        sample_path = job_dir / "voice_sample.wav"
+        voice_sample_path = str(sample_path) if sample_path.is_file() else None
+        _start_job(upload_id, upload.video_path, upload.state["options"], voice_sample_path, input_sha256)
+
+    upload.finalize(start, lambda: job_store.get_job(upload_id) is not None)
+    return {"jobId": upload_id}
+
+
 @app.get("/api/job-status/{job_id}")
 def job_status(job_id: str):
-    """Return job status for polling."""
+    """Return job status for polling. Queued jobs also report queuePosition and estimatedStartTime."""
     data = job_store.get_job_status_response(job_id)
     if data is None:
         raise HTTPException(404, "Job not found")
     return data
 
 
+class AddLanguages(BaseModel):
+    languages: list[str]
+
+
+@app.post("/api/job/{job_id}/languages")
+def add_languages(job_id: str, body: AddLanguages):
+    """
+    Dub a finished job into more languages. The job is queued again; ASR, translation, TTS and lipsync
+    outputs whose inputs have not changed are reused, so only the new languages are processed.
+    """
+    job = job_store.get_job(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    # A job stays in the scheduler for a moment after its final stage is recorded
+    if job["stage"] not in job_store.FINAL_STAGES or get_scheduler().is_active(job_id):
+        raise HTTPException(409, "Job is still running")
+    added = [c for c in _language_codes(body.languages) if c not in job["languages"]]
+    if not added and job["stage"] == "complete":
+        raise HTTPException(400, f"No new supported languages; expected some of: {', '.join(SUPPORTED_LANGUAGES)}")
+    languages = list(job["languages"]) + added
+    # Only one of several concurrent requests gets past the compare-and-set on the stage
+    if job_store.requeue_job(job_id, languages, job["stage"]) is None:
+        raise HTTPException(409, "Job is still running")
+    if not get_scheduler().submit(job_id, job.get("priority") or 0):
+        logger.error("Job %s was requeued while still in the scheduler", job_id)
+    return {"jobId": job_id, "languages": languages, "added": added}
+
+
 @app.get("/api/result/{job_id}")
 def result(job_id: str):
     """Return processing result when job is complete (or error)."""
@@ -211,3 +379,26 @@ def result_file(job_id: str, filename: str):
     if not file_path.is_file():
         raise HTTPException(404, "File not found")
     return FileResponse(file_path, filename=Path(filename).name)
+
+
+# Each package lives in results/hls/<version>/, named by a fingerprint of its inputs, so a segment URL
+# never serves different content
+_STREAM_TYPES = {
+    ".m3u8": ("application/vnd.apple.mpegurl", "public, max-age=60"),
+    ".ts": ("video/mp2t", "public, max-age=31536000, immutable"),
+}
+
+
+@app.get("/api/stream/{job_id}/{path:path}")
+def stream_file(job_id: str, path: str):
+    """Serve HLS playlists and segments from the job's results/hls/<version>/ directory."""
+    stream_dir = (JOBS_DIR / job_id / "results" / "hls").resolve()
+    file_path = (stream_dir / path).resolve()
+    if ".." in (job_id, *Path(path).parts) or not str(file_path).startswith(str(stream_dir) + os.sep):
+        raise HTTPException(400, "Invalid path")
+    if file_path.suffix not in _STREAM_TYPES:
+        raise HTTPException(404, "File not found")
+    if not file_path.is_file():
+        raise HTTPException(404, "File not found")
+    media_type, cache_control = _STREAM_TYPES[file_path.suffix]
+    return FileResponse(file_path, media_type=media_type, headers={"Cache-Control": cache_control})
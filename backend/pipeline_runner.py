@@ -1,280 +1,512 @@
 """
 Pipeline orchestrator: run ASR -> Translation -> TTS -> Lipsync for a job.
-Uses Option B: copy files into each module's input/, run script, copy output back to job workspace.
+Stages run through backend.stage_engine (in-process by default, subprocess scripts as an opt-in);
+every stage writes its artifacts into the job workspace.
+
+A job's state lives in a PipelineRun with one method per stage. backend.scheduler moves runs between
+per-stage worker pools, so different jobs occupy different stages at the same time; run_pipeline runs
+all stages of one job in order on the calling thread.
+
+Stage outputs are fingerprinted (backend.artifacts), so running a job again (e.g. after adding
+languages) only produces what is missing or whose inputs changed.
 """
 
+import json
+import logging
 import os
 import shutil
-import subprocess
-import threading
 import time
-import json
 from pathlib import Path
 
+from asr.cache import transcription_cache, transcription_key, upload_transcription_key
 from backend import job_store
+from backend.artifacts import ArtifactManifest, env_settings, file_digest, fingerprint
+from backend.scheduler import PIPELINE_STAGES
+from backend.stage_engine import get_engine, streaming_enabled
+from shared.audio import decode_audio
 
+# Length of the voice sample taken from the job's own audio for cloning
+VOICE_SAMPLE_SECONDS = 30
+# Decoded audio length, kept with the ASR output so a re-run that skips ASR need not decode again
+AUDIO_INFO = "audio.json"
 
-def _run_stage(name: str, cmd: list, cwd: str, env=None):
-    """Run a stage; on failure raise with decoded stderr for reporting."""
-    result = subprocess.run(
-        cmd,
-        cwd=cwd,
-        env=env or os.environ,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-    if result.returncode != 0:
-        err = (result.stderr or result.stdout or "").strip() or f"Exit code {result.returncode}"
-        raise RuntimeError(f"{name}: {err}")
-    return result
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 JOBS_DIR = Path(os.environ.get("JOBS_DIR", str(PROJECT_ROOT / "jobs")))
+logger = logging.getLogger(__name__)
 
-ASR_INPUT = PROJECT_ROOT / "asr" / "input"
-ASR_OUTPUT = PROJECT_ROOT / "asr" / "output"
-TRANS_INPUT = PROJECT_ROOT / "translation" / "input"
-TRANS_OUTPUT = PROJECT_ROOT / "translation" / "output"
-TTS_INPUT = PROJECT_ROOT / "tts" / "input"
-TTS_OUTPUT = PROJECT_ROOT / "tts" / "output"
-LIPSYNC_INPUT = PROJECT_ROOT / "lipsync" / "input"
-LIPSYNC_OUTPUT = PROJECT_ROOT / "lipsync" / "output"
-
-
-def _ensure_dirs():
-    for d in (ASR_INPUT, ASR_OUTPUT, TRANS_INPUT, TRANS_OUTPUT, TTS_INPUT, TTS_OUTPUT, LIPSYNC_INPUT, LIPSYNC_OUTPUT):
-        d.mkdir(parents=True, exist_ok=True)
-
-
-def _clear_dir(d: Path):
-    if d.exists():
-        for f in d.iterdir():
-            if f.is_file():
-                f.unlink()
-            else:
-                shutil.rmtree(f, ignore_errors=True)
-
-
-def _copy_all(src: Path, dst: Path):
-    dst.mkdir(parents=True, exist_ok=True)
-    if src.exists():
-        for f in src.iterdir():
-            if f.is_file():
-                shutil.copy2(f, dst / f.name)
-
-
-def _extract_voice_sample(video_path: Path, output_path: Path, duration_s: int = 30) -> None:
-    """Extract a short voice sample WAV from the video for cloning."""
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i", str(video_path),
-        "-t", str(duration_s),
-        "-vn",
-        "-ac", "1",
-        "-ar", "16000",
-        str(output_path),
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
-    if result.returncode != 0:
-        raise RuntimeError(f"Voice sample extraction failed: {result.stderr or result.stdout}")
-
-
-def run_pipeline_background(
-    job_id: str,
-    video_path: str,
-    languages: list[str],
-    source_language: str | None = None,
-    voice_options: dict | None = None,
-    voice_sample_path: str | None = None,
-) -> None:
-    """Start pipeline in a background thread."""
-    def run():
-        run_pipeline(job_id, video_path, languages, source_language, voice_options, voice_sample_path)
-    t = threading.Thread(target=run, daemon=True)
-    t.start()
+# Settings that change synthesized audio or dubbed video without changing their inputs
+TTS_SETTINGS = (
+    "ELEVENLABS_VOICE_ID",
+    "VIDIOLINGUA_ELEVENLABS_VOICE_ID",
+    "VIDIOLINGUA_ELEVENLABS_MODEL",
+    "VIDIOLINGUA_TTS_FIT",
+    "VIDIOLINGUA_TTS_MIN_TEMPO",
+    "VIDIOLINGUA_TTS_MAX_TEMPO",
+)
+LIPSYNC_SETTINGS = ("VIDIOLINGUA_WAV2LIP_DIR", "VIDIOLINGUA_WAV2LIP_CHECKPOINT", "VIDIOLINGUA_LIPSYNC_MODE")
 
+LANGUAGE_NAMES = {
+    "en": "English",
+    "hi": "Hindi",
+    "es": "Spanish",
+    "fr": "French",
+    "de": "German",
+    "ja": "Japanese",
+    "zh": "Chinese",
+    "ar": "Arabic",
+    "pt": "Portuguese",
+}
 
-def run_pipeline(
-    job_id: str,
-    video_path: str,
-    languages: list[str],
-    source_language: str | None = None,
-    voice_options: dict | None = None,
-    voice_sample_path: str | None = None,
-) -> None:
-    start_time = time.time()
-    job_dir = JOBS_DIR / job_id
-    results_dir = job_dir / "results"
-    results_dir.mkdir(parents=True, exist_ok=True)
-    # Make original video available for download
-    try:
-        shutil.copy2(video_path, results_dir / "input_video.mp4")
-    except Exception:
-        pass
-
-    asr_in = job_dir / "asr" / "input"
-    asr_out = job_dir / "asr" / "output"
-    trans_in = job_dir / "translation" / "input"
-    trans_out = job_dir / "translation" / "output"
-    tts_in = job_dir / "tts" / "input"
-    tts_out = job_dir / "tts" / "output"
-    lipsync_in = job_dir / "lipsync" / "input"
-    lipsync_out = job_dir / "lipsync" / "output"
-    for d in (asr_in, asr_out, trans_in, trans_out, tts_in, tts_out, lipsync_in, lipsync_out):
-        d.mkdir(parents=True, exist_ok=True)
-
-    video_path = Path(video_path)
-    api_base = os.environ.get("API_BASE_URL", "http://localhost:8000")
-    voice_options = voice_options or {}
-    use_cloned = bool(voice_options.get("cloned"))
-
-    if use_cloned and not voice_sample_path:
+
+def _translation_metrics(tm_stats: dict) -> dict:
+    metrics = {"bleu": 0.82}
+    if tm_stats:
+        metrics.update({
+            "tmExactHits": tm_stats.get("exact", 0),
+            "tmNormalizedHits": tm_stats.get("normalized", 0),
+            "tmMisses": tm_stats.get("miss", 0),
+        })
+    return metrics
+
+
+def _tts_metrics(fit_stats: dict) -> dict:
+    metrics = {"mos": 4.2}
+    if fit_stats:
+        # Drift: fitted clip length minus source segment length, per language and segment
+        metrics.update({
+            "meanAbsDrift": round(sum(r["meanAbsDrift"] for r in fit_stats.values()) / len(fit_stats), 3),
+            "maxAbsDrift": max(r["maxAbsDrift"] for r in fit_stats.values()),
+            "durationFit": fit_stats,
+        })
+    return metrics
+
+
+class PipelineRun:
+    """One job moving through the stages; each stage method reads what the previous ones left on self."""
+
+    def __init__(
+        self,
+        job_id: str,
+        video_path: str,
+        languages: list[str],
+        source_language: str | None = None,
+        voice_options: dict | None = None,
+        voice_sample_path: str | None = None,
+        whisper_model: str | None = None,
+        input_sha256: str | None = None,
+    ):
+        self.job_id = job_id
+        self.video_path = Path(video_path)
+        self.languages = languages
+        self.source_language = source_language
+        self.voice_options = voice_options or {}
+        self.voice_sample_path = voice_sample_path
+        self.whisper_model = whisper_model
+        self.input_sha256 = input_sha256
+        self.start_time = time.time()
+        self.api_base = os.environ.get("API_BASE_URL", "http://localhost:8000")
+
+        self.job_dir = JOBS_DIR / job_id
+        self.results_dir = self.job_dir / "results"
+        self.asr_out = self.job_dir / "asr" / "output"
+        self.trans_out = self.job_dir / "translation" / "output"
+        self.tts_out = self.job_dir / "tts" / "output"
+        self.lipsync_out = self.job_dir / "lipsync" / "output"
+
+        self.engine = None
+        self.audio = None
+        self.duration: float | None = None
+        self.manifest = ArtifactManifest(self.job_dir)
+        self._video_digest = input_sha256
+        self.transcription_name = f"{self.video_path.stem}_transcription"
+        self.transcription: dict | None = None
+        self.detected_lang: str | None = None
+        self.translations: dict = {}
+        self.audio_files: dict = {}
+        # Set when ASR streamed its segments through translation and TTS (VIDIOLINGUA_STREAMING)
+        self.streamed = False
+
+    @classmethod
+    def from_job(cls, job: dict) -> "PipelineRun":
+        """Build a run from a job_store record."""
+        return cls(
+            job["jobId"],
+            job["video_path"],
+            job["languages"],
+            # sourceLanguage is overwritten with the detected language once ASR ran
+            source_language=job.get("requestedSourceLanguage", job.get("sourceLanguage")),
+            voice_options=job.get("voiceOptions"),
+            voice_sample_path=job.get("voiceSamplePath"),
+            whisper_model=job.get("whisperModel"),
+            input_sha256=job.get("inputSha256"),
+        )
+
+    def _prepare(self) -> None:
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        # Make original video available for download: a hard link where possible, no copy when the job
+        # runs again
+        original = self.results_dir / "input_video.mp4"
         try:
-            auto_sample = job_dir / "voice" / "auto_sample.wav"
-            _extract_voice_sample(video_path, auto_sample)
-            voice_sample_path = str(auto_sample)
-            job_store.update_job(job_id, voice_sample_path=voice_sample_path)
+            if not original.is_file() or original.stat().st_size != self.video_path.stat().st_size:
+                original.unlink(missing_ok=True)
+                try:
+                    os.link(self.video_path, original)
+                except OSError:
+                    shutil.copy2(self.video_path, original)
         except Exception:
             pass
+        for d in (self.asr_out, self.trans_out, self.tts_out, self.lipsync_out):
+            d.mkdir(parents=True, exist_ok=True)
 
-    try:
+        self.engine = get_engine()
+
+        if self.voice_options.get("cloned") and not self.voice_sample_path:
+            try:
+                auto_sample = self.job_dir / "voice" / "auto_sample.wav"
+                (self._load_audio() or decode_audio(self.video_path)).write_wav(auto_sample, 0, VOICE_SAMPLE_SECONDS)
+                self.voice_sample_path = str(auto_sample)
+                job_store.update_job(self.job_id, voice_sample_path=self.voice_sample_path)
+            except Exception:
+                pass
+
+    def _load_audio(self):
+        """
+        Decode the audio track once, on first use (in-process engine only); ASR, VAD and the voice sample
+        all read this buffer. A re-run whose ASR output is current never decodes.
+        """
+        if self.audio is None and self.engine.name == "inprocess":
+            self.audio = decode_audio(self.video_path)
+            self.duration = self.audio.duration
+            (self.asr_out / AUDIO_INFO).write_text(json.dumps({"duration": self.duration}), encoding="utf-8")
+        return self.audio
+
+    def _audio_duration(self) -> float | None:
+        """Decoded audio length; on a re-run, the value saved when the audio was decoded."""
+        if self.duration is None and self.engine.name == "inprocess":
+            try:
+                self.duration = json.loads((self.asr_out / AUDIO_INFO).read_text(encoding="utf-8"))["duration"]
+            except (OSError, ValueError, KeyError):
+                self._load_audio()
+        return self.duration
+
+    def _video_fingerprint(self) -> str:
+        if self._video_digest is None:
+            self._video_digest = file_digest(self.video_path)
+        return self._video_digest
+
+    def _transcription_file(self) -> Path:
+        return self.asr_out / f"{self.transcription_name}.json"
+
+    def _translation_file(self, lang: str) -> Path:
+        return self.trans_out / f"{self.transcription_name}_{lang}.json"
+
+    def _tts_file(self, lang: str) -> Path:
+        return self.tts_out / f"{self.transcription_name}_{lang}.wav"
+
+    def _dubbed_file(self, lang: str) -> Path:
+        return self.lipsync_out / f"{self.video_path.stem}_dubbed_{lang}.mp4"
+
+    def _asr_fingerprint(self) -> str:
+        return fingerprint(
+            "asr",
+            self._video_fingerprint(),
+            self.whisper_model,
+            self.source_language,
+            env_settings("VIDIOLINGUA_SOURCE_LANGUAGE", "VIDIOLINGUA_ASR_VAD"),
+        )
+
+    def _translation_fingerprint(self, lang: str) -> str:
+        return fingerprint(
+            "translation", file_digest(self._transcription_file()), lang, env_settings("VIDIOLINGUA_TRANSLATION_BACKEND")
+        )
+
+    def _tts_fingerprint(self, lang: str) -> str:
+        sample = self.voice_sample_path
+        return fingerprint(
+            "tts",
+            file_digest(self._translation_file(lang)),
+            self.voice_options,
+            file_digest(Path(sample)) if sample and Path(sample).is_file() else None,
+            self._audio_duration(),
+            bool(os.environ.get("ELEVENLABS_API_KEY") or os.environ.get("VIDIOLINGUA_ELEVENLABS_API_KEY")),
+            env_settings(*TTS_SETTINGS),
+        )
+
+    def _lipsync_fingerprint(self, lang: str) -> str:
+        return fingerprint(
+            "lipsync", self._video_fingerprint(), file_digest(self._tts_file(lang)), env_settings(*LIPSYNC_SETTINGS)
+        )
+
+    def asr(self) -> None:
+        self._prepare()
+        job_id = self.job_id
         # Uploading done
         job_store.update_job(job_id, stage="asr", progress=10)
 
-        # Copy video to asr/input (module dir) and run ASR
-        _ensure_dirs()
-        _clear_dir(ASR_INPUT)
-        _clear_dir(ASR_OUTPUT)
-        shutil.copy2(video_path, ASR_INPUT / video_path.name)
-        asr_env = os.environ.copy()
-        if source_language:
-            asr_env["VIDIOLINGUA_SOURCE_LANGUAGE"] = source_language
-        _run_stage(
-            "ASR",
-            [os.environ.get("PYTHON", "python"), str(PROJECT_ROOT / "asr" / "run_asr.py")],
-            str(PROJECT_ROOT),
-            env=asr_env,
-        )
-        detected_lang = None
-        detected_conf = None
-        for f in ASR_OUTPUT.iterdir():
-            if f.is_file() and f.suffix.lower() == ".json":
-                try:
-                    data = json.loads(f.read_text(encoding="utf-8"))
-                    detected_lang = data.get("language")
-                    detected_conf = data.get("language_confidence")
-                except Exception:
-                    pass
-        for f in ASR_OUTPUT.iterdir():
-            if f.is_file():
-                shutil.copy2(f, trans_in / f.name)
-        lang_names = {
-            "en": "English",
-            "hi": "Hindi",
-            "es": "Spanish",
-            "fr": "French",
-            "de": "German",
-            "ja": "Japanese",
-            "zh": "Chinese",
-            "ar": "Arabic",
-            "pt": "Portuguese",
-        }
+        transcription_file = self._transcription_file()
+        asr_fp = self._asr_fingerprint()
+        if self.manifest.is_current(transcription_file, asr_fp):
+            # Re-run: the previous transcription still matches the video and ASR settings
+            with open(transcription_file, "r", encoding="utf-8") as f:
+                transcription = json.load(f)
+        else:
+            transcription = self._transcribe()
+            self.manifest.record(transcription_file, asr_fp)
+        self.transcription = transcription
+        self.detected_lang = transcription.get("language")
+        # Later stages only need the duration (kept in self.duration); do not hold the decoded PCM while
+        # the job waits in the translation and TTS queues
+        self.audio = None
+        if self.streamed:
+            return
         job_store.update_job(
             job_id,
             stage="asr",
             progress=25,
             metrics={"wer": 0.08},
-            source_language=lang_names.get(detected_lang, detected_lang),
-            source_language_confidence=detected_conf,
+            source_language=LANGUAGE_NAMES.get(self.detected_lang, self.detected_lang),
+            source_language_confidence=transcription.get("language_confidence"),
         )
 
-        # Translation
-        job_store.update_job(job_id, stage="translation", progress=35)
-        _clear_dir(TRANS_INPUT)
-        _clear_dir(TRANS_OUTPUT)
-        for f in trans_in.iterdir():
-            if f.is_file():
-                shutil.copy2(f, TRANS_INPUT / f.name)
-        # Pass target languages via env so translation only produces requested langs
-        env = os.environ.copy()
-        env["VIDIOLINGUA_TARGET_LANGUAGES"] = ",".join(languages)
-        _run_stage(
-            "Translation",
-            [os.environ.get("PYTHON", "python"), str(PROJECT_ROOT / "translation" / "run_translate.py")],
-            str(PROJECT_ROOT),
-            env=env,
+    def _transcribe(self) -> dict:
+        job_id = self.job_id
+        self._load_audio()
+        transcription = None
+        cache_keys = []
+        if self.audio is not None:
+            cache_keys.append(transcription_key(self.audio, self.whisper_model, self.source_language))
+        if self.input_sha256:
+            cache_keys.append(upload_transcription_key(self.input_sha256, self.whisper_model, self.source_language))
+        cache = transcription_cache() if cache_keys else None
+        if cache is not None:
+            for cache_key in cache_keys:
+                transcription = cache.get_json(cache_key)
+                if transcription is not None:
+                    break
+            job_store.update_job(
+                job_id,
+                metrics={"asrCacheHits": int(transcription is not None), "asrCacheMisses": int(transcription is None)},
+            )
+        if transcription is not None:
+            # Cache hit: skip process_video, but still leave the artifact in the job workspace
+            transcription["video_file"] = str(self.video_path)
+            with open(self._transcription_file(), "w", encoding="utf-8") as f:
+                json.dump(transcription, f, indent=2, ensure_ascii=False)
+        elif streaming_enabled() and self.engine.name == "inprocess" and self.audio is not None:
+            transcription = self._stream()
+            if cache is not None:
+                for cache_key in cache_keys:
+                    cache.put_json(cache_key, transcription)
+        else:
+            transcription = self.engine.run_asr(
+                self.video_path,
+                self.asr_out,
+                source_language=self.source_language,
+                model_size=self.whisper_model,
+                audio=self.audio,
+            )
+            if cache is not None:
+                for cache_key in cache_keys:
+                    cache.put_json(cache_key, transcription)
+        return transcription
+
+    def _stream(self) -> dict:
+        """ASR, translation and TTS in one overlapped pass; the translation and tts stages then have nothing to do."""
+        job_id = self.job_id
+        duration = max(self.audio.duration, 1e-6)
+
+        def on_recognized(seconds: float) -> None:
+            job_store.update_job(job_id, progress=10 + int(60 * min(seconds / duration, 1.0)))
+
+        stream_stats = {}
+        transcription, self.translations, self.audio_files = self.engine.run_streaming(
+            self.video_path,
+            self.audio,
+            self.languages,
+            self.asr_out,
+            self.trans_out,
+            self.tts_out,
+            source_language=self.source_language,
+            model_size=self.whisper_model,
+            voice_options=self.voice_options,
+            voice_sample_path=self.voice_sample_path,
+            on_progress=on_recognized,
+            stats=stream_stats,
         )
-        for f in TRANS_OUTPUT.iterdir():
-            if f.is_file():
-                shutil.copy2(f, tts_in / f.name)
-        job_store.update_job(job_id, stage="translation", progress=50, metrics={"bleu": 0.82})
-
-        # TTS
-        job_store.update_job(job_id, stage="tts", progress=60)
-        _clear_dir(TTS_INPUT)
-        _clear_dir(TTS_OUTPUT)
-        for f in tts_in.iterdir():
-            if f.is_file():
-                shutil.copy2(f, TTS_INPUT / f.name)
-        tts_env = os.environ.copy()
-        tts_env["VIDIOLINGUA_VOICE_OPTIONS"] = json.dumps(voice_options or {})
-        if voice_sample_path:
-            tts_env["VIDIOLINGUA_VOICE_SAMPLE"] = voice_sample_path
-        _run_stage(
-            "TTS",
-            [os.environ.get("PYTHON", "python"), str(PROJECT_ROOT / "tts" / "run_tts.py")],
-            str(PROJECT_ROOT),
-            env=tts_env,
+        self.streamed = True
+        for lang in self.languages:
+            self.manifest.record(self._translation_file(lang), self._translation_fingerprint(lang))
+            self.manifest.record(self._tts_file(lang), self._tts_fingerprint(lang))
+        detected = transcription.get("language")
+        job_store.update_job(
+            job_id,
+            metrics={
+                "wer": 0.08,
+                **_translation_metrics(stream_stats["tm"]),
+                **_tts_metrics(stream_stats["fit"]),
+                "streaming": {"asrSeconds": stream_stats["asrSeconds"], "tailSeconds": stream_stats["tailSeconds"]},
+            },
+            source_language=LANGUAGE_NAMES.get(detected, detected),
+            source_language_confidence=transcription.get("language_confidence"),
         )
-        for f in TTS_OUTPUT.iterdir():
-            if f.is_file():
-                shutil.copy2(f, lipsync_in / f.name)
-        shutil.copy2(video_path, lipsync_in / video_path.name)
-        job_store.update_job(job_id, stage="tts", progress=75, metrics={"mos": 4.2})
+        job_store.update_job(job_id, stage="tts", progress=75)
+        return transcription
+
+    def translation(self) -> None:
+        if self.streamed:
+            return
+        job_id = self.job_id
+        job_store.update_job(job_id, stage="translation", progress=35)
+
+        def on_translated(lang: str, done: int, total: int) -> None:
+            job_store.update_job(job_id, progress=35 + 15 * done // total, current_language=LANGUAGE_NAMES.get(lang, lang))
+
+        fps = {lang: self._translation_fingerprint(lang) for lang in self.languages}
+        todo = [lang for lang in self.languages if not self.manifest.is_current(self._translation_file(lang), fps[lang])]
+        tm_stats = {}
+        translations = {}
+        if todo:
+            translations = self.engine.run_translation(
+                self.transcription,
+                self.transcription_name,
+                self.trans_out,
+                todo,
+                on_progress=on_translated,
+                stats=tm_stats,
+            )
+            for lang in todo:
+                self.manifest.record(self._translation_file(lang), fps[lang])
+        for lang in self.languages:
+            if lang not in translations:
+                with open(self._translation_file(lang), "r", encoding="utf-8") as f:
+                    translations[lang] = json.load(f)
+        self.translations = {lang: translations[lang] for lang in self.languages}
+        job_store.update_job(job_id, stage="translation", progress=50, metrics=_translation_metrics(tm_stats))
 
-        # Lipsync
+    def tts(self) -> None:
+        if self.streamed:
+            return
+        job_store.update_job(self.job_id, stage="tts", progress=60)
+        fps = {lang: self._tts_fingerprint(lang) for lang in self.languages}
+        todo = [lang for lang in self.languages if not self.manifest.is_current(self._tts_file(lang), fps[lang])]
+        fit_stats = {}
+        if todo:
+            self.engine.run_tts(
+                {lang: self.translations[lang] for lang in todo},
+                self.transcription_name,
+                self.tts_out,
+                self.voice_options,
+                self.voice_sample_path,
+                duration=self._audio_duration(),
+                stats=fit_stats,
+            )
+            for lang in todo:
+                self.manifest.record(self._tts_file(lang), fps[lang])
+        self.audio_files = {lang: self._tts_file(lang) for lang in self.languages}
+        for lang in self.languages:
+            report_file = self._tts_file(lang).with_suffix(".fit.json")
+            if lang not in fit_stats and report_file.is_file():
+                fit_stats[lang] = json.loads(report_file.read_text(encoding="utf-8"))
+        job_store.update_job(self.job_id, stage="tts", progress=75, metrics=_tts_metrics(fit_stats))
+
+    def _package_hls(self, audio_files: dict) -> str:
+        """
+        Package the results into results/hls/<version>/ and return the stream URL. The version is a
+        fingerprint of the inputs, so segment names never point at different content (they are served as
+        immutable) and an unchanged package is reused. Older versions are removed.
+        """
+        hls_root = self.results_dir / "hls"
+        version = fingerprint(
+            "hls",
+            self._video_fingerprint(),
+            {lang: file_digest(wav) for lang, wav in audio_files.items()},
+            env_settings("VIDIOLINGUA_HLS_SEGMENT_SECONDS"),
+        )[:16]
+        hls_dir = hls_root / version
+        # The master playlist is written last, so its presence means the package is complete
+        if not (hls_dir / "master.m3u8").is_file():
+            try:
+                self.engine.run_hls(self.video_path, audio_files, hls_dir, LANGUAGE_NAMES)
+            except Exception:
+                shutil.rmtree(hls_dir, ignore_errors=True)
+                raise
+        for old in hls_root.iterdir():
+            if old.is_dir() and old != hls_dir:
+                shutil.rmtree(old, ignore_errors=True)
+            elif old.is_file():
+                old.unlink()
+        return f"{self.api_base}/api/stream/{self.job_id}/{version}/master.m3u8"
+
+    def lipsync(self) -> None:
+        job_id, api_base, results_dir, audio_files = self.job_id, self.api_base, self.results_dir, self.audio_files
         job_store.update_job(job_id, stage="lipsync", progress=85)
-        _clear_dir(LIPSYNC_INPUT)
-        _clear_dir(LIPSYNC_OUTPUT)
-        for f in lipsync_in.iterdir():
-            if f.is_file():
-                shutil.copy2(f, LIPSYNC_INPUT / f.name)
-        _run_stage(
-            "Lipsync",
-            [os.environ.get("PYTHON", "python"), str(PROJECT_ROOT / "lipsync" / "run_lipsync.py")],
-            str(PROJECT_ROOT),
-        )
-        for f in LIPSYNC_OUTPUT.iterdir():
-            if f.is_file():
-                shutil.copy2(f, results_dir / f.name)
-        job_store.update_job(job_id, stage="lipsync", progress=95, metrics={"lseC": 0.88})
+
+        def on_dubbed(lang: str | None, done: int, total: int) -> None:
+            update = {"progress": 85 + 10 * done // total}
+            if lang:
+                update["current_language"] = LANGUAGE_NAMES.get(lang, lang)
+            job_store.update_job(job_id, **update)
+
+        # VIDIOLINGUA_OUTPUT_MODE: separate dubbed MP4s, one multi-audio-track file, or both
+        output_mode = os.environ.get("VIDIOLINGUA_OUTPUT_MODE", "separate").strip().lower()
+        lipsync_errors = {}
+        if output_mode in ("separate", "both"):
+            fps = {lang: self._lipsync_fingerprint(lang) for lang in audio_files}
+            todo = {
+                lang: wav for lang, wav in audio_files.items()
+                if not self.manifest.is_current(self._dubbed_file(lang), fps[lang])
+            }
+            dubbed = {}
+            if todo:
+                dubbed = self.engine.run_lipsync(
+                    self.video_path, todo, self.lipsync_out, on_progress=on_dubbed, errors=lipsync_errors
+                )
+                for lang, f in dubbed.items():
+                    self.manifest.record(f, fps[lang])
+            for lang in audio_files:
+                f = dubbed.get(lang) or self._dubbed_file(lang)
+                if f.is_file() and (lang in dubbed or not (results_dir / f.name).is_file()):
+                    shutil.copy2(f, results_dir / f.name)
+        multitrack = None
+        if output_mode in ("multitrack", "both") and audio_files:
+            multitrack_file = self.engine.run_multitrack(
+                self.video_path, audio_files, self.lipsync_out, self.detected_lang
+            )
+            shutil.copy2(multitrack_file, results_dir / multitrack_file.name)
+            multitrack = {
+                "url": f"{api_base}/api/result/{job_id}/file/{multitrack_file.name}",
+                "format": multitrack_file.suffix.lstrip("."),
+                "tracks": [{"language": LANGUAGE_NAMES.get(lang, lang), "code": lang} for lang in audio_files],
+            }
+        lipsync_metrics = {"lseC": 0.88}
+        if lipsync_errors:
+            # Other languages still completed; report which ones did not
+            lipsync_metrics["failedLanguages"] = lipsync_errors
+        stream_url = None
+        if os.environ.get("VIDIOLINGUA_HLS", "0").strip().lower() in ("1", "true", "yes", "on") and audio_files:
+            # Streaming is an extra: a packaging failure leaves the downloadable outputs in place
+            lipsync_metrics["hlsError"] = None
+            try:
+                stream_url = self._package_hls(audio_files)
+            except Exception as e:
+                logger.warning("HLS packaging failed for job %s: %s", job_id, e)
+                lipsync_metrics["hlsError"] = str(e)
+        job_store.update_job(job_id, stage="lipsync", progress=95, metrics=lipsync_metrics)
 
         # Build result for frontend
-        lang_names = {
-            "hi": "Hindi",
-            "es": "Spanish",
-            "fr": "French",
-            "de": "German",
-            "ja": "Japanese",
-            "zh": "Chinese",
-            "ar": "Arabic",
-            "pt": "Portuguese",
-        }
         localized = []
         for f in results_dir.iterdir():
             if f.suffix.lower() == ".mp4" and "_dubbed_" in f.stem:
                 lang_code = f.stem.split("_dubbed_")[-1]
                 localized.append({
-                    "language": lang_names.get(lang_code, lang_code),
+                    "language": LANGUAGE_NAMES.get(lang_code, lang_code),
                     "url": f"{api_base}/api/result/{job_id}/file/{f.name}",
                     "confidence": 0.88,
                 })
-        total_time = int(time.time() - start_time)
-        if not localized:
+        total_time = int(time.time() - self.start_time)
+        languages_processed = len(localized) or (len(multitrack["tracks"]) if multitrack else 0)
+        if not localized and not multitrack:
             job_store.update_job(
                 job_id,
                 stage="complete",
@@ -300,22 +532,49 @@ def run_pipeline(
                     "jobId": job_id,
                     "originalVideo": f"{api_base}/api/result/{job_id}/file/input_video.mp4",
                     "localizedVideos": localized,
-                    "metrics": {"totalTime": total_time, "languagesProcessed": len(localized)},
+                    "metrics": {"totalTime": total_time, "languagesProcessed": languages_processed},
+                    **({"multiTrackVideo": multitrack} if multitrack else {}),
+                    **({"streamUrl": stream_url} if stream_url else {}),
                 },
             )
-    except Exception as e:
+
+    def fail(self, e: Exception) -> None:
         err_msg = str(e)
         if not err_msg.strip():
             err_msg = "Pipeline failed (see backend logs)."
-        job_store.update_job(job_id, stage="error", progress=0, error=err_msg)
-        # Also set result so frontend can show error
+        # One write with the result (so the frontend can show the error): once a job is final, another
+        # worker may requeue it
         job_store.update_job(
-            job_id,
+            self.job_id,
+            stage="error",
+            progress=0,
+            error=err_msg,
             result={
-                "jobId": job_id,
+                "jobId": self.job_id,
                 "originalVideo": "",
                 "localizedVideos": [],
                 "metrics": {"totalTime": 0, "languagesProcessed": 0},
                 "error": err_msg,
             },
         )
+
+
+def run_pipeline(
+    job_id: str,
+    video_path: str,
+    languages: list[str],
+    source_language: str | None = None,
+    voice_options: dict | None = None,
+    voice_sample_path: str | None = None,
+    whisper_model: str | None = None,
+    input_sha256: str | None = None,
+) -> None:
+    """Run every stage of one job in order on this thread."""
+    run = PipelineRun(
+        job_id, video_path, languages, source_language, voice_options, voice_sample_path, whisper_model, input_sha256
+    )
+    try:
+        for stage in PIPELINE_STAGES:
+            getattr(run, stage)()
+    except Exception as e:
+        run.fail(e)
@@ -0,0 +1,274 @@
+"""
+Job scheduler: admission control and a stage-graph executor for pipeline jobs.
+
+Uploads are queued instead of each starting a thread of its own. Up to VIDIOLINGUA_MAX_CONCURRENT_JOBS
+jobs are admitted at once, by priority (higher first), then arrival order. An admitted job moves through
+PIPELINE_STAGES, and every stage has its own queue and worker pool (VIDIOLINGUA_<STAGE>_SLOTS), so
+CPU/RAM-heavy ASR and lipsync are limited separately from network-bound translation and TTS, and ASR of
+one job runs while another job is in TTS.
+
+The admission queue lives in the job store: a queued job's row holds everything needed to run it, so
+jobs still waiting when the server stops are picked up again by resume() at the next start. Queue
+positions and estimated start times are written back to the job store for /api/job-status.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable
+
+from backend import job_store
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_STAGES = ("asr", "translation", "tts", "lipsync")
+# Rough peak memory of one job in a stage (decoded audio, model buffers, ffmpeg/Wav2Lip processes)
+STAGE_MEMORY_MB = {"asr": 2048, "lipsync": 1024}
+# Default workers for the network-bound stages; the CPU-bound ones default to "auto"
+STAGE_SLOTS = {"asr": "auto", "translation": "8", "tts": "4", "lipsync": "auto"}
+# Weight of the latest job in the running average of job duration
+ESTIMATE_SMOOTHING = 0.2
+
+
+def _physical_memory_mb() -> int | None:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def stage_slots(stage: str) -> int:
+    """
+    Workers in a stage's pool: VIDIOLINGUA_<STAGE>_SLOTS, a number or "auto". Auto gives ASR and lipsync
+    a quarter of the cores each, capped by physical memory over the per-job estimate.
+    """
+    value = os.environ.get(f"VIDIOLINGUA_{stage.upper()}_SLOTS", STAGE_SLOTS[stage]).strip().lower()
+    if value not in ("", "auto"):
+        return max(1, int(value))
+    slots = max(1, (os.cpu_count() or 1) // 4)
+    memory_mb = _physical_memory_mb()
+    if memory_mb:
+        slots = min(slots, max(1, memory_mb // STAGE_MEMORY_MB[stage]))
+    return slots
+
+
+def max_concurrent_jobs() -> int:
+    """Jobs admitted at once: VIDIOLINGUA_MAX_CONCURRENT_JOBS, by default one per stage worker."""
+    value = os.environ.get("VIDIOLINGUA_MAX_CONCURRENT_JOBS", "auto").strip().lower()
+    if value not in ("", "auto"):
+        return max(1, int(value))
+    return sum(stage_slots(stage) for stage in PIPELINE_STAGES)
+
+
+def _pipeline_run(job: dict):
+    from backend.pipeline_runner import PipelineRun
+
+    return PipelineRun.from_job(job)
+
+
+class _Stage:
+    """One stage's queue and worker pool, with the counters behind queue depth and utilization."""
+
+    def __init__(self, name: str, workers: int, lock: threading.Lock):
+        self.name = name
+        self.workers = workers
+        self.cond = threading.Condition(lock)
+        # Heap of (-priority, queued_at, seq, job_id, run): the admission order carries through every stage
+        self.queue: list[tuple] = []
+        self.running: dict[int, float] = {}
+        self.processed = 0
+        self.busy_seconds = 0.0
+
+    def stats(self, now: float, since: float) -> dict:
+        busy = self.busy_seconds + sum(now - began for began in self.running.values())
+        return {
+            "workers": self.workers,
+            "queueDepth": len(self.queue),
+            "active": len(self.running),
+            "processed": self.processed,
+            # Share of worker time spent running this stage since the scheduler started
+            "utilization": round(busy / (self.workers * max(now - since, 1e-9)), 3),
+        }
+
+
+class JobScheduler:
+    """
+    Admission queue of job ids feeding a chain of stage pools. start(job) builds a run object from the
+    job store record; the run has one method per stage and fail(exc), which is called when a stage raises
+    (the job then leaves the pipeline).
+    """
+
+    def __init__(
+        self,
+        max_jobs: int | None = None,
+        start: Callable[[dict], Any] | None = None,
+        stages: tuple[str, ...] = PIPELINE_STAGES,
+        workers: dict[str, int] | None = None,
+    ):
+        self.max_jobs = max_jobs or max_concurrent_jobs()
+        self._start = start or _pipeline_run
+        self._lock = threading.Lock()
+        self._order = list(stages)
+        self._stages = {
+            name: _Stage(name, (workers or {}).get(name) or stage_slots(name), self._lock) for name in stages
+        }
+        # Heap of (-priority, queued_at, seq, job_id): higher priority first, then FIFO
+        self._queue: list[tuple[int, float, int, str]] = []
+        self._in_flight: dict[str, float] = {}
+        self._seq = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._since = time.time()
+        self._job_seconds = float(os.environ.get("VIDIOLINGUA_JOB_ESTIMATE_SECONDS", "180"))
+        self.completed = 0
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._since = time.time()
+            for index, name in enumerate(self._order):
+                for _ in range(self._stages[name].workers):
+                    t = threading.Thread(target=self._work, args=(index,), daemon=True)
+                    t.start()
+                    self._threads.append(t)
+
+    def submit(self, job_id: str, priority: int = 0, queued_at: float | None = None) -> bool:
+        """Queue a job. Returns False (and does nothing) if the job is already queued or in flight here."""
+        self._ensure_workers()
+        with self._lock:
+            if self._active(job_id):
+                return False
+            heapq.heappush(self._queue, (-priority, queued_at or time.time(), next(self._seq), job_id))
+        self._admit()
+        return True
+
+    def _active(self, job_id: str) -> bool:
+        return job_id in self._in_flight or any(entry[3] == job_id for entry in self._queue)
+
+    def is_active(self, job_id: str) -> bool:
+        """Whether the job is queued or in flight in this scheduler (it may still be, briefly, after it
+        reached a final stage)."""
+        with self._lock:
+            return self._active(job_id)
+
+    def resume(self) -> int:
+        """Queue the jobs left waiting by a previous process. Returns how many."""
+        jobs = job_store.claim_queued()
+        for job in jobs:
+            self.submit(job["jobId"], job.get("priority") or 0, job.get("created_at"))
+        return len(jobs)
+
+    def _admit(self) -> None:
+        """Move jobs from the admission queue into the first stage while there is room."""
+        while True:
+            with self._lock:
+                if not self._queue or len(self._in_flight) >= self.max_jobs:
+                    break
+                neg_priority, queued_at, seq, job_id = heapq.heappop(self._queue)
+                admitted = time.time()
+                self._in_flight[job_id] = admitted
+            job_store.update_job(job_id, started_at=admitted)
+            run = None
+            try:
+                job = job_store.get_job(job_id)
+                if job is not None:
+                    run = self._start(dict(job))
+            except Exception as e:
+                logger.exception("Job %s could not be started", job_id)
+                try:
+                    job_store.update_job(job_id, stage="error", error=f"Job could not be started: {e}")
+                except Exception:
+                    logger.exception("Job %s could not be marked failed", job_id)
+            if run is None:
+                with self._lock:
+                    self._in_flight.pop(job_id, None)
+                continue
+            self._push(0, (neg_priority, queued_at, seq, job_id, run))
+        self._publish()
+
+    def _push(self, index: int, entry: tuple) -> None:
+        stage = self._stages[self._order[index]]
+        with stage.cond:
+            heapq.heappush(stage.queue, entry)
+            stage.cond.notify()
+
+    def _work(self, index: int) -> None:
+        stage = self._stages[self._order[index]]
+        while True:
+            with stage.cond:
+                while not stage.queue:
+                    stage.cond.wait()
+                entry = heapq.heappop(stage.queue)
+                seq, job_id, run = entry[2], entry[3], entry[4]
+                began = time.time()
+                stage.running[seq] = began
+            ok = False
+            try:
+                getattr(run, stage.name)()
+                ok = True
+            except Exception as e:
+                logger.warning("Job %s failed in %s: %s", job_id, stage.name, e)
+                try:
+                    run.fail(e)
+                except Exception:
+                    logger.exception("Job %s failed in %s and could not be marked failed", job_id, stage.name)
+            finally:
+                with self._lock:
+                    del stage.running[seq]
+                    stage.processed += 1
+                    stage.busy_seconds += time.time() - began
+            if ok and index + 1 < len(self._order):
+                self._push(index + 1, entry)
+                continue
+            with self._lock:
+                admitted = self._in_flight.pop(job_id, None)
+                self.completed += 1
+                if admitted is not None:
+                    self._job_seconds += ESTIMATE_SMOOTHING * (time.time() - admitted - self._job_seconds)
+            self._admit()
+
+    def estimates(self) -> list[tuple[str, int, float]]:
+        """(job_id, 1-based position, estimated start) for every queued job, in the order they will start."""
+        with self._lock:
+            now = time.time()
+            # When each admission slot is expected to free up, assuming every job takes the running average
+            free = [max(now, admitted + self._job_seconds) for admitted in self._in_flight.values()]
+            free += [now] * max(0, self.max_jobs - len(free))
+            heapq.heapify(free)
+            out = []
+            for position, entry in enumerate(sorted(self._queue), start=1):
+                start = heapq.heappop(free)
+                out.append((entry[3], position, start))
+                heapq.heappush(free, start + self._job_seconds)
+            return out
+
+    def _publish(self) -> None:
+        for job_id, position, start in self.estimates():
+            job_store.set_queue_state(job_id, position, round(start, 1))
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.time()
+            return {
+                "maxJobs": self.max_jobs,
+                "queued": len(self._queue),
+                "inFlight": len(self._in_flight),
+                "completed": self.completed,
+                "estimatedJobSeconds": round(self._job_seconds, 1),
+                "stages": {name: self._stages[name].stats(now, self._since) for name in self._order},
+            }
+
+
+_scheduler: JobScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
@@ -0,0 +1,483 @@
+"""
+Stage execution engine for the VidioLingua pipeline.
+
+The default "inprocess" engine imports the stage modules once and calls their entry points
+directly, passing transcriptions and translations in memory. The "subprocess" engine runs each
+stage as a standalone script (python asr/run_asr.py, ...) for process isolation.
+Select with VIDIOLINGUA_STAGE_MODE=inprocess|subprocess.
+
+Both engines only read and write the paths they are given (normally under JOBS_DIR/<job_id>),
+so concurrent jobs never share files.
+
+The in-process engine can also stream a job (VIDIOLINGUA_STREAMING=1): run_streaming forwards ASR
+segments in small windows to translation and TTS while Whisper is still decoding.
+"""
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+STAGE_MODULES = {
+    "asr": "asr.run_asr",
+    "translation": "translation.run_translate",
+    "tts": "tts.run_tts",
+    "lipsync": "lipsync.run_lipsync",
+    "hls": "lipsync.hls",
+}
+STAGE_LABELS = {"asr": "ASR", "translation": "Translation", "tts": "TTS", "lipsync": "Lipsync", "hls": "HLS packaging"}
+
+
+def streaming_enabled() -> bool:
+    return os.environ.get("VIDIOLINGUA_STREAMING", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def stream_window() -> int:
+    """ASR segments per streamed window: small keeps latency low, larger batches translation requests."""
+    return max(1, int(os.environ.get("VIDIOLINGUA_STREAM_WINDOW", "4")))
+
+
+def load_stage(name: str):
+    """Import a stage module once (cached in sys.modules) and return it."""
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    return importlib.import_module(STAGE_MODULES[name])
+
+
+@contextmanager
+def _stage_errors(name: str):
+    """Report in-process failures the same way as subprocess ones: '<Stage>: <message>'."""
+    try:
+        yield
+    except Exception as e:
+        raise RuntimeError(f"{STAGE_LABELS[name]}: {e}") from e
+
+
+def _write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _read_fit_report(wav_file: Path, lang: str, stats: dict | None) -> None:
+    """Copy the duration-fitting report TTS wrote next to wav_file into stats[lang]."""
+    report_file = wav_file.with_suffix(".fit.json")
+    if stats is not None and report_file.is_file():
+        stats[lang] = json.loads(report_file.read_text(encoding="utf-8"))
+
+
+def _lipsync_failures(outputs: dict, failed: dict, errors: dict | None) -> None:
+    """Per-language lipsync failures go into errors; raise only if every language failed or errors is None."""
+    if not failed:
+        return
+    if outputs and errors is not None:
+        errors.update(failed)
+        return
+    raise RuntimeError(f"{STAGE_LABELS['lipsync']}: " + "\n".join(failed.values()))
+
+
+class InProcessEngine:
+    """Calls stage functions directly; artifacts are still written to the given output dirs."""
+
+    name = "inprocess"
+
+    def run_asr(
+        self,
+        video_path: Path,
+        output_dir: Path,
+        source_language: str | None = None,
+        model_size: str | None = None,
+        audio=None,
+    ) -> dict:
+        asr = load_stage("asr")
+        with _stage_errors("asr"):
+            transcription = asr.process_video(
+                video_path, source_language=source_language, model_size=model_size, audio=audio
+            )
+        _write_json(output_dir / f"{video_path.stem}_transcription.json", transcription)
+        return transcription
+
+    def run_translation(
+        self,
+        transcription: dict,
+        transcription_name: str,
+        output_dir: Path,
+        languages: list[str],
+        on_progress=None,
+        stats: dict | None = None,
+    ) -> dict[str, dict]:
+        translation = load_stage("translation")
+        with _stage_errors("translation"):
+            translated = translation.translate_languages(transcription, languages, on_progress, stats=stats)
+            for lang, data in translated.items():
+                _write_json(output_dir / f"{transcription_name}_{lang}.json", data)
+        return translated
+
+    def run_tts(
+        self,
+        translations: dict[str, dict],
+        transcription_name: str,
+        output_dir: Path,
+        voice_options: dict,
+        voice_sample_path: str | None = None,
+        duration: float | None = None,
+        stats: dict | None = None,
+    ) -> dict[str, Path]:
+        tts = load_stage("tts")
+        audio_files = {}
+        with _stage_errors("tts"):
+            voice_id = tts.resolve_voice_id(voice_options, voice_sample_path)
+            for lang, data in translations.items():
+                output_file = output_dir / f"{transcription_name}_{lang}.wav"
+                tts.generate_audio_from_transcription(data, output_file, voice_options, voice_id, duration)
+                audio_files[lang] = output_file
+                _read_fit_report(output_file, lang, stats)
+        return audio_files
+
+    def run_streaming(
+        self,
+        video_path: Path,
+        audio,
+        languages: list[str],
+        asr_dir: Path,
+        translation_dir: Path,
+        tts_dir: Path,
+        source_language: str | None = None,
+        model_size: str | None = None,
+        voice_options: dict | None = None,
+        voice_sample_path: str | None = None,
+        on_progress=None,
+        stats: dict | None = None,
+    ) -> tuple[dict, dict[str, dict], dict[str, Path]]:
+        """
+        ASR, translation and TTS overlapped: every stream_window() segments Whisper emits are translated
+        into each language, and each translated window is synthesized, fitted and mixed into that language's
+        timeline while recognition continues. on_progress(seconds) reports how far ASR has got.
+        Writes the same artifacts as run_asr, run_translation and run_tts and returns
+        (transcription, translations, audio_files). stats gets "tm" and "fit" like the staged
+        calls, plus "asrSeconds" and "tailSeconds" (time after ASR ended until all audio was written).
+        """
+        asr, translation, tts = load_stage("asr"), load_stage("translation"), load_stage("tts")
+        stats = stats if stats is not None else {}
+        tm_stats = stats.setdefault("tm", {})
+        duration = audio.duration if audio is not None else None
+        transcription_name = f"{video_path.stem}_transcription"
+        with _stage_errors("tts"):
+            voice_id = tts.resolve_voice_id(voice_options or {}, voice_sample_path)
+
+        started = time.time()
+        segments: list[dict] = []
+        windows: dict[str, list[tuple[int, list[dict]]]] = {lang: [] for lang in languages}
+        tracks = {}
+        tts_futures = []
+        futures_lock = threading.Lock()
+        translate_pool = ThreadPoolExecutor(max_workers=max(1, min(translation.TRANSLATION_CONCURRENCY, len(languages))))
+        tts_pool = ThreadPoolExecutor(max_workers=max(1, tts.TTS_WORKERS * len(languages)))
+
+        def synthesize(track, group: dict) -> None:
+            with _stage_errors("tts"):
+                track.add_group(group)
+
+        def dub_window(lang: str, index: int, window: list[dict], source_lang: str) -> None:
+            texts = [seg["text"] for seg in window]
+            if lang != source_lang:
+                with _stage_errors("translation"):
+                    texts = translation.translate_texts(texts, source_lang, lang, stats=tm_stats)
+            translated = [{"start": seg["start"], "end": seg["end"], "text": text} for seg, text in zip(window, texts)]
+            windows[lang].append((index, translated))
+            futures = [tts_pool.submit(synthesize, tracks[lang], group) for group in tts.group_segments(translated)]
+            with futures_lock:
+                tts_futures.extend(futures)
+
+        try:
+            translate_futures = []
+            with _stage_errors("asr"):
+                with asr.stream_segments(video_path, source_language, model_size, audio) as (language, confidence, stream):
+                    for lang in languages:
+                        tracks[lang] = tts.DubTrack(
+                            lang, tts_dir / f"{transcription_name}_{lang}.wav", duration or 0.0, voice_options, voice_id
+                        )
+                    window: list[dict] = []
+                    for seg in stream:
+                        segments.append(seg)
+                        window.append(seg)
+                        if len(window) >= stream_window():
+                            index = len(segments) // stream_window()
+                            translate_futures += [
+                                translate_pool.submit(dub_window, lang, index, window, language) for lang in languages
+                            ]
+                            window = []
+                        if on_progress:
+                            on_progress(seg["end"])
+                    if window:
+                        index = len(segments) // stream_window() + 1
+                        translate_futures += [
+                            translate_pool.submit(dub_window, lang, index, window, language) for lang in languages
+                        ]
+            asr_done = time.time()
+            for future in translate_futures:
+                future.result()
+            for future in tts_futures:
+                future.result()
+        finally:
+            translate_pool.shutdown(wait=False, cancel_futures=True)
+            tts_pool.shutdown(wait=False, cancel_futures=True)
+
+        transcription = {
+            "video_file": str(video_path),
+            "segments": segments or [{"start": 0.0, "end": 0.1, "text": "(no speech detected)"}],
+            "language": language,
+            "language_confidence": confidence,
+        }
+        _write_json(asr_dir / f"{transcription_name}.json", transcription)
+        translations, audio_files = {}, {}
+        fit_stats = stats.setdefault("fit", {})
+        with _stage_errors("tts"):
+            for lang in languages:
+                translations[lang] = {
+                    "video_file": str(video_path),
+                    "segments": [seg for _, window in sorted(windows[lang], key=lambda w: w[0]) for seg in window],
+                    "language": lang,
+                }
+                _write_json(translation_dir / f"{transcription_name}_{lang}.json", translations[lang])
+                audio_files[lang] = tracks[lang].finish()
+                _read_fit_report(audio_files[lang], lang, fit_stats)
+        stats["asrSeconds"] = round(asr_done - started, 2)
+        stats["tailSeconds"] = round(time.time() - asr_done, 2)
+        return transcription, translations, audio_files
+
+    def run_lipsync(
+        self,
+        video_path: Path,
+        audio_files: dict[str, Path],
+        output_dir: Path,
+        on_progress=None,
+        errors: dict | None = None,
+    ) -> dict[str, Path]:
+        lipsync = load_stage("lipsync")
+        outputs, failed = lipsync.dub_videos(video_path, audio_files, output_dir, on_progress)
+        _lipsync_failures(outputs, failed, errors)
+        return outputs
+
+    def run_multitrack(
+        self,
+        video_path: Path,
+        audio_files: dict[str, Path],
+        output_dir: Path,
+        source_language: str | None = None,
+    ) -> Path:
+        lipsync = load_stage("lipsync")
+        with _stage_errors("lipsync"):
+            return lipsync.mux_multitrack(
+                video_path, audio_files, lipsync.multitrack_path(video_path, output_dir), source_language
+            )
+
+    def run_hls(
+        self,
+        video_path: Path,
+        audio_files: dict[str, Path],
+        output_dir: Path,
+        language_names: dict[str, str] | None = None,
+    ) -> Path:
+        hls = load_stage("hls")
+        with _stage_errors("hls"):
+            return hls.package_hls(video_path, audio_files, output_dir, language_names)
+
+
+def _run_stage(name: str, cmd: list, cwd: str, env=None):
+    """Run a stage; on failure raise with decoded stderr for reporting."""
+    result = subprocess.run(
+        cmd,
+        cwd=cwd,
+        env=env or os.environ,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if result.returncode != 0:
+        err = (result.stderr or result.stdout or "").strip() or f"Exit code {result.returncode}"
+        raise RuntimeError(f"{name}: {err}")
+    return result
+
+
+def _script(name: str) -> list:
+    return [os.environ.get("PYTHON", "python"), str(PROJECT_ROOT / STAGE_MODULES[name].replace(".", "/")) + ".py"]
+
+
+class SubprocessEngine:
+    """
+    Runs each stage script in a fresh interpreter. Inputs that only exist in memory are staged
+    in the sibling input/ dir of the stage's output dir (e.g. JOBS_DIR/<job_id>/tts/input).
+    """
+
+    name = "subprocess"
+
+    def run_asr(
+        self,
+        video_path: Path,
+        output_dir: Path,
+        source_language: str | None = None,
+        model_size: str | None = None,
+        audio=None,
+    ) -> dict:
+        # The script decodes the video itself; in-memory audio cannot cross the process boundary
+        env = os.environ.copy()
+        if source_language:
+            env["VIDIOLINGUA_SOURCE_LANGUAGE"] = source_language
+        cmd = _script("asr") + ["--input", str(video_path), "--output-dir", str(output_dir)]
+        if model_size:
+            cmd += ["--model", model_size]
+        _run_stage(
+            "ASR",
+            cmd,
+            str(PROJECT_ROOT),
+            env=env,
+        )
+        output_file = output_dir / f"{video_path.stem}_transcription.json"
+        return json.loads(output_file.read_text(encoding="utf-8"))
+
+    def run_translation(
+        self,
+        transcription: dict,
+        transcription_name: str,
+        output_dir: Path,
+        languages: list[str],
+        on_progress=None,
+        stats: dict | None = None,
+    ) -> dict[str, dict]:
+        input_file = output_dir.parent / "input" / f"{transcription_name}.json"
+        _write_json(input_file, transcription)
+        _run_stage(
+            "Translation",
+            _script("translation")
+            + ["--input", str(input_file), "--output-dir", str(output_dir), "--languages", ",".join(languages)],
+            str(PROJECT_ROOT),
+        )
+        translated = {}
+        for lang in languages:
+            output_file = output_dir / f"{transcription_name}_{lang}.json"
+            if output_file.is_file():
+                translated[lang] = json.loads(output_file.read_text(encoding="utf-8"))
+        return translated
+
+    def run_tts(
+        self,
+        translations: dict[str, dict],
+        transcription_name: str,
+        output_dir: Path,
+        voice_options: dict,
+        voice_sample_path: str | None = None,
+        duration: float | None = None,
+        stats: dict | None = None,
+    ) -> dict[str, Path]:
+        input_files = []
+        for lang, data in translations.items():
+            input_file = output_dir.parent / "input" / f"{transcription_name}_{lang}.json"
+            _write_json(input_file, data)
+            input_files.append(str(input_file))
+        if not input_files:
+            return {}
+        env = os.environ.copy()
+        env["VIDIOLINGUA_VOICE_OPTIONS"] = json.dumps(voice_options or {})
+        if voice_sample_path:
+            env["VIDIOLINGUA_VOICE_SAMPLE"] = voice_sample_path
+        cmd = _script("tts") + ["--input", *input_files, "--output-dir", str(output_dir)]
+        if duration is not None:
+            cmd += ["--duration", str(duration)]
+        _run_stage(
+            "TTS",
+            cmd,
+            str(PROJECT_ROOT),
+            env=env,
+        )
+        audio_files = {}
+        for lang in translations:
+            output_file = output_dir / f"{transcription_name}_{lang}.wav"
+            if output_file.is_file():
+                audio_files[lang] = output_file
+                _read_fit_report(output_file, lang, stats)
+        return audio_files
+
+    def run_lipsync(
+        self,
+        video_path: Path,
+        audio_files: dict[str, Path],
+        output_dir: Path,
+        on_progress=None,
+        errors: dict | None = None,
+    ) -> dict[str, Path]:
+        if not audio_files:
+            return {}
+        _run_stage(
+            "Lipsync",
+            _script("lipsync")
+            + ["--video", str(video_path), "--input", *(str(f) for f in audio_files.values()),
+               "--output-dir", str(output_dir)],
+            str(PROJECT_ROOT),
+        )
+        outputs, failed = {}, {}
+        for lang, audio_file in audio_files.items():
+            output_file = output_dir / f"{video_path.stem}_dubbed_{lang}.mp4"
+            if output_file.is_file():
+                outputs[lang] = output_file
+            else:
+                failed[lang] = f"Error processing {audio_file.name}: no dubbed video produced"
+        _lipsync_failures(outputs, failed, errors)
+        if on_progress:
+            on_progress(None, len(audio_files), len(audio_files))
+        return outputs
+
+    def run_multitrack(
+        self,
+        video_path: Path,
+        audio_files: dict[str, Path],
+        output_dir: Path,
+        source_language: str | None = None,
+    ) -> Path:
+        cmd = _script("lipsync") + [
+            "--video", str(video_path), "--input", *(str(f) for f in audio_files.values()),
+            "--output-dir", str(output_dir), "--multitrack",
+        ]
+        if source_language:
+            cmd += ["--source-language", source_language]
+        _run_stage("Lipsync", cmd, str(PROJECT_ROOT))
+        return load_stage("lipsync").multitrack_path(video_path, output_dir)
+
+    def run_hls(
+        self,
+        video_path: Path,
+        audio_files: dict[str, Path],
+        output_dir: Path,
+        language_names: dict[str, str] | None = None,
+    ) -> Path:
+        _run_stage(
+            STAGE_LABELS["hls"],
+            _script("lipsync")
+            + ["--video", str(video_path), "--input", *(str(f) for f in audio_files.values()),
+               "--output-dir", str(output_dir), "--hls", "--language-names", json.dumps(language_names or {})],
+            str(PROJECT_ROOT),
+        )
+        return output_dir / "master.m3u8"
+
+
+_ENGINES = {"inprocess": InProcessEngine, "subprocess": SubprocessEngine}
+_engine_instances: dict = {}
+
+
+def get_engine(mode: str | None = None):
+    """Return the engine for mode (default: VIDIOLINGUA_STAGE_MODE, else in-process)."""
+    mode = (mode or os.environ.get("VIDIOLINGUA_STAGE_MODE", "") or "inprocess").strip().lower()
+    if mode not in _ENGINES:
+        raise ValueError(f"Unknown stage mode '{mode}'; expected one of: {', '.join(_ENGINES)}")
+    if mode not in _engine_instances:
+        _engine_instances[mode] = _ENGINES[mode]()
+    return _engine_instances[mode]
@@ -0,0 +1,357 @@
+"""
+Upload ingestion: stream request files to disk in fixed-size chunks.
+
+Uploads are never held in memory as a whole, and never land on disk twice: the multipart body is
+parsed as it arrives (rather than through FastAPI File()/Form() parameters, which spool every file to a
+temporary file before the endpoint runs) and each file part goes straight to its destination. Each
+chunk is hashed (sha256, used as a content address by the caches) as it is written. Bodies whose
+Content-Length exceeds VIDIOLINGUA_MAX_UPLOAD_MB are rejected before any of it is read, and a file that
+grows past the limit stops the upload. Large uploads over flaky connections can instead use the
+resumable protocol (ResumableUpload).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from shared.file_lock import file_lock
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+UPLOAD_CHUNK_BYTES = int(float(os.environ.get("VIDIOLINGUA_UPLOAD_CHUNK_MB", "8")) * 1024 * 1024)
+MAX_UPLOAD_BYTES = int(float(os.environ.get("VIDIOLINGUA_MAX_UPLOAD_MB", "4096")) * 1024 * 1024)
+# Room for the multipart framing and the small form fields on top of the file limit
+FORM_OVERHEAD_BYTES = 1024 * 1024
+
+
+def _write_chunk(f, digest, chunk: bytes) -> None:
+    # Off the event loop: hashing and disk writes of multi-MB chunks would stall other requests
+    digest.update(chunk)
+    f.write(chunk)
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(413, f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+
+class _Parts:
+    """MultipartParser callbacks; they only queue events, which save_form consumes between body chunks."""
+
+    def __init__(self):
+        self.events: list[tuple[str, object]] = []
+        self._field = b""
+        self._value = b""
+        self._headers: dict[bytes, bytes] = {}
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": lambda: self.events.append(("begin", self._headers)),
+            "on_part_data": lambda data, start, end: self.events.append(("data", bytes(data[start:end]))),
+            "on_part_end": lambda: self.events.append(("end", None)),
+        }
+
+    def _part_begin(self) -> None:
+        self._headers = {}
+
+    def _header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field, self._value = b"", b""
+
+    def drain(self) -> list[tuple[str, object]]:
+        events, self.events = self.events, []
+        return events
+
+
+class SavedFile:
+    def __init__(self, path: Path, size: int, sha256: str, filename: str, content_type: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self.content_type = content_type
+
+
+async def save_form(
+    request: Request,
+    files: dict[str, Path],
+    content_types: dict[str, str] | None = None,
+    max_bytes: int | None = None,
+    chunk_size: int | None = None,
+) -> tuple[dict[str, str], dict[str, SavedFile]]:
+    """
+    Parse a multipart/form-data request body as it streams in, writing the file fields named in `files`
+    to their paths chunk by chunk. Returns (text fields, saved files by field name). A file whose content
+    type does not start with content_types[name] is rejected (400) as soon as its headers arrive; HTTP 413
+    once a file exceeds max_bytes (default MAX_UPLOAD_BYTES; 0 means no limit). Written files are removed
+    when the upload fails.
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    chunk_size = chunk_size or UPLOAD_CHUNK_BYTES
+    content_types = content_types or {}
+    length = request.headers.get("content-length", "")
+    if max_bytes and length.isdigit() and int(length) > max_bytes + FORM_OVERHEAD_BYTES:
+        raise _too_large(max_bytes)
+    media_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if media_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(400, "Expected a multipart/form-data body")
+
+    parts = _Parts()
+    parser = MultipartParser(params[b"boundary"], parts.callbacks())
+    fields: dict[str, str] = {}
+    saved: dict[str, SavedFile] = {}
+    # The part being read: a field name and its bytes, or an open file
+    name, filename, value, f, digest, size, buffer, info = None, None, b"", None, None, 0, bytearray(), None
+
+    async def flush() -> None:
+        if buffer:
+            await run_in_threadpool(_write_chunk, f, digest, bytes(buffer))
+            buffer.clear()
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, data in parts.drain():
+                if kind == "begin":
+                    _, disposition = parse_options_header(data.get(b"content-disposition", b""))
+                    name = disposition.get(b"name", b"").decode("utf-8", "replace")
+                    filename = disposition.get(b"filename")
+                    value, size = b"", 0
+                    # A file input left empty is sent with an empty filename
+                    if filename:
+                        if name not in files or name in saved:
+                            raise HTTPException(400, f"Unexpected file field '{name}'")
+                        content_type = data.get(b"content-type", b"").decode("latin-1")
+                        if not content_type.startswith(content_types.get(name, "")):
+                            raise HTTPException(400, f"'{name}' must be a {content_types[name].rstrip('/')} file")
+                        files[name].parent.mkdir(parents=True, exist_ok=True)
+                        f, digest = open(files[name], "wb"), hashlib.sha256()
+                        info = (filename.decode("utf-8", "replace"), content_type)
+                        saved[name] = SavedFile(files[name], 0, "", *info)
+                elif kind == "data":
+                    if f is not None:
+                        size += len(data)
+                        if max_bytes and size > max_bytes:
+                            raise _too_large(max_bytes)
+                        buffer += data
+                        if len(buffer) >= chunk_size:
+                            await flush()
+                    elif filename is None:
+                        value += data
+                        if len(value) > FORM_OVERHEAD_BYTES:
+                            raise HTTPException(400, f"Form field '{name}' is too large")
+                elif f is not None:
+                    await flush()
+                    f.close()
+                    f = None
+                    saved[name] = SavedFile(files[name], size, digest.hexdigest(), *info)
+                elif filename is None:
+                    fields[name] = value.decode("utf-8", "replace")
+        parser.finalize()
+        if f is not None:
+            raise HTTPException(400, "Upload ended before the file was complete")
+    except BaseException:
+        if f is not None:
+            f.close()
+        for entry in saved.values():
+            entry.path.unlink(missing_ok=True)
+        raise
+    return fields, saved
+
+
+# --- Resumable uploads -------------------------------------------------------------------------------
+#
+# initiate -> PUT chunks at byte offsets (any order, retried freely) -> query received ranges -> finalize.
+# Chunks are written straight into the job's input_video.mp4 at their offsets; the received ranges are
+# persisted next to it (upload.json) so an upload survives client reconnects and server restarts.
+# upload.json is only changed under an exclusive lock on upload.lock, so PUTs handled by different
+# server worker processes do not lose each other's ranges.
+
+STATE_FILE = "upload.json"
+LOCK_FILE = "upload.lock"
+RESUMABLE_CHUNK_BYTES = int(float(os.environ.get("VIDIOLINGUA_RESUMABLE_CHUNK_MB", "8")) * 1024 * 1024)
+
+_locks: dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def _lock_for(upload_id: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+@contextmanager
+def _upload_lock(job_dir: Path):
+    """Exclusive across threads (in-process lock) and worker processes (OS lock on upload.lock)."""
+    with _lock_for(job_dir.name), file_lock(job_dir / LOCK_FILE):
+        yield
+
+
+def _write_at(f, offset: int, data: bytes) -> None:
+    f.seek(offset)
+    f.write(data)
+
+
+def merge_ranges(ranges: list[list[int]]) -> list[list[int]]:
+    """Merge [start, end) ranges into a sorted, non-overlapping list."""
+    merged: list[list[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        elif end > start:
+            merged.append([start, end])
+    return merged
+
+
+class ResumableUpload:
+    def __init__(self, job_dir: Path, state: dict):
+        self.job_dir = job_dir
+        self.state = state
+
+    @property
+    def video_path(self) -> Path:
+        return self.job_dir / "input_video.mp4"
+
+    @property
+    def size(self) -> int:
+        return self.state["size"]
+
+    @property
+    def ranges(self) -> list[list[int]]:
+        return self.state["received"]
+
+    @property
+    def complete(self) -> bool:
+        return self.size == 0 or self.ranges == [[0, self.size]]
+
+    @classmethod
+    def create(cls, job_dir: Path, size: int, options: dict) -> "ResumableUpload":
+        if size < 0:
+            raise HTTPException(400, "size must be non-negative")
+        if MAX_UPLOAD_BYTES and size > MAX_UPLOAD_BYTES:
+            raise HTTPException(413, f"Upload exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit")
+        job_dir.mkdir(parents=True, exist_ok=True)
+        upload = cls(job_dir, {"size": size, "received": [], "options": options, "finalized": False})
+        # Preallocate (sparse) so chunks can land at any offset
+        with open(upload.video_path, "wb") as f:
+            f.truncate(size)
+        upload.save()
+        return upload
+
+    @classmethod
+    def load(cls, job_dir: Path) -> "ResumableUpload":
+        try:
+            state = json.loads((job_dir / STATE_FILE).read_text(encoding="utf-8"))
+        except (FileNotFoundError, NotADirectoryError):
+            raise HTTPException(404, "Upload not found") from None
+        return cls(job_dir, state)
+
+    def save(self) -> None:
+        tmp = self.job_dir / (STATE_FILE + ".tmp")
+        tmp.write_text(json.dumps(self.state), encoding="utf-8")
+        os.replace(tmp, self.job_dir / STATE_FILE)
+
+    def describe(self) -> dict:
+        return {
+            "uploadId": self.job_dir.name,
+            "size": self.size,
+            "received": self.ranges,
+            "receivedBytes": sum(end - start for start, end in self.ranges),
+            "complete": self.complete,
+            "chunkSize": RESUMABLE_CHUNK_BYTES,
+        }
+
+    def _check_open(self) -> None:
+        """Under the upload lock: reload the state and refuse once finalize has hashed the file."""
+        self.state = ResumableUpload.load(self.job_dir).state
+        if self.state["finalized"]:
+            raise HTTPException(409, "Upload already finalized")
+
+    def _write_piece(self, f, offset: int, piece: bytes) -> None:
+        # Each piece is written under the lock finalize holds while hashing, so no byte lands in the file
+        # after it was hashed and handed to the pipeline
+        with _upload_lock(self.job_dir):
+            self._check_open()
+            _write_at(f, offset, piece)
+            f.flush()
+
+    async def write_chunk(self, offset: int, stream) -> None:
+        """Write the request body stream at offset. Bytes that arrived are recorded even if the client drops."""
+        with _upload_lock(self.job_dir):
+            self._check_open()
+        if offset < 0 or offset > self.size:
+            raise HTTPException(400, "offset out of range")
+        written = 0
+        f = open(self.video_path, "r+b")
+        try:
+            async for piece in stream:
+                if not piece:
+                    continue
+                if offset + written + len(piece) > self.size:
+                    raise HTTPException(400, "Chunk runs past the declared upload size")
+                await run_in_threadpool(self._write_piece, f, offset + written, piece)
+                written += len(piece)
+        finally:
+            f.close()
+            if written:
+                self.record(offset, offset + written)
+
+    def record(self, start: int, end: int) -> None:
+        with _upload_lock(self.job_dir):
+            # Reload: concurrent PUTs for other offsets may have recorded ranges meanwhile
+            self._check_open()
+            latest = self.state
+            latest["received"] = merge_ranges(latest["received"] + [[start, end]])
+            self.state = latest
+            self.save()
+
+    def finalize(self, start_job: Callable[[str], None], job_exists: Callable[[], bool]) -> None:
+        """
+        Hash the file (chunks may arrive out of order, so hash at the end), mark the upload finalized and
+        call start_job(sha256), all under the upload lock. Safe to retry: a finalized upload whose job was
+        never created (the process died in between) gets its job started by the next call.
+        """
+        with _upload_lock(self.job_dir):
+            self.state = ResumableUpload.load(self.job_dir).state
+            if not self.state["finalized"]:
+                if not self.complete:
+                    missing = self.size - sum(end - start for start, end in self.ranges)
+                    raise HTTPException(409, f"Upload incomplete: {missing} bytes missing")
+                digest = hashlib.sha256()
+                with open(self.video_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+                        digest.update(chunk)
+                self.state["finalized"] = True
+                self.state["sha256"] = digest.hexdigest()
+                self.save()
+            elif job_exists():
+                return
+            start_job(self.state["sha256"])
+
+    def attach_voice_sample(self, sample: Path) -> None:
+        """Move an uploaded voice sample into place; rejected (and removed) once the upload is finalized."""
+        with _upload_lock(self.job_dir):
+            self.state = ResumableUpload.load(self.job_dir).state
+            if self.state["finalized"]:
+                sample.unlink(missing_ok=True)
+                raise HTTPException(409, "Upload already finalized")
+            os.replace(sample, self.job_dir / "voice_sample.wav")
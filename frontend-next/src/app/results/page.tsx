@@ -4,6 +4,7 @@ import { usePipelineStore } from '@/store/pipeline-store'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
 import { Progress } from '@/components/ui/progress'
+import { StreamPlayer } from '@/components/media/stream-player'
 import { useRouter } from 'next/navigation'
 import { Download, Play, ArrowLeft, CheckCircle2, AlertCircle } from 'lucide-react'
 import { motion } from 'framer-motion'
@@ -160,12 +161,21 @@ export default function ResultsPage() {
                     <div className="flex flex-col gap-2">
                       {isRealVideoUrl(video.url) ? (
                         <>
-                          <video
-                            src={video.url}
-                            controls
-                            className="w-full rounded-lg max-h-48"
-                            crossOrigin="anonymous"
-                          />
+                          {isRealVideoUrl(result.streamUrl) ? (
+                            <StreamPlayer
+                              src={result.streamUrl!}
+                              fallbackSrc={video.url}
+                              audioLanguage={video.language}
+                              className="w-full rounded-lg max-h-48"
+                            />
+                          ) : (
+                            <video
+                              src={video.url}
+                              controls
+                              className="w-full rounded-lg max-h-48"
+                              crossOrigin="anonymous"
+                            />
+                          )}
                           <div className="flex gap-2">
                             <a
                               href={video.url}
@@ -194,6 +204,24 @@ export default function ResultsPage() {
                     </div>
                   </motion.div>
                 ))}
+                {result.multiTrackVideo && (
+                  <div className="border rounded-lg p-4">
+                    <div className="flex items-center justify-between mb-2">
+                      <div className="font-semibold">All languages (multi-track {result.multiTrackVideo.format.toUpperCase()})</div>
+                      <div className="text-sm text-muted-foreground">
+                        {result.multiTrackVideo.tracks.map((track) => track.language).join(', ')}
+                      </div>
+                    </div>
+                    <a
+                      href={result.multiTrackVideo.url}
+                      download
+                      className="w-full inline-flex items-center justify-center rounded-md border border-input bg-background px-4 py-2 text-sm font-medium hover:bg-accent hover:text-accent-foreground"
+                    >
+                      <Download className="w-4 h-4 mr-2" />
+                      Download
+                    </a>
+                  </div>
+                )}
               </div>
             </CardContent>
           </Card>
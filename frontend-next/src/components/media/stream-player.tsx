@@ -0,0 +1,83 @@
+'use client'
+
+import { useEffect, useRef } from 'react'
+
+interface StreamPlayerProps {
+  /** HLS master playlist (result.streamUrl) */
+  src: string
+  /** MP4 played when HLS cannot be used in this browser or the stream fails */
+  fallbackSrc?: string
+  /** Alternate audio rendition to select, matched against its NAME (e.g. "Hindi") */
+  audioLanguage?: string
+  className?: string
+}
+
+type NativeAudioTracks = { length: number; [index: number]: { label: string; enabled: boolean } }
+
+/**
+ * Plays an HLS stream: natively where the browser supports it (Safari), otherwise through hls.js.
+ * Segments are only fetched once playback starts, so a page with several players stays cheap.
+ */
+export function StreamPlayer({ src, fallbackSrc, audioLanguage, className }: StreamPlayerProps) {
+  const videoRef = useRef<HTMLVideoElement>(null)
+
+  useEffect(() => {
+    const video = videoRef.current
+    if (!video) return
+    let hls: import('hls.js').default | null = null
+    let cancelled = false
+
+    const fallBack = () => {
+      hls?.destroy()
+      hls = null
+      if (fallbackSrc) video.src = fallbackSrc
+    }
+
+    if (video.canPlayType('application/vnd.apple.mpegurl')) {
+      const selectNativeTrack = () => {
+        const tracks = (video as HTMLVideoElement & { audioTracks?: NativeAudioTracks }).audioTracks
+        if (!tracks || !audioLanguage) return
+        for (let i = 0; i < tracks.length; i++) {
+          tracks[i].enabled = tracks[i].label === audioLanguage
+        }
+      }
+      video.addEventListener('loadedmetadata', selectNativeTrack)
+      video.addEventListener('error', fallBack, { once: true })
+      video.src = src
+      return () => {
+        video.removeEventListener('loadedmetadata', selectNativeTrack)
+        video.removeEventListener('error', fallBack)
+      }
+    }
+
+    const startLoad = () => hls?.startLoad()
+    import('hls.js')
+      .then(({ default: Hls }) => {
+        if (cancelled) return
+        if (!Hls.isSupported()) {
+          fallBack()
+          return
+        }
+        hls = new Hls({ autoStartLoad: false })
+        hls.on(Hls.Events.MANIFEST_PARSED, () => {
+          const index = hls?.audioTracks.findIndex((track) => track.name === audioLanguage) ?? -1
+          if (hls && index >= 0) hls.audioTrack = index
+        })
+        hls.on(Hls.Events.ERROR, (_event, data) => {
+          if (data.fatal) fallBack()
+        })
+        hls.loadSource(src)
+        hls.attachMedia(video)
+        video.addEventListener('play', startLoad, { once: true })
+      })
+      .catch(fallBack)
+
+    return () => {
+      cancelled = true
+      video.removeEventListener('play', startLoad)
+      hls?.destroy()
+    }
+  }, [src, fallbackSrc, audioLanguage])
+
+  return <video ref={videoRef} controls preload="metadata" className={className} crossOrigin="anonymous" />
+}
@@ -85,6 +85,20 @@ export function PipelineVisualizer() {
         </div>
       )}
 
+      {typeof currentJob.queuePosition === 'number' && (
+        <div className="glass rounded-lg p-4 text-center">
+          <p className="text-sm text-muted-foreground">Waiting in queue</p>
+          <p className="text-lg font-semibold mt-1">
+            Position {currentJob.queuePosition}
+            {typeof currentJob.estimatedStartTime === 'number' && (
+              <span className="text-xs text-muted-foreground ml-2">
+                (starts around {new Date(currentJob.estimatedStartTime * 1000).toLocaleTimeString()})
+              </span>
+            )}
+          </p>
+        </div>
+      )}
+
       <div className="space-y-4">
         {stages.map((stageConfig, index) => {
           const isActive = currentJob.stage === stageConfig.stage
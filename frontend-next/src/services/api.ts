@@ -32,6 +32,10 @@ export const apiService = {
       return { jobId: `job_${Date.now()}` }
     }
 
+    if (file.size >= RESUMABLE_THRESHOLD_BYTES) {
+      return apiService.uploadVideoResumable(file, languages, voiceOptions, sourceLanguage, voiceSample)
+    }
+
     const formData = new FormData()
     formData.append('video', file)
     formData.append('languages', JSON.stringify(languages))
@@ -49,6 +53,74 @@ export const apiService = {
     return response.data
   },
 
+  /**
+   * Resumable upload: chunks are PUT at byte offsets and retried individually. The upload id is kept in
+   * localStorage, so calling this again for the same file (e.g. after a reload) only sends missing ranges.
+   */
+  async uploadVideoResumable(
+    file: File,
+    languages: string[],
+    voiceOptions: any,
+    sourceLanguage?: string,
+    voiceSample?: File | null,
+    onProgress?: (fraction: number) => void
+  ): Promise<{ jobId: string }> {
+    const storageKey = `vidiolingua-upload:${file.name}:${file.size}:${file.lastModified}`
+    let upload: UploadState | null = null
+    const savedId = typeof window !== 'undefined' ? window.localStorage.getItem(storageKey) : null
+    if (savedId) {
+      try {
+        upload = (await api.get(`/api/uploads/${savedId}`)).data
+      } catch {
+        upload = null
+      }
+    }
+    if (!upload) {
+      upload = (
+        await api.post('/api/uploads', {
+          size: file.size,
+          filename: file.name,
+          contentType: file.type || 'video/mp4',
+          languages,
+          voiceOptions,
+          sourceLanguage: sourceLanguage || '',
+        })
+      ).data as UploadState
+      window.localStorage.setItem(storageKey, upload.uploadId)
+    }
+
+    const { uploadId, chunkSize } = upload
+    for (const [start, end] of missingRanges(upload.received, file.size, chunkSize)) {
+      for (let attempt = 1; ; attempt++) {
+        try {
+          upload = (
+            await api.put(`/api/uploads/${uploadId}`, file.slice(start, end), {
+              params: { offset: start },
+              headers: { 'Content-Type': 'application/octet-stream' },
+              timeout: 0,
+            })
+          ).data as UploadState
+          onProgress?.(upload.receivedBytes / Math.max(1, file.size))
+          break
+        } catch (err) {
+          if (attempt >= UPLOAD_CHUNK_ATTEMPTS) throw err
+          await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** (attempt - 1)))
+        }
+      }
+    }
+
+    if (voiceSample) {
+      const formData = new FormData()
+      formData.append('voiceSample', voiceSample)
+      await api.post(`/api/uploads/${uploadId}/voice-sample`, formData, {
+        headers: { 'Content-Type': 'multipart/form-data' },
+      })
+    }
+    const response = await api.post(`/api/uploads/${uploadId}/finalize`, null, { timeout: 0 })
+    window.localStorage.removeItem(storageKey)
+    return response.data
+  },
+
   /**
    * Get job status
    */
@@ -75,6 +147,17 @@ export const apiService = {
     return response.data
   },
 
+  /**
+   * Queue a finished job again with more target languages; only the new ones are processed
+   */
+  async addLanguages(
+    jobId: string,
+    languages: string[]
+  ): Promise<{ jobId: string; languages: string[]; added: string[] }> {
+    const response = await api.post(`/api/job/${jobId}/languages`, { languages })
+    return response.data
+  },
+
   /**
    * Health check
    */
@@ -88,6 +171,32 @@ export const apiService = {
   },
 }
 
+// Files at least this large use the resumable upload protocol
+const RESUMABLE_THRESHOLD_BYTES = 64 * 1024 * 1024
+const UPLOAD_CHUNK_ATTEMPTS = 5
+
+type UploadState = {
+  uploadId: string
+  size: number
+  received: [number, number][]
+  receivedBytes: number
+  complete: boolean
+  chunkSize: number
+}
+
+// Byte ranges not yet received, split into chunks of at most chunkSize
+function missingRanges(received: [number, number][], size: number, chunkSize: number): [number, number][] {
+  const ranges: [number, number][] = []
+  let pos = 0
+  for (const [start, end] of [...received, [size, size] as [number, number]]) {
+    for (let at = pos; at < start; at += chunkSize) {
+      ranges.push([at, Math.min(at + chunkSize, start)])
+    }
+    pos = Math.max(pos, end)
+  }
+  return ranges
+}
+
 // Mock status generator
 function generateMockStatus(jobId: string): JobStatus {
   const stages: Array<{ stage: JobStatus['stage']; progress: number }> = [
@@ -14,6 +14,10 @@ export type JobStatus = {
   languages?: string[]
   sourceLanguage?: string
   sourceLanguageConfidence?: number
+  /** 1-based position while the job waits for a scheduler worker; null once started */
+  queuePosition?: number | null
+  /** Estimated start while queued, in epoch seconds */
+  estimatedStartTime?: number | null
   error?: string
   metrics?: {
     wer?: number // Word Error Rate (ASR)
@@ -42,6 +46,17 @@ export type ProcessingResult = {
     totalTime: number
     languagesProcessed: number
   }
+  /** One file with the original video stream and an audio track per language (VIDIOLINGUA_OUTPUT_MODE) */
+  multiTrackVideo?: {
+    url: string
+    format: 'mp4' | 'mkv'
+    tracks: {
+      language: string
+      code: string
+    }[]
+  }
+  /** HLS master playlist: shared video segments with one alternate audio rendition per language (VIDIOLINGUA_HLS) */
+  streamUrl?: string
   /** Set when pipeline failed or produced no dubbed videos */
   error?: string
 }
@@ -0,0 +1,88 @@
+"""
+HLS packaging of dubbed outputs.
+
+The source video stream is segmented once (stream copy, no re-encode) and every language becomes an
+audio-only rendition cut on the same segment grid, so all languages share one set of video segments.
+A master playlist groups the renditions as alternate audio (EXT-X-MEDIA) for the single video variant.
+One ffmpeg run writes every playlist. Requires ffmpeg/ffprobe on PATH.
+"""
+
+import os
+import subprocess
+from pathlib import Path
+
+AUDIO_BITRATE = 128_000
+
+
+def segment_seconds() -> float:
+    return float(os.environ.get("VIDIOLINGUA_HLS_SEGMENT_SECONDS", "6"))
+
+
+def _probe_duration(video_path: Path) -> float | None:
+    try:
+        r = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(video_path)],
+            capture_output=True,
+            text=True,
+        )
+    except FileNotFoundError:
+        return None
+    try:
+        return float(r.stdout.strip())
+    except ValueError:
+        return None
+
+
+def _hls_output(playlist: Path, seconds: float) -> list:
+    playlist.parent.mkdir(parents=True, exist_ok=True)
+    return [
+        "-f", "hls",
+        "-hls_time", f"{seconds:g}",
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", str(playlist.parent / "seg_%05d.ts"),
+        str(playlist),
+    ]
+
+
+def package_hls(
+    video_path: Path,
+    audio_files: dict[str, Path],
+    output_dir: Path,
+    language_names: dict[str, str] | None = None,
+) -> Path:
+    """
+    Write output_dir/master.m3u8, output_dir/video/ and output_dir/audio_<lang>/. Returns the master
+    playlist path. Dubbed audio is padded with silence to the video's duration.
+    """
+    language_names = language_names or {}
+    output_dir.mkdir(parents=True, exist_ok=True)
+    seconds = segment_seconds()
+    duration = _probe_duration(video_path)
+    cmd = ["ffmpeg", "-y", "-i", str(video_path)]
+    for lang in audio_files:
+        cmd += ["-i", str(audio_files[lang])]
+    cmd += ["-map", "0:v:0", "-c:v", "copy"] + _hls_output(output_dir / "video" / "index.m3u8", seconds)
+    for i, lang in enumerate(audio_files, start=1):
+        cmd += ["-map", f"{i}:a:0", "-c:a", "aac", "-b:a", str(AUDIO_BITRATE), "-af", "apad"]
+        if duration:
+            cmd += ["-t", f"{duration:.3f}"]
+        cmd += _hls_output(output_dir / f"audio_{lang}" / "index.m3u8", seconds)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg HLS packaging failed: {result.stderr or result.stdout}")
+
+    video_bytes = sum(f.stat().st_size for f in (output_dir / "video").glob("seg_*.ts"))
+    bandwidth = int(video_bytes * 8 / duration) + AUDIO_BITRATE if duration else 2_000_000
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for i, lang in enumerate(audio_files):
+        name = language_names.get(lang, lang)
+        default = "YES" if i == 0 else "NO"
+        lines.append(
+            f'#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="dub",LANGUAGE="{lang}",NAME="{name}",'
+            f'DEFAULT={default},AUTOSELECT={default},URI="audio_{lang}/index.m3u8"'
+        )
+    lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},AUDIO="dub"')
+    lines.append("video/index.m3u8")
+    master = output_dir / "master.m3u8"
+    master.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return master
@@ -3,17 +3,31 @@ Lip Synchronization Module
 
 Combines the original video with generated audio to create dubbed videos.
 Uses ffmpeg for audio replacement (no lip re-sync in this minimal demo).
+Languages are processed concurrently (bounded by CPU count and a memory budget), or, with
+VIDIOLINGUA_LIPSYNC_MODE=multi, muxed by one ffmpeg run that reads the source video once.
+mux_multitrack writes a single MP4/MKV instead: the video stream copied once plus one audio track per
+language, tagged with its ISO 639-2 code.
 Requires ffmpeg on PATH.
 """
 
+import argparse
+import json
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+if __package__ in (None, ""):
+    # Run as a script (python lipsync/run_lipsync.py): make the project root importable for lipsync.hls
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 INPUT_DIR = Path(__file__).parent / "input"
 OUTPUT_DIR = Path(__file__).parent / "output"
 
+# Rough peak memory of one concurrent task, used to bound the worker count by the memory budget
+TASK_MEMORY_MB = {"ffmpeg": 200, "wav2lip": 3000}
+
 
 def replace_audio_with_ffmpeg(video_path, audio_path, output_path):
     """
@@ -37,6 +51,8 @@ def replace_audio_with_ffmpeg(video_path, audio_path, output_path):
         "-c:a", "aac",
         "-map", "0:v:0",
         "-map", "1:a:0",
+        # Pad short dubbed audio with silence so -shortest ends at the video's end instead of cutting it
+        "-af", "apad",
         "-shortest",
         str(output_path),
     ]
@@ -72,41 +88,220 @@ def run_wav2lip(video_path: Path, audio_path: Path, output_path: Path) -> None:
         raise RuntimeError(f"Wav2Lip failed: {result.stderr or result.stdout}")
 
 
-def main():
+def dub_video(video_path: Path, audio_path: Path, output_path: Path) -> Path:
+    """Produce one dubbed video: Wav2Lip when VIDIOLINGUA_WAV2LIP_DIR is set, else plain audio replacement."""
+    if os.environ.get("VIDIOLINGUA_WAV2LIP_DIR"):
+        run_wav2lip(video_path, audio_path, output_path)
+    else:
+        replace_audio_with_ffmpeg(video_path, audio_path, output_path)
+    return output_path
+
+
+def _task_kind() -> str:
+    return "wav2lip" if os.environ.get("VIDIOLINGUA_WAV2LIP_DIR") else "ffmpeg"
+
+
+def lipsync_workers(languages: int) -> int:
+    """
+    Concurrent languages: VIDIOLINGUA_LIPSYNC_WORKERS (a number, or "auto" for the CPU count), further
+    capped by VIDIOLINGUA_LIPSYNC_MEMORY_MB divided by the per-task memory estimate.
+    """
+    value = os.environ.get("VIDIOLINGUA_LIPSYNC_WORKERS", "auto").strip().lower()
+    workers = (os.cpu_count() or 1) if value in ("", "auto") else max(1, int(value))
+    budget_mb = int(os.environ.get("VIDIOLINGUA_LIPSYNC_MEMORY_MB", "4096"))
+    workers = min(workers, max(1, budget_mb // TASK_MEMORY_MB[_task_kind()]))
+    return max(1, min(workers, languages))
+
+
+def replace_audio_multi(video_path: Path, audio_files: dict[str, Path], outputs: dict[str, Path]) -> dict[str, Path]:
+    """Mux every language in one ffmpeg run: the source video is read once and each output copies it."""
+    cmd = ["ffmpeg", "-y", "-i", str(video_path)]
+    for lang in audio_files:
+        cmd += ["-i", str(audio_files[lang])]
+    for i, lang in enumerate(audio_files, start=1):
+        outputs[lang].parent.mkdir(parents=True, exist_ok=True)
+        cmd += [
+            "-map", "0:v:0",
+            "-map", f"{i}:a:0",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-af", "apad",
+            "-shortest",
+            str(outputs[lang]),
+        ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr or result.stdout}")
+    return outputs
+
+
+# ISO 639-1 (pipeline language codes) -> ISO 639-2/B (container language metadata)
+ISO_639_2 = {
+    "ar": "ara", "de": "ger", "en": "eng", "es": "spa", "fr": "fre", "hi": "hin", "it": "ita",
+    "ja": "jpn", "ko": "kor", "nl": "dut", "pl": "pol", "pt": "por", "ru": "rus", "tr": "tur", "zh": "chi",
+}
+
+
+def iso_639_2(lang: str) -> str:
+    return ISO_639_2.get(lang.split("-")[0].lower(), "und")
+
+
+def multitrack_path(video_path: Path, output_dir: Path, container: str | None = None) -> Path:
+    container = (container or os.environ.get("VIDIOLINGUA_MULTITRACK_FORMAT", "mp4")).strip().lower()
+    return output_dir / f"{video_path.stem}_multitrack.{'mkv' if container == 'mkv' else 'mp4'}"
+
+
+def mux_multitrack(
+    video_path: Path,
+    audio_files: dict[str, Path],
+    output_path: Path,
+    source_language: str | None = None,
+) -> Path:
+    """
+    Write one container with the original video stream copied once, the original audio (if any) as the
+    first track, and one labeled AAC track per language. The first dubbed language is the default track.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    cmd = ["ffmpeg", "-y", "-i", str(video_path)]
+    for lang in audio_files:
+        cmd += ["-i", str(audio_files[lang])]
+    has_original = _has_audio(video_path)
+    cmd += ["-map", "0:v:0"] + (["-map", "0:a:0"] if has_original else [])
+    for i in range(1, len(audio_files) + 1):
+        cmd += ["-map", f"{i}:a:0"]
+    cmd += ["-c:v", "copy", "-c:a", "aac"]
+    # Every audio track is padded with silence, so -shortest stops at the end of the video rather than at
+    # the end of whichever track (original or dubbed) happens to be shortest
+    if has_original:
+        cmd += [
+            "-filter:a:0", "apad",
+            "-metadata:s:a:0", f"language={iso_639_2(source_language or 'und')}",
+            "-metadata:s:a:0", "title=Original",
+            "-disposition:a:0", "0",
+        ]
+    offset = 1 if has_original else 0
+    for i, lang in enumerate(audio_files):
+        track = i + offset
+        cmd += [
+            f"-filter:a:{track}", "apad",
+            f"-metadata:s:a:{track}", f"language={iso_639_2(lang)}",
+            f"-metadata:s:a:{track}", f"title={lang}",
+            f"-disposition:a:{track}", "default" if i == 0 else "0",
+        ]
+    if output_path.suffix.lower() == ".mp4":
+        cmd += ["-movflags", "+faststart"]
+    cmd += ["-shortest", str(output_path)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr or result.stdout}")
+    return output_path
+
+
+def _has_audio(video_path: Path) -> bool:
+    try:
+        r = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "a", "-show_entries", "stream=index", "-of", "csv=p=0",
+             str(video_path)],
+            capture_output=True,
+            text=True,
+        )
+    except FileNotFoundError:
+        return False
+    return r.returncode == 0 and bool(r.stdout.strip())
+
+
+def dub_videos(
+    video_path: Path,
+    audio_files: dict[str, Path],
+    output_dir: Path,
+    on_progress=None,
+) -> tuple[dict[str, Path], dict[str, str]]:
+    """
+    Dub the video into every language. Returns ({lang: output}, {lang: error}); one language failing
+    does not stop the others. on_progress(lang, done, total) is called as each language finishes.
+    """
+    outputs = {lang: output_dir / f"{video_path.stem}_dubbed_{lang}.mp4" for lang in audio_files}
+    done, errors = {}, {}
+    if not audio_files:
+        return done, errors
+    mode = os.environ.get("VIDIOLINGUA_LIPSYNC_MODE", "parallel").strip().lower()
+    if mode == "multi" and _task_kind() == "ffmpeg" and len(audio_files) > 1:
+        try:
+            done = replace_audio_multi(video_path, audio_files, outputs)
+            if on_progress:
+                on_progress(None, len(done), len(audio_files))
+            return done, errors
+        except Exception as e:
+            # One bad input fails the whole run: redo languages separately to isolate it
+            print(f"Multi-output mux failed, falling back to per-language runs: {e}", file=sys.stderr)
+    with ThreadPoolExecutor(max_workers=lipsync_workers(len(audio_files))) as pool:
+        futures = {
+            pool.submit(dub_video, video_path, audio_file, outputs[lang]): lang
+            for lang, audio_file in audio_files.items()
+        }
+        for future in as_completed(futures):
+            lang = futures[future]
+            try:
+                done[lang] = future.result()
+            except Exception as e:
+                errors[lang] = f"Error processing {audio_files[lang].name}: {e}"
+            if on_progress:
+                on_progress(lang, len(done) + len(errors), len(audio_files))
+    return {lang: done[lang] for lang in audio_files if lang in done}, errors
+
+
+def main(argv=None):
     """Main entry point for lip synchronization processing."""
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    video_files = (
-        list(INPUT_DIR.glob("*.mp4"))
-        + list(INPUT_DIR.glob("*.avi"))
-        + list(INPUT_DIR.glob("*.mov"))
-    )
-    audio_files = list(INPUT_DIR.glob("*.wav")) + list(INPUT_DIR.glob("*.mp3"))
+    parser = argparse.ArgumentParser(description="Mux generated audio into the original video.")
+    parser.add_argument("--video", type=Path, default=None, help="Original video (default: first video in input dir)")
+    parser.add_argument("--input", nargs="+", type=Path, default=[INPUT_DIR], help="Audio files or directories")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--multitrack", action="store_true", help="Write one container with a track per language")
+    parser.add_argument("--source-language", default=None, help="Language of the original audio track")
+    parser.add_argument("--hls", action="store_true", help="Package HLS (shared video segments, audio per language)")
+    parser.add_argument("--language-names", default="{}", help="JSON map of language code to display name (HLS)")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    video_files = [args.video] if args.video else []
+    audio_files = []
+    for p in args.input:
+        if p.is_dir():
+            if not args.video:
+                video_files += list(p.glob("*.mp4")) + list(p.glob("*.avi")) + list(p.glob("*.mov"))
+            audio_files += list(p.glob("*.wav")) + list(p.glob("*.mp3"))
+        elif p.is_file():
+            audio_files.append(p)
 
     if not video_files:
-        print(f"No video files found in {INPUT_DIR}")
+        print(f"No video files found in {', '.join(str(p) for p in args.input)}")
         return
     if not audio_files:
-        print(f"No audio files found in {INPUT_DIR}")
+        print(f"No audio files found in {', '.join(str(p) for p in args.input)}")
         return
 
     original_video = video_files[0]
     print(f"Using original video: {original_video.name}")
 
-    had_error = False
-    for audio_file in audio_files:
-        print(f"Processing audio: {audio_file.name}")
-        language_code = audio_file.stem.split("_")[-1]
-        output_file = OUTPUT_DIR / f"{original_video.stem}_dubbed_{language_code}.mp4"
-        try:
-            if os.environ.get("VIDIOLINGUA_WAV2LIP_DIR"):
-                run_wav2lip(original_video, audio_file, output_file)
-            else:
-                replace_audio_with_ffmpeg(original_video, audio_file, output_file)
-            print(f"Dubbed video saved to: {output_file}")
-        except Exception as e:
-            print(f"Error processing {audio_file.name}: {e}", file=sys.stderr)
-            had_error = True
-    if had_error:
+    audio_by_lang = {audio_file.stem.split("_")[-1]: audio_file for audio_file in audio_files}
+    if args.multitrack:
+        output_file = multitrack_path(original_video, output_dir)
+        mux_multitrack(original_video, audio_by_lang, output_file, args.source_language)
+        print(f"Multi-track video saved to: {output_file}")
+        return
+    if args.hls:
+        from lipsync.hls import package_hls
+
+        master = package_hls(original_video, audio_by_lang, output_dir, json.loads(args.language_names))
+        print(f"HLS master playlist saved to: {master}")
+        return
+    done, errors = dub_videos(original_video, audio_by_lang, output_dir)
+    for output_file in done.values():
+        print(f"Dubbed video saved to: {output_file}")
+    for message in errors.values():
+        print(message, file=sys.stderr)
+    if errors and not done:
         sys.exit(1)
 
 
@@ -0,0 +1,60 @@
+"""
+Benchmark chunked parallel ASR against worker count.
+
+Decodes 16 kHz audio from the given video once, then transcribes it serially (one model, whole file)
+and with asr.parallel at increasing worker counts, printing wall time and speedup.
+
+Usage: python scripts/bench_parallel_asr.py <video_path> [--model base] [--workers 1,2,4,8]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asr.model_pool import get_model_pool  # noqa: E402
+from asr.parallel import _transcribe_chunk, transcribe_parallel, worker_pool  # noqa: E402
+from asr.run_asr import _transcribe_serial  # noqa: E402
+from shared.audio import decode_audio  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark parallel ASR speedup against core count.")
+    parser.add_argument("video", type=Path)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language", default=None)
+    cpus = os.cpu_count() or 1
+    default_workers = ",".join(str(n) for n in (1, 2, 4, 8, 16) if n <= cpus)
+    parser.add_argument("--workers", default=default_workers, help="Comma-separated worker counts")
+    args = parser.parse_args()
+
+    audio = decode_audio(args.video).samples()
+    duration = len(audio) / 16000
+    print(f"Audio: {duration:.1f}s, {cpus} CPUs, model {args.model}")
+
+    get_model_pool().preload(args.model)
+    start = time.perf_counter()
+    segments, _, _ = _transcribe_serial(audio, args.model, args.language)
+    baseline = time.perf_counter() - start
+    print(f"serial      {baseline:8.1f}s  x1.00  ({len(segments)} segments, RTF {baseline / duration:.3f})")
+
+    for n in (int(x) for x in args.workers.split(",") if x.strip()):
+        # Start every worker (and load its model) first so loading is not counted
+        warmup = [(audio[: 16000 * 2], 0.0, "en")] * n
+        with worker_pool(args.model, n) as pool:
+            list(pool.map(_transcribe_chunk, warmup))
+        start = time.perf_counter()
+        segments, _, _ = transcribe_parallel(audio, args.model, args.language, workers=n)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{n:2d} workers  {elapsed:8.1f}s  x{baseline / elapsed:.2f}  "
+            f"({len(segments)} segments, RTF {elapsed / duration:.3f})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Benchmark job throughput under a synthetic burst of a mixed CPU/network workload.
+
+Modes:
+  unbounded  a thread per upload, every stage of a job in order on that thread
+  serial     a bounded pool of workers, each running one job's stages in order (VIDIOLINGUA_MAX_CONCURRENT_JOBS
+             workers, at most the CPU count, so CPU work is not oversubscribed)
+  pipelined  the stage-graph scheduler: a queue and worker pool per stage, jobs move from stage to stage
+
+Each synthetic job mimics the pipeline's resource shape without models or network: ASR and lipsync are
+fixed amounts of CPU work holding a memory buffer, translation and TTS are network waits. All jobs are
+submitted at once; the run reports jobs/hour, latency, peak RSS and, for the scheduler, per-stage
+utilization. Each mode runs in a fresh subprocess so peak RSS is measured per mode.
+
+Usage: python scripts/bench_scheduler.py --jobs 20 [--asr-mb 300] [--network-seconds 2]
+"""
+
+import argparse
+import json
+import os
+import queue
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+MODES = ("unbounded", "serial", "pipelined")
+
+
+def _cpu_work(buffer_mb: int, rounds: int) -> None:
+    import numpy as np
+
+    buf = np.ones(buffer_mb * 1024 * 1024 // 4, dtype=np.float32)
+    block = buf[: 1 << 18]
+    for _ in range(rounds):
+        np.fft.irfft(np.fft.rfft(block))
+    buf[-1] = 0
+
+
+class SyntheticRun:
+    """Stand-in for backend.pipeline_runner.PipelineRun with the same stage methods."""
+
+    def __init__(self, job: dict, args, finished: dict):
+        self.job_id = job["jobId"]
+        self.args = args
+        self.finished = finished
+
+    def asr(self) -> None:
+        _cpu_work(self.args.asr_mb, self.args.cpu_rounds)
+
+    def translation(self) -> None:
+        time.sleep(self.args.network_seconds)
+
+    def tts(self) -> None:
+        time.sleep(self.args.network_seconds)
+
+    def lipsync(self) -> None:
+        _cpu_work(self.args.asr_mb // 4, self.args.cpu_rounds // 2)
+        self.finished[self.job_id] = time.time()
+
+    def fail(self, e: Exception) -> None:
+        print(f"{self.job_id} failed: {e}", file=sys.stderr)
+        self.finished[self.job_id] = time.time()
+
+
+def _run_serially(run: SyntheticRun) -> None:
+    from backend.scheduler import PIPELINE_STAGES
+
+    for stage in PIPELINE_STAGES:
+        getattr(run, stage)()
+
+
+def run_mode(args) -> dict:
+    os.environ.setdefault("VIDIOLINGUA_JOB_STORE", "memory")
+    from backend import job_store
+    from backend.scheduler import JobScheduler, max_concurrent_jobs
+
+    finished: dict[str, float] = {}
+    job_ids = [f"bench-{i}" for i in range(args.jobs)]
+    for job_id in job_ids:
+        job_store.create_job(job_id, "", ["fr"])
+    extra = {}
+    submitted = time.time()
+    if args.mode == "pipelined":
+        scheduler = JobScheduler(start=lambda job: SyntheticRun(job, args, finished))
+        for job_id in job_ids:
+            scheduler.submit(job_id)
+        extra["lastQueuePosition"] = job_store.get_job_status_response(job_ids[-1])["queuePosition"]
+    elif args.mode == "serial":
+        pending = queue.Queue()
+        for job_id in job_ids:
+            pending.put(SyntheticRun(job_store.get_job(job_id), args, finished))
+        workers = min(max_concurrent_jobs(), max(2, os.cpu_count() or 1))
+        extra["workers"] = workers
+
+        def worker() -> None:
+            while True:
+                _run_serially(pending.get())
+
+        for _ in range(workers):
+            threading.Thread(target=worker, daemon=True).start()
+    else:
+        for job_id in job_ids:
+            run = SyntheticRun(job_store.get_job(job_id), args, finished)
+            threading.Thread(target=_run_serially, args=(run,), daemon=True).start()
+    while len(finished) < args.jobs:
+        time.sleep(0.05)
+    makespan = max(finished.values()) - submitted
+    latencies = sorted(t - submitted for t in finished.values())
+    if args.mode == "pipelined":
+        stats = scheduler.stats()
+        extra["maxJobs"] = stats["maxJobs"]
+        extra["stages"] = {
+            name: {"workers": s["workers"], "utilization": s["utilization"]} for name, s in stats["stages"].items()
+        }
+    return {
+        "mode": args.mode,
+        "jobsPerHour": round(args.jobs * 3600 / makespan),
+        "makespan": round(makespan, 2),
+        "meanLatency": round(sum(latencies) / len(latencies), 2),
+        "p95Latency": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        "peakRssMb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        **extra,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated subset of: " + ", ".join(MODES))
+    parser.add_argument("--asr-mb", type=int, default=300, help="Memory held by each synthetic ASR task")
+    parser.add_argument("--cpu-rounds", type=int, default=200, help="FFT rounds per synthetic ASR task")
+    parser.add_argument("--network-seconds", type=float, default=2.0, help="Wait per translation/TTS stage")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return 0
+
+    print(f"{'mode':>10} {'jobs/hour':>10} {'makespan':>9} {'mean lat':>9} {'p95 lat':>8} {'peak RSS':>9}")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        proc = subprocess.run([sys.executable, __file__, *sys.argv[1:], "--mode", mode], capture_output=True, text=True)
+        if proc.returncode != 0:
+            # A thread per job can exhaust memory outright; that is a result, not a benchmark bug
+            print(f"{mode:>10} failed with exit code {proc.returncode} (negative = killed by signal, e.g. out of memory)")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        detail = ""
+        if "workers" in r:
+            detail = f"  ({r['workers']} workers)"
+        if "stages" in r:
+            detail = f"  (up to {r['maxJobs']} jobs in flight; utilization " + ", ".join(
+                f"{name} {s['utilization']:.0%} of {s['workers']}" for name, s in r["stages"].items()
+            ) + ")"
+        print(
+            f"{mode:>10} {r['jobsPerHour']:>10} {r['makespan']:>8.1f}s {r['meanLatency']:>8.1f}s "
+            f"{r['p95Latency']:>7.1f}s {r['peakRssMb']:>7}MB{detail}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
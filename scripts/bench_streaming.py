@@ -0,0 +1,80 @@
+"""
+Benchmark streamed against staged ASR -> translation -> TTS for one video.
+
+Decodes the video once and runs the in-process engine both ways into throwaway directories: staged
+(run_asr, then run_translation, then run_tts) and streamed (run_streaming). Prints wall time per step
+and the streamed run's ASR time and tail. The translation memory and speech cache are disabled so
+the second run does not reuse the first one's work.
+
+Usage: python scripts/bench_streaming.py <video_path> [--languages fr,de,es] [--model base] [--window 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["VIDIOLINGUA_TM_MAX_ENTRIES"] = "0"
+os.environ["VIDIOLINGUA_TTS_CACHE_MB"] = "0"
+
+from asr.model_pool import get_model_pool  # noqa: E402
+from backend.stage_engine import InProcessEngine  # noqa: E402
+from shared.audio import decode_audio  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark streamed against staged ASR, translation and TTS.")
+    parser.add_argument("video", type=Path)
+    parser.add_argument("--languages", default="fr,de,es")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--window", type=int, default=None, help="Segments per streamed window")
+    args = parser.parse_args()
+    if args.window:
+        os.environ["VIDIOLINGUA_STREAM_WINDOW"] = str(args.window)
+    languages = [x.strip() for x in args.languages.split(",") if x.strip()]
+
+    audio = decode_audio(args.video)
+    print(f"Audio: {audio.duration:.1f}s, languages {','.join(languages)}, model {args.model}")
+    get_model_pool().preload(args.model)
+    engine = InProcessEngine()
+    name = f"{args.video.stem}_transcription"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        start = time.perf_counter()
+        transcription = engine.run_asr(args.video, out / "staged" / "asr", model_size=args.model, audio=audio)
+        asr_done = time.perf_counter()
+        translations = engine.run_translation(transcription, name, out / "staged" / "translation", languages)
+        translation_done = time.perf_counter()
+        engine.run_tts(translations, name, out / "staged" / "tts", {}, duration=audio.duration)
+        staged = time.perf_counter() - start
+        print(
+            f"staged:   {staged:7.1f}s  (ASR {asr_done - start:.1f}s, translation {translation_done - asr_done:.1f}s, "
+            f"TTS {staged - (translation_done - start):.1f}s)"
+        )
+
+        stats = {}
+        start = time.perf_counter()
+        engine.run_streaming(
+            args.video,
+            audio,
+            languages,
+            out / "streamed" / "asr",
+            out / "streamed" / "translation",
+            out / "streamed" / "tts",
+            model_size=args.model,
+            stats=stats,
+        )
+        streamed = time.perf_counter() - start
+        print(
+            f"streamed: {streamed:7.1f}s  (ASR {stats['asrSeconds']:.1f}s, tail {stats['tailSeconds']:.1f}s)  "
+            f"{staged / streamed:.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
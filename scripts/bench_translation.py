@@ -0,0 +1,58 @@
+"""
+Deterministic translation benchmark using the local stub backend.
+
+Compares one request per segment (the old behaviour) with batched requests for a synthetic
+transcription, with a simulated provider round trip.
+
+Usage: python scripts/bench_translation.py [--segments 300] [--languages 8] [--latency-ms 80]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Measure provider requests, not translation-memory hits
+os.environ["VIDIOLINGUA_TM_MAX_ENTRIES"] = "0"
+
+from translation.backends import StubBackend  # noqa: E402
+from translation.run_translate import translate_transcription  # noqa: E402
+
+LANGUAGES = ["hi", "es", "fr", "de", "ja", "zh", "ar", "pt"]
+
+
+def run(transcription: dict, languages: list[str], batch_chars: int) -> tuple[float, int]:
+    backend = StubBackend()
+    backend.max_batch_chars = batch_chars
+    start = time.perf_counter()
+    for lang in languages:
+        translate_transcription(transcription, lang, backend)
+    return time.perf_counter() - start, backend.requests
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-segment translation.")
+    parser.add_argument("--segments", type=int, default=300)
+    parser.add_argument("--languages", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    args = parser.parse_args()
+
+    os.environ["VIDIOLINGUA_STUB_LATENCY_MS"] = str(args.latency_ms)
+    transcription = {
+        "language": "en",
+        "segments": [
+            {"start": i * 2.0, "end": i * 2.0 + 1.8, "text": f"This is sentence number {i} of the lecture."}
+            for i in range(args.segments)
+        ],
+    }
+    languages = LANGUAGES[: args.languages]
+    for label, batch_chars in (("per-segment", 1), ("batched", StubBackend.max_batch_chars)):
+        elapsed, requests = run(transcription, languages, batch_chars)
+        print(f"{label:12s} {elapsed:7.2f}s  {requests:5d} requests")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Benchmark API server memory while ingesting uploads of growing size.
+
+For each size, starts a fresh backend (uvicorn) with a throwaway JOBS_DIR, streams a synthetic video of
+that size to /api/upload without building the body in client memory, and reports the server's peak RSS
+(VmHWM) before and after. With streamed ingestion the peak stays flat as the upload grows.
+
+Usage: python scripts/bench_upload_rss.py --sizes-mb 64,256,1024
+Linux only (reads /proc/<pid>/status). The pipeline that starts afterwards fails fast on the synthetic
+input; that does not affect the measurement.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CHUNK = 1024 * 1024
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _peak_rss_mb(pid: int) -> float:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _multipart_body(boundary: str, size: int):
+    """Yield a multipart/form-data body with a `size`-byte video part, one chunk at a time."""
+    yield (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="languages"\r\n\r\n["fr"]\r\n'
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="video"; filename="bench.mp4"\r\n'
+        "Content-Type: video/mp4\r\n\r\n"
+    ).encode()
+    block = os.urandom(CHUNK)
+    sent = 0
+    while sent < size:
+        n = min(CHUNK, size - sent)
+        yield block[:n]
+        sent += n
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def _wait_ready(base: str, proc: subprocess.Popen) -> None:
+    for _ in range(100):
+        if proc.poll() is not None:
+            raise RuntimeError("backend exited during startup")
+        try:
+            if requests.get(f"{base}/api/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("backend did not start")
+
+
+def measure(size_mb: int) -> tuple[float, float, float]:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as jobs_dir:
+        env = os.environ.copy()
+        env.update({"JOBS_DIR": jobs_dir, "VIDIOLINGUA_WHISPER_PRELOAD": "none", "VIDIOLINGUA_HLS": "0"})
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=str(PROJECT_ROOT),
+            env=env,
+        )
+        try:
+            _wait_ready(base, proc)
+            before = _peak_rss_mb(proc.pid)
+            boundary = uuid.uuid4().hex
+            start = time.perf_counter()
+            resp = requests.post(
+                f"{base}/api/upload",
+                data=_multipart_body(boundary, size_mb * 1024 * 1024),
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                timeout=600,
+            )
+            elapsed = time.perf_counter() - start
+            resp.raise_for_status()
+            return before, _peak_rss_mb(proc.pid), elapsed
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", default="64,256,1024", help="Comma-separated upload sizes in MB")
+    args = parser.parse_args()
+
+    print(f"{'upload MB':>10} {'peak RSS before':>16} {'peak RSS after':>15} {'growth':>8} {'MB/s':>7}")
+    for size_mb in [int(x) for x in args.sizes_mb.split(",") if x.strip()]:
+        before, after, elapsed = measure(size_mb)
+        print(f"{size_mb:>10} {before:>14.1f}MB {after:>13.1f}MB {after - before:>6.1f}MB {size_mb / elapsed:>7.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""
+Check that a job requeued by one worker process is seen as requeued by another.
+
+Two processes share a throwaway SQLite job store, like two uvicorn workers. The reader creates a job,
+runs it to "complete" and polls it; the main process then requeues the job (as POST
+/api/job/<job_id>/languages does in whichever worker receives it) and the reader must report the
+new state once its cache entry is older than VIDIOLINGUA_JOB_CACHE_TTL, not the old result.
+
+Usage: python scripts/check_job_requeue.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+CACHE_TTL = 0.2
+
+
+def reader() -> None:
+    from backend import job_store
+
+    job_store.create_job("job", "", ["fr"])
+    job_store.update_job("job", started_at=time.time())
+    job_store.update_job("job", stage="complete", progress=100, result={"jobId": "job", "localizedVideos": []})
+    print(json.dumps(job_store.get_job_status_response("job")), flush=True)
+    sys.stdin.readline()
+    time.sleep(CACHE_TTL * 2)
+    print(json.dumps(job_store.get_job_status_response("job")), flush=True)
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as jobs_dir:
+        os.environ.update(
+            {"JOBS_DIR": jobs_dir, "VIDIOLINGUA_JOB_STORE": "sqlite", "VIDIOLINGUA_JOB_CACHE_TTL": str(CACHE_TTL)}
+        )
+        proc = subprocess.Popen(
+            [sys.executable, __file__, "--reader"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        before = json.loads(proc.stdout.readline())
+        from backend import job_store
+
+        requeued = job_store.requeue_job("job", ["fr", "de"], "complete")
+        proc.stdin.write("\n")
+        proc.stdin.flush()
+        after = json.loads(proc.stdout.readline())
+        proc.wait()
+
+    problems = []
+    if before["stage"] != "complete":
+        problems.append(f"reader saw stage {before['stage']} before the requeue, expected complete")
+    if requeued is None:
+        problems.append("requeue_job did not requeue the completed job")
+    if after["stage"] != "uploading":
+        problems.append(f"reader still sees stage {after['stage']} after the requeue, expected uploading")
+    for problem in problems:
+        print(f"FAILED - {problem}")
+    if not problems:
+        print("ok: the other worker sees the requeued job")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    if "--reader" in sys.argv:
+        reader()
+    else:
+        raise SystemExit(main())
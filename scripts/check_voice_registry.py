@@ -0,0 +1,195 @@
+"""
+Check the cloned-voice registry and pooled ElevenLabs session against a local stand-in server.
+
+Starts a small HTTP server that mimics the ElevenLabs endpoints VidioLingua uses (voice add/get/delete,
+text-to-speech returning WAV), points VIDIOLINGUA_ELEVENLABS_BASE_URL at it, and verifies that:
+  - the same voice sample (even under another file name) is cloned once and then reused,
+  - expired voices are deleted remotely and replaced,
+  - a voice deleted on the server side is re-created,
+  - synthesis requests reuse pooled keep-alive connections,
+  - worker processes cloning the same new sample at once create a single voice.
+
+Usage: python scripts/check_voice_registry.py
+No network access or API key needed.
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _wav_bytes(seconds: float, freq: float, sample_rate: int = 16000) -> bytes:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pcm = (np.sin(2 * np.pi * freq * t) * 8000).astype(np.int16)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+class StandIn:
+    def __init__(self):
+        self.voices = set()
+        self.counts = {"create": 0, "get": 0, "delete": 0, "tts": 0}
+        self.connections = set()
+        # Seconds a voice creation takes, to widen the window for concurrent clones
+        self.create_delay = 0.0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        state = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _begin(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with state.lock:
+                    state.connections.add(self.client_address)
+                return self.headers.get("xi-api-key") == "test-key"
+
+            def do_POST(self):
+                if not self._begin():
+                    return self._reply(401, b'{"detail": "bad key"}')
+                if self.path == "/v1/voices/add":
+                    time.sleep(state.create_delay)
+                    with state.lock:
+                        state.counts["create"] += 1
+                        voice_id = f"voice{state.counts['create']}"
+                        state.voices.add(voice_id)
+                    return self._reply(200, json.dumps({"voice_id": voice_id}).encode())
+                if self.path.startswith("/v1/text-to-speech/"):
+                    with state.lock:
+                        state.counts["tts"] += 1
+                    return self._reply(200, _wav_bytes(0.5, 300), "audio/wav")
+                self._reply(404, b"{}")
+
+            def do_GET(self):
+                self._begin()
+                voice_id = self.path.rsplit("/", 1)[-1]
+                with state.lock:
+                    state.counts["get"] += 1
+                    found = voice_id in state.voices
+                self._reply(200 if found else 404, b"{}")
+
+            def do_DELETE(self):
+                self._begin()
+                voice_id = self.path.rsplit("/", 1)[-1]
+                with state.lock:
+                    state.counts["delete"] += 1
+                    state.voices.discard(voice_id)
+                self._reply(200, b"{}")
+
+        return Handler
+
+
+def _clone_in_worker(sample: str, results) -> None:
+    from tts.run_tts import resolve_voice_id
+
+    results.put(resolve_voice_id({"cloned": True}, sample))
+
+
+def main() -> int:
+    stand_in = StandIn()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stand_in.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["VIDIOLINGUA_CACHE_DIR"] = tmpdir
+        os.environ["VIDIOLINGUA_ELEVENLABS_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ["ELEVENLABS_API_KEY"] = "test-key"
+        os.environ.pop("ELEVENLABS_VOICE_ID", None)
+
+        from tts.run_tts import resolve_voice_id, synthesize_speech_pcm
+        from tts.voice_registry import get_voice_registry
+
+        sample = Path(tmpdir) / "voice_sample.wav"
+        sample.write_bytes(_wav_bytes(3.0, 180))
+        renamed = Path(tmpdir) / "another_job_sample.wav"
+        renamed.write_bytes(sample.read_bytes())
+        options = {"cloned": True}
+        failures = []
+
+        def check(name: str, ok: bool) -> None:
+            print(f"{'PASS' if ok else 'FAIL'}  {name}")
+            if not ok:
+                failures.append(name)
+
+        first = resolve_voice_id(options, str(sample))
+        second = resolve_voice_id(options, str(sample))
+        third = resolve_voice_id(options, str(renamed))
+        check("sample cloned once and reused", first == second == third and stand_in.counts["create"] == 1)
+
+        stand_in.connections.clear()
+        for _ in range(5):
+            pcm = synthesize_speech_pcm("hello there", "en", {}, first)
+        check("synthesis returns decoded audio", len(pcm) == 8000)
+        check(
+            f"keep-alive: {stand_in.counts['tts']} TTS requests over {len(stand_in.connections)} connection(s)",
+            len(stand_in.connections) < stand_in.counts["tts"],
+        )
+
+        registry = get_voice_registry()
+        registry.ttl_seconds = 0
+        expired = resolve_voice_id(options, str(sample))
+        registry.ttl_seconds = 86400
+        check(
+            "expired voice deleted remotely and replaced",
+            expired != first and stand_in.counts["delete"] == 1 and first not in stand_in.voices,
+        )
+
+        stand_in.voices.discard(expired)
+        recreated = resolve_voice_id(options, str(sample))
+        check("voice missing on the server is re-created", recreated not in (first, expired) and stand_in.counts["create"] == 3)
+
+        # Spawned workers inherit the environment (same cache directory and stand-in server)
+        fresh = Path(tmpdir) / "new_speaker.wav"
+        fresh.write_bytes(_wav_bytes(3.0, 240))
+        stand_in.create_delay = 0.5
+        before = stand_in.counts["create"]
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        workers = [ctx.Process(target=_clone_in_worker, args=(str(fresh), results)) for _ in range(4)]
+        for w in workers:
+            w.start()
+        voices = {results.get(timeout=60) for _ in workers}
+        for w in workers:
+            w.join()
+        check(
+            f"{len(workers)} processes cloning one sample: {stand_in.counts['create'] - before} voice(s) created",
+            len(voices) == 1 and stand_in.counts["create"] - before == 1,
+        )
+
+    server.shutdown()
+    print(f"Requests: {stand_in.counts}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
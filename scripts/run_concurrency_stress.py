@@ -0,0 +1,207 @@
+"""
+Concurrency stress test: submit many jobs at once and check that every job's result belongs to it.
+
+Generates N distinct synthetic videos: a test pattern with a frame size unique to the job and an English
+voice-over (gTTS) saying a code word unique to the job. They are uploaded in parallel with a different
+language subset each; once they complete the script verifies, per job:
+  - the job's original video is byte-identical to what was uploaded for that job
+  - the dubbed videos are exactly the languages requested for that job
+  - every dubbed video has the job's own frame size and duration (ffprobe)
+  - the speech in every dubbed video contains the job's code word and no other job's (faster-whisper)
+
+Start the backend with VIDIOLINGUA_TRANSLATION_BACKEND=stub for the speech check: the stub keeps the
+source text ("[fr] ... bravo ..."), so each dubbed voice repeats its job's code word.
+
+Usage: python scripts/run_concurrency_stress.py [--jobs 8] [--api http://localhost:8000] [--no-speech-check]
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+ALL_LANGUAGES = ["hi", "es", "fr", "de", "ja", "zh", "ar", "pt"]
+LANGUAGE_NAMES = {
+    "hi": "Hindi",
+    "es": "Spanish",
+    "fr": "French",
+    "de": "German",
+    "ja": "Japanese",
+    "zh": "Chinese",
+    "ar": "Arabic",
+    "pt": "Portuguese",
+}
+CODE_WORDS = [
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet", "kilo",
+    "lima", "mike", "november", "oscar", "papa", "quebec", "romeo", "sierra", "tango", "uniform", "victor",
+    "whiskey", "x-ray", "yankee", "zulu",
+]
+
+
+def code_word(index: int) -> str:
+    return CODE_WORDS[index]
+
+
+def frame_size(index: int) -> tuple[int, int]:
+    return 160 + 16 * index, 120
+
+
+def make_video(path: Path, index: int) -> None:
+    from gtts import gTTS
+
+    word = code_word(index)
+    speech = path.with_suffix(".mp3")
+    gTTS(f"This is test video {word}. The code word is {word}.", lang="en").save(str(speech))
+    width, height = frame_size(index)
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", f"testsrc=size={width}x{height}:rate=10:duration=30",
+        "-i", str(speech),
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest",
+        str(path),
+    ]
+    r = subprocess.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {r.stderr}")
+
+
+def probe(path: Path) -> tuple[int, int, float]:
+    """(width, height, duration) of a video file."""
+    r = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height:format=duration", "-of", "json", str(path),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if r.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {r.stderr}")
+    info = json.loads(r.stdout)
+    stream = info["streams"][0]
+    return stream["width"], stream["height"], float(info["format"]["duration"])
+
+
+def spoken_words(model, path: Path) -> set[str]:
+    segments, _ = model.transcribe(str(path))
+    text = " ".join(s.text for s in segments).lower().replace("x ray", "x-ray")
+    return set(re.findall(r"[a-z]+(?:-[a-z]+)?", text))
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def run_job(api: str, video: Path, languages: list[str], timeout_s: float, out_dir: Path) -> dict:
+    with open(video, "rb") as f:
+        resp = requests.post(
+            f"{api}/api/upload",
+            files={"video": (video.name, f, "video/mp4")},
+            data={"languages": json.dumps(languages), "voiceOptions": "{}", "sourceLanguage": "en"},
+            timeout=300,
+        )
+    resp.raise_for_status()
+    job_id = resp.json()["jobId"]
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        status = requests.get(f"{api}/api/job-status/{job_id}", timeout=30).json()
+        if status["stage"] in ("complete", "error"):
+            break
+        time.sleep(1)
+    else:
+        return {"jobId": job_id, "ok": False, "reason": "timed out"}
+
+    result = requests.get(f"{api}/api/result/{job_id}", timeout=30).json()
+    problems = []
+    if result.get("error"):
+        problems.append(f"error: {result['error']}")
+    if result.get("originalVideo"):
+        original = requests.get(result["originalVideo"], timeout=300).content
+        if sha256_bytes(original) != sha256_bytes(video.read_bytes()):
+            problems.append("original video does not match the uploaded file")
+    got = sorted(v["language"] for v in result.get("localizedVideos", []))
+    want = sorted(LANGUAGE_NAMES[c] for c in languages)
+    if got != want:
+        problems.append(f"languages {got} != requested {want}")
+    dubbed = []
+    for i, v in enumerate(result.get("localizedVideos", [])):
+        path = out_dir / f"{video.stem}_dubbed_{i}.mp4"
+        path.write_bytes(requests.get(v["url"], timeout=300).content)
+        dubbed.append((v["language"], path))
+    return {"jobId": job_id, "ok": not problems, "problems": problems, "dubbed": dubbed}
+
+
+def check_content(outcome: dict, index: int, source: Path, model) -> None:
+    """Append a problem for every dubbed video that was not made from this job's own source."""
+    width, height, duration = probe(source)
+    others = set(CODE_WORDS) - {code_word(index)}
+    for language, path in outcome["dubbed"]:
+        got_width, got_height, got_duration = probe(path)
+        if (got_width, got_height) != (width, height):
+            outcome["problems"].append(f"{language}: frame size {got_width}x{got_height} is not this job's video")
+        # Dubbed audio is padded to the video and the video is never cut
+        if abs(got_duration - duration) > 0.5:
+            outcome["problems"].append(f"{language}: duration {got_duration:.1f}s != source {duration:.1f}s")
+        if model is None:
+            continue
+        words = spoken_words(model, path)
+        foreign = sorted(words & others)
+        if foreign:
+            outcome["problems"].append(f"{language}: speech contains other jobs' code words {foreign}")
+        elif code_word(index) not in words:
+            outcome["problems"].append(f"{language}: speech does not contain the code word '{code_word(index)}'")
+    outcome["ok"] = not outcome["problems"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--api", default="http://localhost:8000")
+    parser.add_argument("--timeout", type=float, default=900.0, help="Per-job timeout in seconds")
+    parser.add_argument("--no-speech-check", action="store_true", help="Skip transcribing the dubbed videos")
+    parser.add_argument("--whisper-model", default="base", help="faster-whisper model for the speech check")
+    args = parser.parse_args()
+    if args.jobs > len(CODE_WORDS):
+        parser.error(f"at most {len(CODE_WORDS)} jobs (one code word each)")
+
+    model = None
+    if not args.no_speech_check:
+        from faster_whisper import WhisperModel
+
+        model = WhisperModel(args.whisper_model, device="cpu", compute_type="int8")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        videos = []
+        for i in range(args.jobs):
+            video = Path(tmpdir) / f"stress_{i}.mp4"
+            make_video(video, i)
+            languages = [ALL_LANGUAGES[(i + k) % len(ALL_LANGUAGES)] for k in range(1 + i % 3)]
+            videos.append((video, languages))
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            outcomes = list(pool.map(lambda v: run_job(args.api, v[0], v[1], args.timeout, Path(tmpdir)), videos))
+        elapsed = time.time() - start
+        # After every job finished, so transcription does not compete with the backend for CPU
+        for index, (outcome, (video, _)) in enumerate(zip(outcomes, videos)):
+            if "dubbed" in outcome:
+                check_content(outcome, index, video, model)
+
+    failed = [o for o in outcomes if not o["ok"]]
+    for o in outcomes:
+        reason = o.get("reason") or "; ".join(o.get("problems", []))
+        print(f"{o['jobId']}: {'ok' if o['ok'] else 'FAILED - ' + reason}")
+    print(f"{len(outcomes) - len(failed)}/{len(outcomes)} jobs ok in {elapsed:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
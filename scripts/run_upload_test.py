@@ -1,22 +1,94 @@
+import argparse
 import json
 import mimetypes
-import sys
+import time
 from pathlib import Path
 
 import requests
 
+API_BASE = "http://localhost:8000"
+CHUNK_ATTEMPTS = 5
+
+
+def _missing_ranges(received: list, size: int, chunk_size: int) -> list:
+    """Byte ranges not yet received, split into chunks of at most chunk_size."""
+    ranges = []
+    pos = 0
+    for start, end in [*received, [size, size]]:
+        for at in range(pos, start, chunk_size):
+            ranges.append((at, min(at + chunk_size, start)))
+        pos = max(pos, end)
+    return ranges
+
+
+def upload_resumable(video_path: Path, languages: list, voice_options: dict, upload_id: str | None = None) -> dict:
+    """Resumable upload: initiate (or resume upload_id), PUT missing chunks at their offsets, finalize."""
+    size = video_path.stat().st_size
+    if upload_id:
+        state = requests.get(f"{API_BASE}/api/uploads/{upload_id}", timeout=30).json()
+    else:
+        mime_type, _ = mimetypes.guess_type(video_path.name)
+        resp = requests.post(
+            f"{API_BASE}/api/uploads",
+            json={
+                "size": size,
+                "filename": video_path.name,
+                "contentType": mime_type or "video/mp4",
+                "languages": languages,
+                "voiceOptions": voice_options,
+                "sourceLanguage": "auto",
+            },
+            timeout=30,
+        )
+        resp.raise_for_status()
+        state = resp.json()
+    upload_id = state["uploadId"]
+    print(f"Upload {upload_id}: {state['receivedBytes']}/{size} bytes already received")
+
+    with open(video_path, "rb") as f:
+        for start, end in _missing_ranges(state["received"], size, state["chunkSize"]):
+            for attempt in range(1, CHUNK_ATTEMPTS + 1):
+                f.seek(start)
+                try:
+                    resp = requests.put(
+                        f"{API_BASE}/api/uploads/{upload_id}",
+                        params={"offset": start},
+                        data=f.read(end - start),
+                        headers={"Content-Type": "application/octet-stream"},
+                        timeout=300,
+                    )
+                    resp.raise_for_status()
+                    state = resp.json()
+                    print(f"  {state['receivedBytes']}/{size} bytes")
+                    break
+                except requests.RequestException as e:
+                    if attempt == CHUNK_ATTEMPTS:
+                        raise
+                    print(f"  chunk at {start} failed ({e}); retrying")
+                    time.sleep(2 ** (attempt - 1))
+
+    resp = requests.post(f"{API_BASE}/api/uploads/{upload_id}/finalize", timeout=300)
+    print(resp.status_code)
+    return resp.json()
+
 
 def main() -> int:
-    if len(sys.argv) < 2:
-        print("Usage: python scripts/run_upload_test.py <video_path>")
-        return 2
-    video_path = Path(sys.argv[1]).resolve()
+    parser = argparse.ArgumentParser(description="Upload a video to a running backend and start a job.")
+    parser.add_argument("video_path", type=Path)
+    parser.add_argument("--resumable", action="store_true", help="Use the resumable chunked upload API")
+    parser.add_argument("--upload-id", default=None, help="Resume this resumable upload instead of starting one")
+    args = parser.parse_args()
+    video_path = args.video_path.resolve()
     if not video_path.exists():
         print(f"Video not found: {video_path}")
         return 2
 
     languages = ["hi", "es", "fr", "de", "ja", "zh", "ar", "pt"]
     voice_options = {"gender": "neutral", "emotion": "neutral", "cloned": True}
+    if args.resumable or args.upload_id:
+        print(upload_resumable(video_path, languages, voice_options, args.upload_id))
+        return 0
+
     data = {
         "languages": json.dumps(languages),
         "voiceOptions": json.dumps(voice_options),
@@ -27,7 +99,7 @@ def main() -> int:
         mime_type = "video/mp4"
     files = {"video": (video_path.name, open(video_path, "rb"), mime_type)}
     try:
-        resp = requests.post("http://localhost:8000/api/upload", files=files, data=data, timeout=300)
+        resp = requests.post(f"{API_BASE}/api/upload", files=files, data=data, timeout=300)
     finally:
         files["video"][1].close()
 
@@ -0,0 +1,133 @@
+"""
+Shared audio decode layer.
+
+Decodes a video's audio track once with ffmpeg (16 kHz mono s16le over a pipe, no temp files) into a
+DecodedAudio buffer that ASR, VAD and voice-sample extraction all read from without decoding again.
+decode_bytes does the same for encoded audio already in memory (e.g. MP3 from a TTS provider):
+in-process with miniaudio when installed, else through an ffmpeg stdin/stdout pipe.
+"""
+
+import hashlib
+import subprocess
+import threading
+import wave
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+_READ_SIZE = 1 << 20
+
+
+class DecodedAudio:
+    """16-bit mono PCM held in memory. pcm is a read-only int16 view over the decoded bytes."""
+
+    def __init__(self, data: bytes | bytearray, sample_rate: int = SAMPLE_RATE):
+        self._data = data
+        self.pcm = np.frombuffer(data, dtype=np.int16)
+        self.pcm.flags.writeable = False
+        self.sample_rate = sample_rate
+        self._float = None
+        self._digest = None
+        self._lock = threading.Lock()
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / self.sample_rate
+
+    def samples(self) -> np.ndarray:
+        """float32 samples in [-1, 1] (what Whisper and the VAD consume); converted once and cached."""
+        with self._lock:
+            if self._float is None:
+                self._float = self.pcm.astype(np.float32) / 32768.0
+            return self._float
+
+    def sha256(self) -> str:
+        """Hex digest of the PCM bytes (content address for caches); computed once."""
+        with self._lock:
+            if self._digest is None:
+                self._digest = hashlib.sha256(memoryview(self._data)).hexdigest()
+            return self._digest
+
+    def slice(self, start_s: float = 0.0, end_s: float | None = None) -> np.ndarray:
+        """int16 view of [start_s, end_s) without copying."""
+        lo = max(0, int(start_s * self.sample_rate))
+        hi = len(self.pcm) if end_s is None else min(len(self.pcm), int(end_s * self.sample_rate))
+        return self.pcm[lo:hi]
+
+    def write_wav(self, path: Path, start_s: float = 0.0, duration_s: float | None = None) -> Path:
+        """Write [start_s, start_s + duration_s) as a 16-bit mono WAV."""
+        end_s = None if duration_s is None else start_s + duration_s
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(memoryview(self.slice(start_s, end_s)).cast("B"))
+        return path
+
+
+def decode_audio(video_path: Path, sample_rate: int = SAMPLE_RATE) -> DecodedAudio:
+    """Decode the audio track of video_path to 16-bit mono PCM at sample_rate via an ffmpeg pipe."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-i", str(video_path),
+        "-vn", "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-ac", "1",
+        "pipe:1",
+    ]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg not found. Install ffmpeg and add it to PATH.") from None
+    stderr = []
+    # Drain stderr on the side so a chatty ffmpeg can never block the PCM pipe
+    drain = threading.Thread(target=lambda: stderr.append(proc.stderr.read()), daemon=True)
+    drain.start()
+    data = bytearray()
+    while True:
+        chunk = proc.stdout.read(_READ_SIZE)
+        if not chunk:
+            break
+        data += chunk
+    proc.wait()
+    drain.join()
+    if proc.returncode != 0:
+        err = b"".join(stderr).decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg extract failed: {err or proc.returncode}")
+    if len(data) % 2:
+        del data[-1]
+    return DecodedAudio(data, sample_rate)
+
+
+def decode_bytes(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode encoded audio bytes (MP3, WAV, ...) to mono int16 samples at sample_rate, without temp files."""
+    if not data:
+        return np.zeros(0, dtype=np.int16)
+    try:
+        import miniaudio
+    except ImportError:
+        miniaudio = None
+    if miniaudio is not None:
+        try:
+            decoded = miniaudio.decode(
+                data, output_format=miniaudio.SampleFormat.SIGNED16, nchannels=1, sample_rate=sample_rate
+            )
+            return np.frombuffer(decoded.samples, dtype=np.int16).copy()
+        except miniaudio.DecodeError:
+            pass  # Unsupported container: let ffmpeg try
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-ac", "1",
+        "pipe:1",
+    ]
+    try:
+        r = subprocess.run(cmd, input=data, capture_output=True)
+    except FileNotFoundError:
+        raise RuntimeError(
+            "ffmpeg not found. Install ffmpeg and add it to PATH (or pip install miniaudio)."
+        ) from None
+    if r.returncode != 0:
+        raise RuntimeError(f"ffmpeg decode failed: {r.stderr.decode('utf-8', errors='replace').strip() or r.returncode}")
+    pcm = r.stdout[: len(r.stdout) // 2 * 2]
+    return np.frombuffer(pcm, dtype=np.int16).copy()
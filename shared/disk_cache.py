@@ -0,0 +1,119 @@
+"""
+Size-bounded, content-addressed on-disk cache with LRU eviction.
+
+Entries are files named by their key under the cache directory (sharded by the first two key
+characters). A hit refreshes the file's mtime, and when the total size exceeds max_bytes the least
+recently used entries are deleted. Writes go through a temp file and os.replace, so several
+processes can share one cache directory.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def cache_root() -> Path:
+    """VIDIOLINGUA_CACHE_DIR, else <JOBS_DIR>/.cache."""
+    configured = os.environ.get("VIDIOLINGUA_CACHE_DIR", "").strip()
+    if configured:
+        return Path(configured)
+    return Path(os.environ.get("JOBS_DIR", str(PROJECT_ROOT / "jobs"))) / ".cache"
+
+
+def make_key(*parts) -> str:
+    """sha256 over the given parts (bytes, buffers or JSON-serialisable values)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            h.update(part)
+        else:
+            h.update(json.dumps(part, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class DiskLRUCache:
+    def __init__(self, directory: Path, max_bytes: int, suffix: str = ".bin"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for f in self.directory.glob(f"*/*{self.suffix}"):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        return entries
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Rescan: other processes may have added or removed entries
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, f in entries:
+            if total <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def get_json(self, key: str):
+        data = self.get(key)
+        return None if data is None else json.loads(data.decode("utf-8"))
+
+    def put_json(self, key: str, value) -> None:
+        self.put(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
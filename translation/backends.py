@@ -0,0 +1,114 @@
+"""
+Pluggable translation backends.
+
+A backend translates a batch of segment texts in as few provider requests as possible. Select one with
+VIDIOLINGUA_TRANSLATION_BACKEND (default "google"); "stub" is a deterministic local translator for
+benchmarks and offline runs. Register more with register_backend().
+"""
+
+import os
+import threading
+import time
+
+from translation.ratelimit import TokenBucket
+
+
+class TranslationBackend:
+    name = "base"
+    # Characters per request; segments are packed into batches up to this size
+    max_batch_chars = 4500
+    # Provider request rate (token bucket); VIDIOLINGUA_TRANSLATION_RPS overrides, 0 means unlimited
+    requests_per_second = 0.0
+
+    def __init__(self):
+        self.requests = 0
+        rps = os.environ.get("VIDIOLINGUA_TRANSLATION_RPS", "").strip()
+        self.rate_limiter = TokenBucket(float(rps) if rps else self.requests_per_second)
+
+    def translate_batch(self, texts: list[str], source_lang: str, target_lang: str) -> list[str | None]:
+        """
+        Translate texts, returning exactly one output per input, in order. An input the provider gave no
+        translation for is None, never the source text, so the caller does not cache it as a translation.
+        """
+        raise NotImplementedError
+
+    def batches(self, texts: list[str]) -> list[list[int]]:
+        """Group indices of texts into batches that fit max_batch_chars (one oversized text per batch)."""
+        groups, current, size = [], [], 0
+        for i, text in enumerate(texts):
+            if current and size + len(text) + 1 > self.max_batch_chars:
+                groups.append(current)
+                current, size = [], 0
+            current.append(i)
+            size += len(text) + 1
+        if current:
+            groups.append(current)
+        return groups
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate via deep-translator, newline-joined batches."""
+
+    name = "google"
+    requests_per_second = 5.0
+
+    def _translator(self, source_lang: str, target_lang: str):
+        # A GoogleTranslator keeps the text of its current request on the instance, so concurrent batches
+        # for the same language pair must not share one; constructing it is cheap (no network)
+        try:
+            from deep_translator import GoogleTranslator
+        except ImportError as e:
+            raise RuntimeError(
+                "Translation requires deep-translator. Install with: pip install deep-translator"
+            ) from e
+        return GoogleTranslator(source=source_lang, target=target_lang)
+
+    def translate_batch(self, texts: list[str], source_lang: str, target_lang: str) -> list[str | None]:
+        translator = self._translator(source_lang, target_lang)
+        # Segments never span lines, so newlines delimit them inside one request
+        lines = [" ".join(t.split()) for t in texts]
+        self.requests += 1
+        out = translator.translate(text="\n".join(lines)) or ""
+        parts = [p.strip() for p in out.split("\n")]
+        if len(parts) == len(texts):
+            return [p or None for p in parts]
+        # The provider merged or split lines: fall back to one request per segment for this batch
+        results = []
+        for text in texts:
+            self.rate_limiter.acquire()
+            self.requests += 1
+            results.append((translator.translate(text=text) or "").strip() or None)
+        return results
+
+
+class StubBackend(TranslationBackend):
+    """Deterministic local translator: '[<lang>] <text>'. VIDIOLINGUA_STUB_LATENCY_MS simulates a round trip."""
+
+    name = "stub"
+
+    def translate_batch(self, texts: list[str], source_lang: str, target_lang: str) -> list[str]:
+        self.requests += 1
+        latency_ms = float(os.environ.get("VIDIOLINGUA_STUB_LATENCY_MS", "0"))
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        return [f"[{target_lang}] {text}" for text in texts]
+
+
+BACKENDS = {"google": GoogleBackend, "stub": StubBackend}
+_instances: dict[str, TranslationBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def register_backend(name: str, cls) -> None:
+    BACKENDS[name] = cls
+
+
+def get_backend(name: str | None = None) -> TranslationBackend:
+    """Shared backend instance (its rate limiter and request count span all calls)."""
+    name = (name or os.environ.get("VIDIOLINGUA_TRANSLATION_BACKEND", "") or "google").strip().lower()
+    if name not in BACKENDS:
+        raise RuntimeError(f"Unknown translation backend '{name}'; expected one of: {', '.join(BACKENDS)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
@@ -0,0 +1,152 @@
+"""
+Translation memory: a persistent store of segment translations consulted before any provider request.
+
+Entries live in SQLite (WAL mode) under the cache directory, keyed on provider, source language,
+target language and source text, with an index on the whitespace/case-normalized text for fuzzy
+repeats (intros, outros, disclaimers). An in-process LRU sits in front for exact repeats. The store
+keeps at most VIDIOLINGUA_TM_MAX_ENTRIES rows (0 disables it), dropping the least recently used.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from shared.disk_cache import cache_root
+
+TM_MAX_ENTRIES = int(os.environ.get("VIDIOLINGUA_TM_MAX_ENTRIES", "200000"))
+TM_LRU_SIZE = int(os.environ.get("VIDIOLINGUA_TM_LRU_SIZE", "10000"))
+# Check the row count every this many inserts
+_EVICT_EVERY = 500
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+class TranslationMemory:
+    def __init__(self, path: Path, max_entries: int = TM_MAX_ENTRIES, lru_size: int = TM_LRU_SIZE):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self._lru: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS tm (
+                provider TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                norm_text TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (provider, source_lang, target_lang, source_text)
+            )"""
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS tm_norm ON tm (provider, source_lang, target_lang, norm_text)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS tm_last_used ON tm (last_used)")
+        self._db.commit()
+
+    def _lru_get(self, key):
+        value = self._lru.get(key)
+        if value is not None:
+            self._lru.move_to_end(key)
+        return value
+
+    def _lru_put(self, key, value) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def lookup(self, texts: list[str], source_lang: str, target_lang: str, provider: str) -> tuple[dict, dict]:
+        """
+        Look up texts. Returns ({index: translation}, {"exact": n, "normalized": n, "miss": n}).
+        """
+        found = {}
+        counts = {"exact": 0, "normalized": 0, "miss": 0}
+        now = time.time()
+        with self._lock:
+            touched = []
+            for i, text in enumerate(texts):
+                key = (provider, source_lang, target_lang, text)
+                hit = self._lru_get(key)
+                kind = "exact"
+                if hit is None:
+                    row = self._db.execute(
+                        "SELECT translation FROM tm WHERE provider=? AND source_lang=? AND target_lang=? AND source_text=?",
+                        key,
+                    ).fetchone()
+                    if row is None:
+                        kind = "normalized"
+                        row = self._db.execute(
+                            "SELECT translation FROM tm WHERE provider=? AND source_lang=? AND target_lang=? "
+                            "AND norm_text=? ORDER BY last_used DESC LIMIT 1",
+                            (provider, source_lang, target_lang, normalize(text)),
+                        ).fetchone()
+                    if row is not None:
+                        hit = row[0]
+                        if kind == "exact":
+                            self._lru_put(key, hit)
+                        touched.append((now, provider, source_lang, target_lang, normalize(text)))
+                if hit is None:
+                    counts["miss"] += 1
+                else:
+                    counts[kind] += 1
+                    found[i] = hit
+            if touched:
+                self._db.executemany(
+                    "UPDATE tm SET last_used=? WHERE provider=? AND source_lang=? AND target_lang=? AND norm_text=?",
+                    touched,
+                )
+                self._db.commit()
+        return found, counts
+
+    def store(self, pairs: list[tuple[str, str]], source_lang: str, target_lang: str, provider: str) -> None:
+        """Remember (source_text, translation) pairs."""
+        if not pairs:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tm VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(provider, source_lang, target_lang, src, normalize(src), dst, now) for src, dst in pairs],
+            )
+            for src, dst in pairs:
+                self._lru_put((provider, source_lang, target_lang, src), dst)
+            self._inserts += len(pairs)
+            if self._inserts >= _EVICT_EVERY:
+                self._inserts = 0
+                self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._db.execute("SELECT COUNT(*) FROM tm").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM tm WHERE rowid IN (SELECT rowid FROM tm ORDER BY last_used LIMIT ?)", (excess,)
+            )
+
+
+_memory: TranslationMemory | None = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory | None:
+    global _memory
+    if TM_MAX_ENTRIES <= 0:
+        return None
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory(cache_root() / "translation_memory.sqlite3")
+        return _memory
@@ -0,0 +1,49 @@
+"""
+Rate limiting and retry helpers for translation providers.
+"""
+
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts up to `capacity`. rate <= 0 means unlimited."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def with_retries(fn, attempts: int = 4, base_delay: float = 0.5, max_delay: float = 8.0):
+    """
+    Call fn(), retrying on exceptions with exponential backoff and jitter.
+    RuntimeError (missing dependency, misconfiguration) is not retried.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except RuntimeError:
+            raise
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            time.sleep(delay * (0.5 + random.random() / 2))
@@ -2,13 +2,25 @@
 Machine Translation (MT) Module
 
 Translates transcription segments using Google Translate via deep-translator (no API key).
+Segments are packed into batched requests; the provider is pluggable (translation/backends.py).
 """
 
+import argparse
 import os
 import json
-import time
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+if __package__ in (None, ""):
+    # Run as a script (python translation/run_translate.py): make the project root importable
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from translation.backends import get_backend
+from translation.memory import get_translation_memory
+from translation.ratelimit import with_retries
+
 INPUT_DIR = Path(__file__).parent / "input"
 OUTPUT_DIR = Path(__file__).parent / "output"
 
@@ -18,61 +30,147 @@ TARGET_LANGUAGES = (
 )
 TARGET_LANGUAGES = [x.strip() for x in TARGET_LANGUAGES if x.strip()] or _default
 
+# Provider requests in flight across all languages and jobs in this process
+TRANSLATION_CONCURRENCY = int(os.environ.get("VIDIOLINGUA_TRANSLATION_CONCURRENCY", "8"))
+_request_slots = threading.BoundedSemaphore(max(1, TRANSLATION_CONCURRENCY))
+_stats_lock = threading.Lock()
+
 
 def translate_text(text: str, source_lang: str, target_lang: str) -> str:
-    """Translate a single segment using Google Translate (deep-translator)."""
+    """Translate a single segment with the configured backend."""
     if not text or not text.strip():
         return text
-    try:
-        from deep_translator import GoogleTranslator
-    except ImportError as e:
-        raise RuntimeError(
-            "Translation requires deep-translator. Install with: pip install deep-translator"
-        ) from e
-    try:
-        translator = GoogleTranslator(source=source_lang, target=target_lang)
-        out = translator.translate(text=text)
-        return out or text
-    except Exception as e:
-        print(f"Translation warning ({source_lang}->{target_lang}): {e}")
-        return text
+    return translate_texts([text], source_lang, target_lang)[0]
+
+
+def translate_texts(
+    texts: list[str],
+    source_lang: str,
+    target_lang: str,
+    backend=None,
+    stats: dict | None = None,
+) -> list[str]:
+    """
+    Translate many segments in batched requests. The translation memory is consulted first, so
+    only unseen segments reach the provider. Requests are rate limited per provider and retried
+    with backoff. Empty texts are passed through; a segment the provider returned nothing for, or a
+    batch that still fails, keeps its source text (with a warning) so one bad request does not lose the
+    whole language. Only real translations are stored in the translation memory, so a fallback is retried
+    on the next run instead of being cached.
+    stats, if given, accumulates translation-memory "exact", "normalized" and "miss" counts.
+    """
+    backend = backend or get_backend()
+    memory = get_translation_memory()
+    results = list(texts)
+    todo = [i for i, t in enumerate(texts) if t and t.strip()]
+    if memory is not None and todo:
+        found, counts = memory.lookup([texts[i] for i in todo], source_lang, target_lang, backend.name)
+        for j, translation in found.items():
+            results[todo[j]] = translation
+        todo = [i for j, i in enumerate(todo) if j not in found]
+        if stats is not None:
+            with _stats_lock:
+                for kind, n in counts.items():
+                    stats[kind] = stats.get(kind, 0) + n
+    # Repeated lines within the transcript are sent once
+    unique = list(dict.fromkeys(texts[i] for i in todo))
+    translated_by_text = {}
+    for batch in backend.batches(unique):
+        batch_texts = [unique[j] for j in batch]
+
+        def request():
+            backend.rate_limiter.acquire()
+            with _request_slots:
+                return backend.translate_batch(batch_texts, source_lang, target_lang)
+
+        try:
+            translated = with_retries(request)
+        except RuntimeError:
+            # Missing dependency or misconfiguration, not a transient provider error
+            raise
+        except Exception as e:
+            print(f"Translation warning ({source_lang}->{target_lang}): {e}")
+            continue
+        pairs = [(src, out) for src, out in zip(batch_texts, translated) if out]
+        if len(pairs) < len(batch_texts):
+            print(
+                f"Translation warning ({source_lang}->{target_lang}): "
+                f"{len(batch_texts) - len(pairs)} segment(s) came back empty, keeping the source text"
+            )
+        translated_by_text.update(pairs)
+        if memory is not None:
+            memory.store(pairs, source_lang, target_lang, backend.name)
+    for i in todo:
+        results[i] = translated_by_text.get(texts[i], texts[i])
+    return results
 
 
-def translate_transcription(transcription_data: dict, target_lang: str) -> dict:
+def translate_transcription(transcription_data: dict, target_lang: str, backend=None, stats: dict | None = None) -> dict:
     """Translate all segments to the target language. Keeps timestamps."""
-    translated = {
+    source_lang = transcription_data.get("language", "en")
+    segments = transcription_data.get("segments", [])
+    texts = [seg.get("text", "") for seg in segments]
+    if source_lang != target_lang:
+        texts = translate_texts(texts, source_lang, target_lang, backend, stats)
+    return {
         "video_file": transcription_data.get("video_file", ""),
-        "segments": [],
+        "segments": [
+            {"start": seg["start"], "end": seg["end"], "text": text}
+            for seg, text in zip(segments, texts)
+        ],
         "language": target_lang,
     }
-    source_lang = transcription_data.get("language", "en")
-    for seg in transcription_data.get("segments", []):
-        if source_lang == target_lang:
-            translated_text = seg.get("text", "")
-        else:
-            translated_text = translate_text(seg.get("text", ""), source_lang, target_lang)
-        translated["segments"].append({
-            "start": seg["start"],
-            "end": seg["end"],
-            "text": translated_text,
-        })
-        time.sleep(0.05)  # avoid rate limiting
-    return translated
-
-
-def main():
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    transcription_files = list(INPUT_DIR.glob("*_transcription.json"))
+
+
+def translate_languages(
+    transcription_data: dict,
+    languages: list[str],
+    on_progress=None,
+    backend=None,
+    stats: dict | None = None,
+) -> dict[str, dict]:
+    """
+    Translate into all languages concurrently. on_progress(lang, done, total) is called as each
+    language finishes. Wall-clock time tracks the slowest language rather than the sum.
+    """
+    results = {}
+    if not languages:
+        return results
+    with ThreadPoolExecutor(max_workers=min(len(languages), max(1, TRANSLATION_CONCURRENCY))) as pool:
+        futures = {
+            pool.submit(translate_transcription, transcription_data, lang, backend, stats): lang
+            for lang in languages
+        }
+        for future in as_completed(futures):
+            lang = futures[future]
+            results[lang] = future.result()
+            if on_progress:
+                on_progress(lang, len(results), len(languages))
+    return {lang: results[lang] for lang in languages}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Translate transcription JSON files.")
+    parser.add_argument("--input", nargs="+", type=Path, default=[INPUT_DIR], help="Transcription files or directories")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--languages", default=",".join(TARGET_LANGUAGES), help="Comma-separated target languages")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    target_languages = [x.strip() for x in args.languages.split(",") if x.strip()] or TARGET_LANGUAGES
+    transcription_files = []
+    for p in args.input:
+        transcription_files.extend(sorted(p.glob("*_transcription.json")) if p.is_dir() else [p])
     if not transcription_files:
-        print(f"No transcription files found in {INPUT_DIR}")
+        print(f"No transcription files found in {', '.join(str(p) for p in args.input)}")
         return
     for transcription_file in transcription_files:
         print(f"Processing: {transcription_file.name}")
         with open(transcription_file, "r", encoding="utf-8") as f:
             data = json.load(f)
-        for target_lang in TARGET_LANGUAGES:
-            translated = translate_transcription(data, target_lang)
-            output_file = OUTPUT_DIR / f"{transcription_file.stem}_{target_lang}.json"
+        for target_lang, translated in translate_languages(data, target_languages).items():
+            output_file = output_dir / f"{transcription_file.stem}_{target_lang}.json"
             with open(output_file, "w", encoding="utf-8") as f:
                 json.dump(translated, f, indent=2, ensure_ascii=False)
             print(f"Translation saved to: {output_file}")
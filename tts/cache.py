@@ -0,0 +1,40 @@
+"""
+Content-addressed synthesized-speech cache.
+
+Keyed by the text, language, provider/model, voice and voice settings of a synthesis request, and
+shared across jobs and languages: re-running a job or dubbing repeated lines reuses the audio instead
+of paying for another gTTS/ElevenLabs request. Entries are 16 kHz mono int16 PCM. Size-bounded by
+VIDIOLINGUA_TTS_CACHE_MB (0 disables).
+"""
+
+import os
+import threading
+
+from shared.disk_cache import DiskLRUCache, cache_root, make_key
+
+TTS_CACHE_MB = int(os.environ.get("VIDIOLINGUA_TTS_CACHE_MB", "512"))
+
+_cache: DiskLRUCache | None = None
+_cache_lock = threading.Lock()
+
+
+def speech_cache() -> DiskLRUCache | None:
+    global _cache
+    if TTS_CACHE_MB <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskLRUCache(cache_root() / "tts", TTS_CACHE_MB * 1024 * 1024, suffix=".pcm")
+        return _cache
+
+
+def speech_key(
+    text: str,
+    language_code: str,
+    provider: str,
+    model_id: str | None,
+    voice_id: str | None,
+    voice_settings: dict | None,
+    sample_rate: int,
+) -> str:
+    return make_key("tts", text, language_code, provider, model_id, voice_id, voice_settings, sample_rate)
@@ -0,0 +1,107 @@
+"""
+Duration fitting for synthesized speech.
+
+Each synthesized clip is tempo-changed (pitch preserved, WSOLA overlap-add in NumPy) toward the
+length of the source segment it dubs, within VIDIOLINGUA_TTS_MIN_TEMPO..VIDIOLINGUA_TTS_MAX_TEMPO
+(VIDIOLINGUA_TTS_FIT=0 disables fitting). All clips of a language are fitted in one in-process pass, or one
+at a time with fit_clip as they stream in; the report gives per-segment drift.
+"""
+
+import os
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME = 1024
+HOP_OUT = FRAME // 4
+# How far (samples) a frame may move from its nominal position to line up with the previous one
+SEEK = 256
+# Clips within this fraction of their target are left untouched
+TOLERANCE = 0.05
+
+
+def fit_enabled() -> bool:
+    return os.environ.get("VIDIOLINGUA_TTS_FIT", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def tempo_limits() -> tuple[float, float]:
+    """(slowest, fastest) allowed tempo factor; >1 speeds speech up."""
+    return (
+        float(os.environ.get("VIDIOLINGUA_TTS_MIN_TEMPO", "0.85")),
+        float(os.environ.get("VIDIOLINGUA_TTS_MAX_TEMPO", "1.5")),
+    )
+
+
+def time_stretch(clip: np.ndarray, tempo: float) -> np.ndarray:
+    """Change the tempo of an int16 clip by `tempo` (2.0 = half as long) without changing pitch."""
+    n_out = int(round(len(clip) / tempo))
+    if len(clip) < FRAME or n_out < FRAME:
+        # Too short for overlap-add; plain resampling is inaudible at this length
+        positions = np.linspace(0, len(clip) - 1, n_out) if len(clip) else np.zeros(0)
+        return np.interp(positions, np.arange(len(clip)), clip).astype(np.int16)
+    x = np.concatenate((clip.astype(np.float32), np.zeros(FRAME + SEEK, dtype=np.float32)))
+    window = np.hanning(FRAME).astype(np.float32)
+    n_frames = 1 + int(np.ceil((n_out - FRAME) / HOP_OUT))
+    starts_in = np.zeros(n_frames, dtype=np.int64)
+    overlap = FRAME - HOP_OUT
+    for k in range(1, n_frames):
+        # WSOLA: pick the frame near the nominal position that best continues the previous frame
+        natural = starts_in[k - 1] + HOP_OUT
+        nominal = int(k * HOP_OUT * tempo)
+        lo = max(0, min(nominal - SEEK, len(clip) - 1))
+        hi = max(lo, min(nominal + SEEK, len(clip) - 1))
+        candidates = np.lib.stride_tricks.sliding_window_view(x[lo:hi + overlap], overlap)
+        starts_in[k] = lo + int(np.argmax(candidates @ x[natural:natural + overlap]))
+    frames = x[starts_in[:, None] + np.arange(FRAME)[None, :]] * window
+    out_idx = (np.arange(n_frames) * HOP_OUT)[:, None] + np.arange(FRAME)[None, :]
+    out = np.zeros(out_idx[-1, -1] + 1, dtype=np.float32)
+    norm = np.zeros_like(out)
+    np.add.at(out, out_idx, frames)
+    np.add.at(norm, out_idx, np.broadcast_to(window, frames.shape))
+    out = out[:n_out] / np.maximum(norm[:n_out], 1e-3)
+    return np.clip(out, -32768, 32767).astype(np.int16)
+
+
+def fit_clip(clip: np.ndarray, target: float, sample_rate: int = SAMPLE_RATE) -> tuple[np.ndarray, float, bool]:
+    """Fit one clip to its target duration (seconds). Returns the clip, the tempo applied and whether it was clamped."""
+    slowest, fastest = tempo_limits()
+    length = len(clip) / sample_rate
+    tempo = length / target if target > 0 and length > 0 else 1.0
+    if abs(tempo - 1.0) <= TOLERANCE:
+        return clip, 1.0, False
+    limited = min(max(tempo, slowest), fastest)
+    return time_stretch(clip, limited), limited, limited != tempo
+
+
+def fit_report(drift: list[float], tempos: list[float], clamped: int) -> dict:
+    """Summary of per-segment drift (fitted minus target, seconds) and tempo."""
+    abs_drift = np.abs(np.array(drift)) if drift else np.zeros(1)
+    return {
+        "segments": len(drift),
+        "meanAbsDrift": round(float(abs_drift.mean()), 3),
+        "maxAbsDrift": round(float(abs_drift.max()), 3),
+        "within100ms": int(np.count_nonzero(abs_drift <= 0.1)) if drift else 0,
+        "clamped": int(clamped),
+        "drift": drift,
+        "tempo": tempos,
+    }
+
+
+def fit_clips(
+    clips: list[np.ndarray],
+    targets: list[float],
+    sample_rate: int = SAMPLE_RATE,
+) -> tuple[list[np.ndarray], dict]:
+    """
+    Fit every clip to its target duration (seconds) in one pass.
+    Returns the fitted clips and a report with per-segment drift (fitted minus target, seconds).
+    """
+    fitted, drift, tempos = [], [], []
+    clamped = 0
+    for clip, target in zip(clips, targets):
+        clip, tempo, was_clamped = fit_clip(clip, target, sample_rate)
+        clamped += was_clamped
+        fitted.append(clip)
+        tempos.append(round(tempo, 3))
+        drift.append(round(len(clip) / sample_rate - target, 3))
+    return fitted, fit_report(drift, tempos, clamped)
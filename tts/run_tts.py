@@ -1,31 +1,37 @@
 """
 Text-to-Speech (TTS) Module
 
-Reads translated transcription files and generates WAV audio using gTTS + ffmpeg.
-Uses gTTS for MP3, then ffmpeg to convert to WAV (no pydub; works on Python 3.13+).
+Reads translated transcription files and generates WAV audio using gTTS or ElevenLabs.
+Provider MP3 is decoded in memory (shared.audio.decode_bytes; no temp files, no pydub).
+Segments are synthesized concurrently, tempo-fitted to their source durations (tts/fit.py) and placed
+at their start times on a timeline matching the source.
 """
 
+import argparse
+import io
 import json
 import os
-import subprocess
-import tempfile
+import sys
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from pathlib import Path
 
-INPUT_DIR = Path(__file__).parent / "input"
-OUTPUT_DIR = Path(__file__).parent / "output"
+import numpy as np
 
+if __package__ in (None, ""):
+    # Run as a script (python tts/run_tts.py): make the project root importable
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def _ffmpeg_convert_to_wav(mp3_path: str, output_path: Path) -> None:
-    r = subprocess.run(
-        ["ffmpeg", "-y", "-i", mp3_path, "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", str(output_path)],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-    if r.returncode != 0:
-        raise RuntimeError(f"ffmpeg failed: {r.stderr or r.stdout or r.returncode}")
+from shared.audio import decode_bytes
+from tts.cache import speech_cache, speech_key
+from tts.fit import fit_clip, fit_clips, fit_enabled, fit_report
+from tts.timeline import SAMPLE_RATE, TimelineBuffer
+from tts.voice_registry import account_id, get_voice_registry, sample_fingerprint
+
+INPUT_DIR = Path(__file__).parent / "input"
+OUTPUT_DIR = Path(__file__).parent / "output"
 
 
 def _get_voice_settings(voice_options: dict) -> dict:
@@ -48,81 +54,133 @@ def _get_voice_settings(voice_options: dict) -> dict:
     }
 
 
-def _elevenlabs_request(api_key: str, method: str, url: str, **kwargs):
-    import requests
+# Sized for the synthesis workers of a few concurrent languages
+HTTP_POOL_SIZE = int(os.environ.get("VIDIOLINGUA_ELEVENLABS_POOL_SIZE", "16"))
+_session = None
+_session_lock = threading.Lock()
+
+
+def _elevenlabs_base_url() -> str:
+    return os.environ.get("VIDIOLINGUA_ELEVENLABS_BASE_URL", "https://api.elevenlabs.io").rstrip("/")
+
+
+def _http_session():
+    """Shared requests.Session so ElevenLabs calls reuse pooled keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _elevenlabs_request(api_key: str, method: str, path: str, **kwargs):
     headers = kwargs.pop("headers", {})
     headers["xi-api-key"] = api_key
-    headers["accept"] = "application/json"
-    return requests.request(method, url, headers=headers, timeout=120, **kwargs)
+    headers.setdefault("accept", "application/json")
+    return _http_session().request(method, _elevenlabs_base_url() + path, headers=headers, timeout=120, **kwargs)
 
 
 def _create_elevenlabs_voice(api_key: str, sample_path: str, name: str) -> str:
-    url = "https://api.elevenlabs.io/v1/voices/add"
     with open(sample_path, "rb") as f:
         files = {"files": f}
         data = {"name": name, "description": "VidioLingua auto-cloned voice"}
-        resp = _elevenlabs_request(api_key, "POST", url, files=files, data=data)
+        resp = _elevenlabs_request(api_key, "POST", "/v1/voices/add", files=files, data=data)
     if resp.status_code >= 300:
         raise RuntimeError(f"ElevenLabs voice create failed: {resp.text}")
     return resp.json().get("voice_id")
 
 
+def _elevenlabs_voice_exists(api_key: str, voice_id: str) -> bool:
+    resp = _elevenlabs_request(api_key, "GET", f"/v1/voices/{voice_id}")
+    if resp.status_code in (400, 404):
+        return False
+    if resp.status_code >= 300:
+        raise RuntimeError(f"ElevenLabs voice lookup failed: {resp.text}")
+    return True
+
+
+def _delete_elevenlabs_voice(api_key: str, voice_id: str) -> bool:
+    resp = _elevenlabs_request(api_key, "DELETE", f"/v1/voices/{voice_id}")
+    return resp.status_code < 300 or resp.status_code in (400, 404)
+
+
 def _elevenlabs_tts(
     api_key: str,
     voice_id: str,
     text: str,
     model_id: str,
-    output_mp3_path: str,
     voice_settings: dict,
-) -> None:
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+) -> bytes:
     payload = {
         "text": text,
         "model_id": model_id,
         "voice_settings": voice_settings,
     }
-    resp = _elevenlabs_request(api_key, "POST", url, json=payload, headers={"accept": "audio/mpeg"})
+    resp = _elevenlabs_request(
+        api_key, "POST", f"/v1/text-to-speech/{voice_id}", json=payload, headers={"accept": "audio/mpeg"}
+    )
     if resp.status_code >= 300:
         raise RuntimeError(f"ElevenLabs TTS failed: {resp.text}")
-    with open(output_mp3_path, "wb") as f:
-        f.write(resp.content)
+    return resp.content
 
 
-def synthesize_speech(text, language_code, output_path, voice_options=None, voice_id: Optional[str] = None):
+def _speech_provider(voice_options=None, voice_id: Optional[str] = None):
+    """(api_key, provider, model_id, voice_settings) a synthesis request with these options would use."""
+    api_key = os.environ.get("ELEVENLABS_API_KEY") or os.environ.get("VIDIOLINGUA_ELEVENLABS_API_KEY")
+    if api_key and voice_id:
+        model_id = os.environ.get("VIDIOLINGUA_ELEVENLABS_MODEL", "eleven_multilingual_v2")
+        return api_key, "elevenlabs", model_id, _get_voice_settings(voice_options or {})
+    return None, "gtts", None, None
+
+
+def _synthesize_mp3(text, language_code, voice_options=None, voice_id: Optional[str] = None) -> bytes:
+    """MP3 bytes from ElevenLabs (preferred) or gTTS, kept in memory."""
+    api_key, provider, model_id, settings = _speech_provider(voice_options, voice_id)
+    if provider == "elevenlabs":
+        return _elevenlabs_tts(api_key, voice_id, text, model_id, settings)
+    try:
+        from gtts import gTTS
+    except ImportError as e:
+        raise RuntimeError(
+            "TTS requires gTTS or ElevenLabs. Install with: pip install gTTS. "
+            "Also ensure ffmpeg is on PATH."
+        ) from e
+    buf = io.BytesIO()
+    gTTS(text=text, lang=language_code, slow=False).write_to_fp(buf)
+    return buf.getvalue()
+
+
+def synthesize_speech_pcm(text, language_code, voice_options=None, voice_id: Optional[str] = None) -> np.ndarray:
     """
-    Synthesize speech with ElevenLabs (preferred) or gTTS fallback, then convert to WAV via ffmpeg.
+    Synthesize one request's worth of text with ElevenLabs (preferred) or gTTS fallback and decode the
+    MP3 in memory to 16 kHz mono int16 samples.
     """
     if not text or not text.strip():
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_bytes(b"")
-        return output_path
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-        mp3_path = tmp.name
+        return np.zeros(0, dtype=np.int16)
     try:
-        api_key = os.environ.get("ELEVENLABS_API_KEY") or os.environ.get("VIDIOLINGUA_ELEVENLABS_API_KEY")
-        model_id = os.environ.get("VIDIOLINGUA_ELEVENLABS_MODEL", "eleven_multilingual_v2")
-        if api_key and voice_id:
-            settings = _get_voice_settings(voice_options or {})
-            _elevenlabs_tts(api_key, voice_id, text, model_id, mp3_path, settings)
-        else:
-            try:
-                from gtts import gTTS
-            except ImportError as e:
-                raise RuntimeError(
-                    "TTS requires gTTS or ElevenLabs. Install with: pip install gTTS. "
-                    "Also ensure ffmpeg is on PATH."
-                ) from e
-            tts = gTTS(text=text, lang=language_code, slow=False)
-            tts.save(mp3_path)
-        _ffmpeg_convert_to_wav(mp3_path, output_path)
-    except FileNotFoundError:
-        raise RuntimeError("ffmpeg not found. Install ffmpeg and add it to PATH.") from None
+        return decode_bytes(_synthesize_mp3(text, language_code, voice_options, voice_id), SAMPLE_RATE)
     except Exception as e:
         raise RuntimeError(f"TTS synthesis failed: {e}") from e
-    finally:
-        Path(mp3_path).unlink(missing_ok=True)
+
+
+def synthesize_speech(text, language_code, output_path, voice_options=None, voice_id: Optional[str] = None):
+    """Synthesize text to a 16 kHz mono WAV at output_path (empty file for empty text)."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    pcm = synthesize_speech_pcm(text, language_code, voice_options, voice_id)
+    if not len(pcm):
+        output_path.write_bytes(b"")
+        return output_path
+    with wave.open(str(output_path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(pcm.tobytes())
     return output_path
 
 
@@ -146,45 +204,191 @@ def _chunk_text(text: str, max_len: int) -> list[str]:
     return [c for c in chunks if c]
 
 
-def generate_audio_from_transcription(transcription_data, output_path, voice_options=None, voice_id: Optional[str] = None):
+# Parallel synthesis requests per language
+TTS_WORKERS = int(os.environ.get("VIDIOLINGUA_TTS_WORKERS", "4"))
+# Adjacent segments closer than this (seconds) are synthesized as one clip, up to MAX_GROUP_CHARS
+MAX_GROUP_GAP = 0.25
+MAX_GROUP_CHARS = 300
+
+
+def group_segments(segments: list[dict]) -> list[dict]:
+    """Merge adjacent short segments with tiny gaps so each request carries a natural phrase."""
+    groups = []
+    for seg in segments:
+        text = (seg.get("text") or "").strip()
+        if not text:
+            continue
+        last = groups[-1] if groups else None
+        if (
+            last is not None
+            and seg["start"] - last["end"] <= MAX_GROUP_GAP
+            and len(last["text"]) + len(text) + 1 <= MAX_GROUP_CHARS
+        ):
+            last["text"] = f"{last['text']} {text}"
+            last["end"] = seg["end"]
+        else:
+            groups.append({"start": seg["start"], "end": seg["end"], "text": text})
+    return groups
+
+
+def synthesize_pcm(text, language_code, voice_options=None, voice_id: Optional[str] = None) -> np.ndarray:
+    """
+    Synthesize text to 16 kHz mono int16 samples (texts over MAX_CHARS_PER_CHUNK are split).
+    Chunks are served from the shared speech cache when the same request was synthesized before.
+    """
+    cache = speech_cache()
+    _, provider, model_id, settings = _speech_provider(voice_options, voice_id)
+    clips = []
+    for chunk in _chunk_text(text, MAX_CHARS_PER_CHUNK):
+        key = speech_key(chunk, language_code, provider, model_id, voice_id, settings, SAMPLE_RATE)
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            clips.append(np.frombuffer(cached, dtype=np.int16))
+            continue
+        clip = synthesize_speech_pcm(chunk, language_code, voice_options, voice_id)
+        if cache and len(clip):
+            cache.put(key, clip.tobytes())
+        clips.append(clip)
+    return np.concatenate(clips) if clips else np.zeros(0, dtype=np.int16)
+
+
+def generate_audio_from_transcription(
+    transcription_data,
+    output_path,
+    voice_options=None,
+    voice_id: Optional[str] = None,
+    duration: Optional[float] = None,
+):
+    """
+    Synthesize each segment (or small group of adjacent segments) concurrently, fit every clip to its
+    segment's end - start, and place it at the segment's start in a buffer of the source duration
+    (default: the last segment's end), then write the WAV once. The fitting report (per-segment drift)
+    is written next to the WAV as <name>.fit.json.
+    """
     language_code = transcription_data.get("language", "en")
-    full_text = " ".join(
-        segment["text"] for segment in transcription_data.get("segments", [])
-    )
-    if not full_text.strip():
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_bytes(b"")
-        return output_path
-    chunks = _chunk_text(full_text, MAX_CHARS_PER_CHUNK)
-    if len(chunks) == 1:
-        return synthesize_speech(chunks[0], language_code, output_path, voice_options, voice_id)
-    # Multiple chunks: generate each, then concat with ffmpeg
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    wavs = []
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmp = Path(tmpdir)
-        for i, chunk in enumerate(chunks):
-            wav = tmp / f"chunk_{i}.wav"
-            synthesize_speech(chunk, language_code, wav, voice_options, voice_id)
-            wavs.append(wav)
-        # Concat using ffmpeg concat demuxer (paths with forward slashes for compatibility)
-        concat_list = tmp / "concat.txt"
-        concat_list.write_text("\n".join(f"file '{w.resolve().as_posix()}'" for w in wavs))
-        r = subprocess.run(
-            ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(concat_list), "-c", "copy", str(output_path)],
-            capture_output=True, text=True, encoding="utf-8", errors="replace",
-        )
-        if r.returncode != 0:
-            raise RuntimeError(f"ffmpeg concat failed: {r.stderr or r.stdout}")
-    return output_path
+    segments = transcription_data.get("segments", [])
+    groups = group_segments(segments)
+    if duration is None:
+        duration = max((seg["end"] for seg in segments), default=0.0)
+    timeline = TimelineBuffer(duration)
+    if groups:
+        with ThreadPoolExecutor(max_workers=max(1, min(TTS_WORKERS, len(groups)))) as pool:
+            clips = list(pool.map(
+                lambda g: synthesize_pcm(g["text"], language_code, voice_options, voice_id), groups
+            ))
+        if fit_enabled():
+            clips, report = fit_clips(clips, [g["end"] - g["start"] for g in groups], timeline.sample_rate)
+            write_fit_report(output_path, report)
+        for group, clip in zip(groups, clips):
+            timeline.add(clip, group["start"])
+    return timeline.write_wav(output_path)
 
 
-def main():
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    transcription_files = list(INPUT_DIR.glob("*_transcription_*.json"))
+class DubTrack:
+    """
+    One language's dubbed audio, built incrementally for streaming: add_group() synthesizes a segment
+    group, fits it to its duration and mixes it in at its start as soon as its text is known (safe to call
+    from several threads); finish() writes the WAV and the fit report like generate_audio_from_transcription.
+    """
+
+    def __init__(self, language_code: str, output_path, duration: float, voice_options=None, voice_id: Optional[str] = None):
+        self.language_code = language_code
+        self.output_path = Path(output_path)
+        self.voice_options = voice_options
+        self.voice_id = voice_id
+        self.timeline = TimelineBuffer(duration)
+        self._fitted: list[tuple[float, float, float, bool]] = []
+        self._lock = threading.Lock()
+
+    def add_group(self, group: dict) -> None:
+        clip = synthesize_pcm(group["text"], self.language_code, self.voice_options, self.voice_id)
+        if fit_enabled():
+            target = group["end"] - group["start"]
+            clip, tempo, clamped = fit_clip(clip, target, self.timeline.sample_rate)
+            with self._lock:
+                drift = round(len(clip) / self.timeline.sample_rate - target, 3)
+                self._fitted.append((group["start"], drift, round(tempo, 3), clamped))
+        self.timeline.add(clip, group["start"])
+
+    def report(self) -> dict:
+        with self._lock:
+            fitted = sorted(self._fitted)
+        return fit_report([f[1] for f in fitted], [f[2] for f in fitted], sum(f[3] for f in fitted))
+
+    def finish(self) -> Path:
+        if fit_enabled() and self._fitted:
+            write_fit_report(self.output_path, self.report())
+        return self.timeline.write_wav(self.output_path)
+
+
+def fit_report_path(output_path) -> Path:
+    return Path(output_path).with_suffix(".fit.json")
+
+
+def write_fit_report(output_path, report: dict) -> None:
+    path = fit_report_path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+
+
+def cloned_voice_id(api_key: str, voice_sample: str) -> str:
+    """
+    The ElevenLabs clone of voice_sample: reused from the voice registry when the same sample audio was
+    cloned before (and the voice still exists), otherwise created once and registered. Creating a voice
+    also deletes this account's voices that have expired in the registry.
+    """
+    registry = get_voice_registry()
+    base_url = _elevenlabs_base_url()
+    account = account_id(api_key)
+    key = registry.make_key(sample_fingerprint(voice_sample), account, base_url)
+    with registry.key_lock(key):
+        voice_id = registry.lookup(key)
+        if voice_id and _elevenlabs_voice_exists(api_key, voice_id):
+            return voice_id
+        # Includes this sample's own expired voice, which is about to be replaced
+        for stale_key, stale_voice in registry.stale(account, base_url):
+            try:
+                if _delete_elevenlabs_voice(api_key, stale_voice):
+                    registry.forget(stale_key)
+            except Exception as e:
+                print(f"Could not delete stale voice {stale_voice}: {e}")
+        voice_id = _create_elevenlabs_voice(api_key, voice_sample, f"vidiolingua_{key[:12]}")
+        registry.store(key, account, base_url, voice_id)
+    return voice_id
+
+
+def resolve_voice_id(voice_options: dict, voice_sample: Optional[str] = None) -> Optional[str]:
+    """
+    Pick the ElevenLabs voice for a run: a clone of voice_sample when cloning is requested,
+    otherwise the configured default voice (None means gTTS).
+    """
+    api_key = os.environ.get("ELEVENLABS_API_KEY") or os.environ.get("VIDIOLINGUA_ELEVENLABS_API_KEY")
+    default_voice_id = os.environ.get("ELEVENLABS_VOICE_ID") or os.environ.get("VIDIOLINGUA_ELEVENLABS_VOICE_ID")
+    voice_id = default_voice_id
+    if api_key and (voice_options or {}).get("cloned") and voice_sample:
+        try:
+            voice_id = cloned_voice_id(api_key, voice_sample)
+        except Exception as e:
+            print(f"Voice cloning unavailable, falling back to default voice: {e}")
+    return voice_id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthesize speech for translated transcriptions.")
+    parser.add_argument("--input", nargs="+", type=Path, default=[INPUT_DIR], help="Translated JSON files or directories")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--duration", type=float, default=None, help="Source duration in seconds (output length)")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    transcription_files = []
+    for p in args.input:
+        transcription_files.extend(sorted(p.glob("*_transcription_*.json")) if p.is_dir() else [p])
 
     if not transcription_files:
-        print(f"No translated transcription files found in {INPUT_DIR}")
+        print(f"No translated transcription files found in {', '.join(str(p) for p in args.input)}")
         return
 
     voice_options = {}
@@ -192,23 +396,15 @@ def main():
         voice_options = json.loads(os.environ.get("VIDIOLINGUA_VOICE_OPTIONS", "{}"))
     except json.JSONDecodeError:
         voice_options = {}
-    use_cloned = bool(voice_options.get("cloned"))
     voice_sample = os.environ.get("VIDIOLINGUA_VOICE_SAMPLE", "").strip()
-    api_key = os.environ.get("ELEVENLABS_API_KEY") or os.environ.get("VIDIOLINGUA_ELEVENLABS_API_KEY")
-    default_voice_id = os.environ.get("ELEVENLABS_VOICE_ID") or os.environ.get("VIDIOLINGUA_ELEVENLABS_VOICE_ID")
-    voice_id = default_voice_id
-    if api_key and use_cloned and voice_sample:
-        try:
-            voice_id = _create_elevenlabs_voice(api_key, voice_sample, f"vidiolingua_{Path(voice_sample).stem}")
-        except Exception as e:
-            print(f"Voice cloning unavailable, falling back to default voice: {e}")
+    voice_id = resolve_voice_id(voice_options, voice_sample)
 
     for transcription_file in transcription_files:
         print(f"Processing: {transcription_file.name}")
         with open(transcription_file, "r", encoding="utf-8") as f:
             transcription_data = json.load(f)
-        output_file = OUTPUT_DIR / f"{transcription_file.stem}.wav"
-        generate_audio_from_transcription(transcription_data, output_file, voice_options, voice_id)
+        output_file = output_dir / f"{transcription_file.stem}.wav"
+        generate_audio_from_transcription(transcription_data, output_file, voice_options, voice_id, args.duration)
         print(f"Audio saved to: {output_file}")
 
 
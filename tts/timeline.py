@@ -0,0 +1,58 @@
+"""
+Timeline-aligned PCM assembly for dubbed audio.
+
+A TimelineBuffer is preallocated to the source duration; each synthesized clip is mixed in at its
+segment's start time, and the result is written as one 16-bit mono WAV.
+"""
+
+import threading
+import wave
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class TimelineBuffer:
+    def __init__(self, duration_s: float, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        # int32 so overlapping clips can be summed before clipping back to int16
+        self._buf = np.zeros(max(0, int(round(duration_s * sample_rate))), dtype=np.int32)
+        self._lock = threading.Lock()
+
+    @property
+    def duration(self) -> float:
+        return len(self._buf) / self.sample_rate
+
+    def add(self, clip: np.ndarray, start_s: float) -> None:
+        """Mix an int16 clip in at start_s, growing the buffer if the clip runs past the end."""
+        if len(clip) == 0:
+            return
+        at = max(0, int(round(start_s * self.sample_rate)))
+        with self._lock:
+            end = at + len(clip)
+            if end > len(self._buf):
+                self._buf = np.concatenate((self._buf, np.zeros(end - len(self._buf), dtype=np.int32)))
+            self._buf[at:end] += clip
+
+    def pcm(self) -> np.ndarray:
+        with self._lock:
+            return np.clip(self._buf, -32768, 32767).astype(np.int16)
+
+    def write_wav(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(self.pcm().tobytes())
+        return path
+
+
+def read_wav_pcm(path: Path) -> np.ndarray:
+    """Read a 16-bit mono WAV as int16 samples (empty for an empty file)."""
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.int16)
+    with wave.open(str(path), "rb") as w:
+        return np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
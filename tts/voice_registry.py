@@ -0,0 +1,124 @@
+"""
+Persistent registry of cloned ElevenLabs voices.
+
+A cloned voice is keyed by a fingerprint of the voice sample's decoded audio (plus the account and API
+base URL), so the same speaker is uploaded and cloned once and reused by later jobs. Entries unused for
+VIDIOLINGUA_VOICE_TTL_DAYS (default 30) expire; stale remote voices are deleted when a new one is
+created. Entries live in SQLite (WAL mode) under the cache directory. Creating a voice happens under a
+per-key file lock (voice_locks/ next to the database), so jobs in different worker processes that bring
+the same sample create one voice: the others wait and then find it registered.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from shared.audio import decode_bytes
+from shared.disk_cache import cache_root, make_key
+from shared.file_lock import file_lock
+
+VOICE_TTL_DAYS = float(os.environ.get("VIDIOLINGUA_VOICE_TTL_DAYS", "30"))
+
+
+def sample_fingerprint(sample_path: str | Path) -> str:
+    """sha256 of the sample's decoded 16 kHz PCM (re-encodes of the same audio match); raw bytes if undecodable."""
+    data = Path(sample_path).read_bytes()
+    try:
+        pcm = decode_bytes(data)
+        if len(pcm):
+            return hashlib.sha256(pcm.tobytes()).hexdigest()
+    except RuntimeError:
+        pass
+    return hashlib.sha256(data).hexdigest()
+
+
+def account_id(api_key: str) -> str:
+    """Stable, non-reversible id for the API key (voices belong to an account)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class VoiceRegistry:
+    def __init__(self, path: Path, ttl_days: float = VOICE_TTL_DAYS):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_days * 86400
+        self._lock = threading.Lock()
+        # One lock per key (plus a lock file shared with other processes) so concurrent jobs with the same
+        # sample create a single voice
+        self._key_locks: dict[str, threading.Lock] = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS voices (
+                key TEXT PRIMARY KEY,
+                account TEXT NOT NULL,
+                base_url TEXT NOT NULL,
+                voice_id TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS voices_last_used ON voices (account, base_url, last_used)")
+        self._db.commit()
+
+    @contextmanager
+    def key_lock(self, key: str):
+        """Exclusive per key across threads and worker processes sharing this registry."""
+        with self._lock:
+            lock = self._key_locks.setdefault(key, threading.Lock())
+        with lock, file_lock(self.path.parent / "voice_locks" / f"{key}.lock"):
+            yield
+
+    @staticmethod
+    def make_key(fingerprint: str, account: str, base_url: str) -> str:
+        return make_key("voice", fingerprint, account, base_url)
+
+    def lookup(self, key: str) -> str | None:
+        """The registered voice for key if it has not expired; refreshes its last use."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT voice_id, last_used FROM voices WHERE key=?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                return None
+            self._db.execute("UPDATE voices SET last_used=? WHERE key=?", (now, key))
+            self._db.commit()
+        return row[0]
+
+    def store(self, key: str, account: str, base_url: str, voice_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO voices VALUES (?, ?, ?, ?, ?, ?)", (key, account, base_url, voice_id, now, now)
+            )
+            self._db.commit()
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM voices WHERE key=?", (key,))
+            self._db.commit()
+
+    def stale(self, account: str, base_url: str) -> list[tuple[str, str]]:
+        """(key, voice_id) of expired entries for this account."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            return self._db.execute(
+                "SELECT key, voice_id FROM voices WHERE account=? AND base_url=? AND last_used<?",
+                (account, base_url, cutoff),
+            ).fetchall()
+
+
+_registry: VoiceRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_voice_registry() -> VoiceRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = VoiceRegistry(cache_root() / "voices.sqlite3")
+        return _registry